@@ -1,22 +1,16 @@
 import inspect
-import itertools
+import types
 import typing
-from typing import List
 
 import discord
 
-from yukari.baseheaders import EventWrapper, SubcommandWrapper, CommandHeader
-from yukari.converters import (
-    stringconverter,
-    integerconverter,
-    floatconverter,
-    spacedstringconverter,
-    memberconverter,
-    roleconverter
-)
-from yukari.utils import EventList, SubCommandList
+from yukari.baseheaders import ConversionPlan, ConversionStep, EventWrapper, SubcommandWrapper, CommandHeader, get_scope_id
+from yukari.converters.registry import get_converter_registry
+from yukari.converters.types import SpacedString
+from yukari.utils import EventList, SubCommandList, SubCommandTree
 from yukari.logger import LogLevel, get_logger
-from yukari.utils import DefaultValueList
+from yukari.scheduler import get_command_scheduler
+from yukari.tokenizer import TokenList
 
 
 class BaseCommand:
@@ -31,20 +25,13 @@ class BaseCommand:
     """
 
     _REQUIRED_SUBCOMMAND_PARAMS = [(("self",), inspect._empty), (("message", "msg"), discord.Message), (("lang", "language"), str)]  # noqa
-    _CONVERTERS = [
-        stringconverter.StringConverter,
-        integerconverter.IntegerConverter,
-        floatconverter.FloatConverter,
-        spacedstringconverter.SpacedStringConverter,
-        memberconverter.MemberConverter,
-        roleconverter.RoleConverter
-    ]
 
     def __init__(self, invoke: str, command_header: CommandHeader):
         self._header = command_header
         self._header.invoke = invoke
         self._events = EventList()
         self._subcommands = SubCommandList()
+        self._subcommand_tree = SubCommandTree()
 
         self._register_events()
         self._register_subcommands()
@@ -104,6 +91,8 @@ class BaseCommand:
                 if not _obj.header.invoke:
                     _obj.header.invoke = self._header.invoke
 
+                _obj.conversion_plan = self._compile_conversion_plan(_obj)
+
                 # TODO: Check if subcommand has been initialized twice or more
                 self._subcommands.append(_obj)
 
@@ -120,6 +109,7 @@ class BaseCommand:
             get_logger().warning(f"Command {self._header.invoke} has no subcommand at position 0 with invoke '{self._header.invoke}'. An empty subcommand will be created.")
             empty_subcommand = SubcommandWrapper(lambda *_: 0, "")
             empty_subcommand.header.invoke = self._header.invoke
+            empty_subcommand.conversion_plan = self._compile_conversion_plan(empty_subcommand)
             setattr(self, "________empty_subcommand________", empty_subcommand)
             self._subcommands.append(empty_subcommand)
 
@@ -153,217 +143,165 @@ class BaseCommand:
                     last_subcommand.header._next.append(_obj)  # noqa
                     self._subcommands[_idx] = last_subcommand
 
+        self._subcommand_tree.compile(self._subcommands)
+
+    def _compile_conversion_plan(self, subcommand_wrapper: SubcommandWrapper) -> ConversionPlan:
+        """
+        Inspects the subcommand function once and builds the plan used to convert the user input on every call
+
+        :param subcommand_wrapper: The SubcommandWrapper of the subcommand
+        :return: The conversion plan of the subcommand
+        """
+        subcommand_function = subcommand_wrapper.func
+
+        # The first three parameters (self, message, lang) are checked in _register_subcommands
+        # A variadic *args parameter is converted like any other parameter and receives one argument
+        function_parameters = list(inspect.signature(subcommand_function).parameters.values())[len(self._REQUIRED_SUBCOMMAND_PARAMS):]
+
+        # Arguments are passed by position, so a **kwargs parameter would never receive any
+        if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in function_parameters):
+            get_logger().error(f"Subcommand {subcommand_function} cannot take keyword arguments (**kwargs)")
+
+        converter_registry = get_converter_registry()
+        steps = []
+
+        for idx, parameter in enumerate(function_parameters):
+            # Optional[T] and Union[A, B] resolve to the converters of their types
+            # If no type is specified, there are no converters and the argument is just passed
+            resolution = converter_registry.resolve(parameter.annotation)
+
+            # Optional only works at the end of the argument list
+            if resolution.optional and idx != len(function_parameters) - 1:
+                get_logger().error(f"Can only place optional argument at the end of function {subcommand_function}")
+
+            spaced = any(isinstance(e, type) and issubclass(e, SpacedString) for e in resolution.types)
+
+            if spaced and idx != len(function_parameters) - 1:
+                get_logger().error(f"Can only place spaced string argument at the end of function {subcommand_function}")
+
+            steps.append(ConversionStep(parameter.name, idx, parameter.annotation, resolution.converters, resolution.optional, spaced))
+
+        return ConversionPlan(
+            types.MappingProxyType({parameter.name: parameter for parameter in function_parameters}),
+            tuple(steps)
+        )
+
     async def _execute_subcommand_func(
             self,
             wrapper_before: typing.Optional[SubcommandWrapper],
             subcommand_wrapper: SubcommandWrapper,
-            args: List[str],
+            args: TokenList,
             message: discord.Message,
             lang: str
     ) -> None:
         """
         Executes the subcommand function
-        Also does type checking and type conversion of the input
+        Also does type conversion of the input by running the conversion plan of the subcommand
 
         :param wrapper_before: The subcommand wrapper before the current subcommand (if any otherwise None)
         :param subcommand_wrapper: The SubcommandWrapper of the current subcommand
-        :param args: Arguments to be delivered to the subcommand. Those will be parsed before the subcommand gets executed
+        :param args: Argument tokens to be delivered to the subcommand. Those will be parsed before the subcommand gets executed
         :param message: The discord.Message object
         :param lang: A string representing the language of the user
         :return: None
         """
 
         # The previous subcommand still is on cooldown
-        if wrapper_before is not None and wrapper_before.check_cooldown(message.author.id):
+        if wrapper_before is not None and wrapper_before.check_cooldown(message):
             return
 
         parsed_arguments = []
-
-        subcommand_function = subcommand_wrapper.func
-        function_parameters = dict(inspect.signature(subcommand_function).parameters)
-
-        # Remove the first three parameters (self, message, lang)
-        for parameter_data in self._REQUIRED_SUBCOMMAND_PARAMS:
-            for parameter_name in parameter_data[0]:
-                if parameter_name in function_parameters:
-                    function_parameters.pop(parameter_name)
-                    break
-            else:
-                get_logger().error(f"Could not find required parameter(s) '{parameter_data[0]}' in signature")
-
-        # if len(args) < len(function_parameters):
-        #    raise RuntimeError("too few parameters provided")
-
-        wait_for_index = 0
+        conversion_plan = subcommand_wrapper.conversion_plan
+        argument_index = 0
 
         # Convert user input parameters to their respective types
         # TODO: Give the user some feedback when supplying wrong argument types
-        # TODO: Complete type checking at the registering process
-        # TODO: Optional arguments
-        # TODO: Arguments with multiple types
-        for idx, parameter_zipped_data in enumerate(itertools.zip_longest(args, function_parameters)):
-            if idx < wait_for_index:
-                continue
+        for step in conversion_plan.steps:
+            if argument_index >= len(args) and not step.spaced:
+                if step.converters and not step.optional:
+                    get_logger().error(f"Missing argument '{step.name}' ({step.annotation}) for {subcommand_wrapper.func}")
 
-            supplied_argument, parameter_name = parameter_zipped_data
-
-            if parameter_name is None:
-                # We have reached the end of the function parameters
-                break
-
-            parameter_type = function_parameters[parameter_name].annotation
+                parsed_arguments.append(None)
+                continue
 
-            # If no type is specified, we just pass it
-            if parameter_type == inspect._empty:  # noqa
-                parsed_arguments.append(supplied_argument)
-            elif not hasattr(parameter_type, '__origin__') and not hasattr(parameter_type, '__args__'):
-                # FIXME: This will also accept "param: Optional" or "param: Union" as well
-                for converter in self._CONVERTERS:
-                    if converter.CONVERTER_TYPE == parameter_type:
-                        custom_converter = converter(function_parameters.copy(), idx, message)
-                        result = custom_converter.convert(args[idx:])
+            if not step.converters:
+                parsed_arguments.append(args[argument_index].text)
+                argument_index += 1
+                continue
 
-                        if result is None:
-                            get_logger().error(f"Could not convert argument starting at index {idx} to {parameter_type}")
-                            break
+            # The converters of a Union are tried in the order of its types
+            for converter in step.converters:
+                result = converter(conversion_plan.parameters, step.index, message).convert(args[argument_index:])
 
-                        parsed_data, relative_index = result
-                        wait_for_index = relative_index + idx
-                        parsed_arguments.append(parsed_data)
-                        break
-                else:
-                    parsed_arguments.append(supplied_argument)
+                if result is not None:
+                    break
             else:
-                # Up until Python 3.7, typing supports __args__ and __origin__ in typing objects like Union, Optional, etc
-                # But since Python 3.8 there are two functions provided from the typing module: get_origin and get_args
-                if parameter_type.__origin__ == typing.Union:
-                    if len(parameter_type.__args__) == 2 and type(None) in parameter_type.__args__:
-                        # param: Optional[T]
-                        # Optional only works at the end of the argument list
-                        if idx != len(function_parameters) - 1:
-                            get_logger().error(f"Can only place optional argument at the end of function {subcommand_function}")
-                            return
-
-                        if supplied_argument is None:
-                            parsed_arguments.append(None)
-                        else:
-                            # Internally Optional[T] is Union[T, None]
-                            # We are going to search the optional type besides None
-                            expected_type = next(filter(lambda e: e != type(None), parameter_type.__args__))  # noqa: E721
-
-                            # And then just convert it using the list of converters
-                            for converter in self._CONVERTERS:
-                                if converter.CONVERTER_TYPE == expected_type:
-                                    custom_converter = converter(function_parameters.copy(), idx, message)
-                                    result = custom_converter.convert(args[idx:])
-
-                                    if result is None:
-                                        get_logger().error(f"Could not convert argument starting at index {idx} to {parameter_type}")
-                                        break
-
-                                    parsed_data, relative_index = result
-                                    wait_for_index = relative_index + idx
-                                    parsed_arguments.append(parsed_data)
-                                    break
-                            else:
-                                get_logger().error(f"Could not convert argument starting at index {idx} to {parameter_type}")
+                get_logger().error(f"Could not convert argument starting at index {argument_index} to {step.annotation}")
+
+            parsed_data, relative_index = result
+            argument_index += relative_index
+            parsed_arguments.append(parsed_data)
 
         await subcommand_wrapper.execute(self, message, lang, *parsed_arguments)
 
-    async def _execute(self, args: List[str], message: discord.Message, invoke: str, lang: str):
-        """
-        if no arguments are being supplied
-        invoke the default subcommand
-
-        otherwise
-        go through every subcommand
-        check if the subcommand matches the current argument
-        if there are no further subcommands after the current match that match the next argument
-        - use the arguments left over and invoke the subcommand
-        otherwise continue
+    async def _execute(
+            self,
+            args: TokenList,
+            message: discord.Message,
+            invoke: str,
+            lang: str
+    ) -> typing.Any:
         """
-        if not args:
-            # TODO: Invoke may need to be set to lowercase
-            for subcommand_wrapper in self._subcommands:
-                header = subcommand_wrapper.header
-
-                if header.name == "" and header.position == 0 and header.invoke == invoke:
-                    await self._execute_subcommand_func(None, subcommand_wrapper, args, message, lang)
-                    return
-        else:
-            _position = 1
-            previous_subcommands = DefaultValueList()
-            _nested_argument = ""
-
-            while args:
-                text_argument = args.pop(0)
-                _nested_argument += (' .'[bool(_nested_argument)] if _position > 1 else '') + text_argument
-                subcommand_search_result = self._subcommands.get(
-                    name=_nested_argument.split(".")[-1],
-                    position=_position,
-                    invoke=invoke
-                )
-
-                if subcommand_search_result is None:
-                    # If the current argument is not a valid subcommand anymore
-                    # we might've encountered a valid subcommand and the current argument is part of that subcommand (its an argument)
-                    # Try if the previous argument is a valid subcommand
-
-                    possible_last_subcommand = ['', *_nested_argument.split(".")][-2]
-                    possible_subcommand_search_result = self._subcommands.get(
-                        name=possible_last_subcommand,
-                        position=_position - 1,
-                        invoke=invoke
-                    )
-
-                    if possible_subcommand_search_result is None:
-                        # If the possible search is still none, we couldn't find any possible subcommand
-                        # TODO: Return error to user
-                        get_logger().log(
-                            LogLevel.WARNING,
-                            "Error in parsing arguments for subcommand " + self._header.get_serializable()["invoke"]
-                        )
-
-                        raise RuntimeWarning("See logger warning")
-
-                    # Otherwise run the subcommand
-                    subcommand_argument, _ = possible_subcommand_search_result
-
-                    # Include the current popped argument because we already tried searching it up as a subcommand
-                    # but the search failed
-                    return await self._execute_subcommand_func(
-                        previous_subcommands.get(-1, None),
-                        subcommand_argument,
-                        [text_argument, *args],
-                        message,
-                        lang
-                    )
-                else:
-                    subcommand_argument, _ = subcommand_search_result
-
-                    if not subcommand_argument.header._next:  # noqa
-                        return await self._execute_subcommand_func(
-                            previous_subcommands.get(-1, None),
-                            subcommand_argument,
-                            args,
-                            message,
-                            lang
-                        )
-                    elif args:
-                        # FIXME
-                        for possible_subcommand in subcommand_argument.header._next:  # noqa
-                            if possible_subcommand.header.name.split(".")[-1] == args[0]:
-                                # If we found another subcommand, the whole while loop has to jump one iteration over
-                                break
-                        else:
-                            # Otherwise, break the current while loop and execute the current subcommand
-                            return await self._execute_subcommand_func(
-                                previous_subcommands.get(-1, None),
-                                subcommand_argument,
-                                args,
-                                message,
-                                lang
-                            )
+        Walks the arguments down the compiled subcommand tree
+        as long as they name a following subcommand (one dictionary lookup per argument)
+        The deepest matching subcommand is invoked with the arguments left over
+        If no argument matches, the default subcommand (name="") gets all arguments
 
-                    previous_subcommands.append(subcommand_argument)
-                    _position += 1
+        :param args: Argument tokens of the command
+        :param message: The discord.Message object
+        :param invoke: The command invoke (can be command name or alias)
+        :param lang: A string representing the language of the user
+        :return: False if the execution got dropped by the command scheduler, otherwise None
+        """
+        search_result = self._subcommand_tree.resolve(invoke.lower(), args)
+
+        if search_result is None:
+            # Aliases of the command don't have their own subcommands unless they were declared with @Invoke
+            search_result = self._subcommand_tree.resolve(self._header.invoke.lower(), args)
+
+        if search_result is None:
+            # TODO: Return error to user
+            get_logger().log(
+                LogLevel.WARNING,
+                "Error in parsing arguments for subcommand " + self._header.invoke
+            )
+
+            raise RuntimeWarning("See logger warning")
+
+        node, consumed = search_result
+        scheduler = get_command_scheduler()
+        concurrency_limit = node.wrapper.header.max_concurrency
+        limit_name = scope_id = None
+
+        # Executions over a limit wait for a free slot, or are dropped depending on the overflow mode
+        # Dropped executions are counted in the stats of the scheduler
+        if concurrency_limit is not None:
+            limit_name = self._header.invoke + ("." + node.wrapper.header.name if node.wrapper.header.name else "")
+            scope_id = get_scope_id(message, concurrency_limit.per)
+
+            if not await scheduler.acquire(limit_name, scope_id, concurrency_limit):
+                return False
+
+        try:
+            # The global slot is only taken once the subcommand got its slot,
+            # so executions waiting for a busy subcommand don't hold global slots other commands could use
+            if not await scheduler.acquire_global():
+                return False
+
+            try:
+                return await self._execute_subcommand_func(node.previous, node.wrapper, args[consumed:], message, lang)
+            finally:
+                scheduler.release_global()
+        finally:
+            if concurrency_limit is not None:
+                scheduler.release(limit_name, scope_id)
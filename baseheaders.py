@@ -1,18 +1,27 @@
-import time
 from typing import (
     Any,
     ByteString,
     Callable,
     Dict,
+    Hashable,
     List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
     Union
 )
 
 import discord
 
+from yukari.clock import get_clock
+from yukari.cooldowns import get_subcommand_cooldowns
 from yukari.enums import EventType
 from yukari.i18n.registry import get_i18n_registry
 from yukari.logger import get_logger
+from yukari.notices import get_cooldown_notices
 
 
 class CategoryHeader:
@@ -90,7 +99,8 @@ class CommandHeader:
         :param discord_permissions: Discord permissions like discord.permissions.manage_channel
         :param alias: a list of alias for the command
         :param command_cooldown: the cooldown in seconds on that command
-        :param argument_cooldown: a dict, which keys are arguments and values are seconds. Only works on first argument
+        :param argument_cooldown: a dict, which keys are arguments and values are seconds. Only works on first argument,
+                                  arguments are matched case insensitive
         :param only_for_bot_perm: if set to true then there won't be any discord permission checks, only bot permission.
                                 Should indicate that this command is only for specific bot permissions
         :param replace_everyone_mentions: whetever the input should be cleaned with @everyone's and @here's
@@ -100,6 +110,8 @@ class CommandHeader:
 
         if argument_cooldown is None:
             argument_cooldown = {}
+        else:
+            argument_cooldown = {argument.lower(): seconds for argument, seconds in argument_cooldown.items()}
 
         if alias is None:
             alias = []
@@ -183,6 +195,9 @@ class SubCommandHeader:
         self.enforce_bot_permissions = None
         self.string_node_key = None
         self.cooldown = None
+        self.cooldown_uses = 1
+        self.cooldown_per = "user"
+        self.max_concurrency = None
         self.convert_int = None
         self.convert_boolean = None
         self._next = []
@@ -194,6 +209,44 @@ class SubCommandHeader:
         return [self.name, *self.alias]
 
 
+class ConversionStep(NamedTuple):
+    """
+    Describes how one parameter of a subcommand function is filled from the user input
+    """
+    name: str
+    index: int
+    annotation: Any
+    converters: Tuple[Type, ...]
+    optional: bool
+    spaced: bool
+
+
+class ConversionPlan(NamedTuple):
+    """
+    Immutable argument conversion plan of a subcommand, built once when the command is registered
+    """
+    parameters: Mapping[str, Any]
+    steps: Tuple[ConversionStep, ...]
+
+
+def get_scope_id(message: discord.Message, per: str) -> int:
+    """
+    :param message: the message object the user sent
+    :param per: either "global", "user", "guild" or "channel". In direct messages "guild" means the channel
+    :return: the id of the user, guild or channel a limit like a cooldown applies to, 0 for global limits
+    """
+    if per == "user":
+        return message.author.id
+
+    if per == "channel" or (per == "guild" and message.guild is None):
+        return message.channel.id
+
+    if per == "guild":
+        return message.guild.id
+
+    return 0
+
+
 class SubcommandWrapper:
     """
     Wrapper for a subcommand function. Will be used inside a decorator
@@ -217,19 +270,26 @@ class SubcommandWrapper:
             func=func
         )
 
-        self.cooldowns = {}
+        self.conversion_plan = ConversionPlan({}, ())
 
-    def check_cooldown(self, author_id: int) -> bool:
+    def get_cooldown_key(self, message: discord.Message) -> Tuple[int, str, str]:
         """
-        :param author_id: the id of the user/member to check the cooldown for
-        :return: whetever that subcommand cooldown is still there
+        :param message: the message object the user sent
+        :return: the key of the subcommand cooldown, starting with the id of the user, guild or channel it applies to
+        """
+        return get_scope_id(message, self.header.cooldown_per), self.header.invoke, self.header.name
+
+    def check_cooldown(self, message: discord.Message) -> bool:
+        """
+        :param message: the message object the user sent
+        :return: whetever that subcommand cooldown is still there (every use within the window is used up)
         """
         if self.header.cooldown is None:
             return False
 
-        now = time.time()
-
-        return author_id in self.cooldowns and now - self.cooldowns[author_id] <= self.header.cooldown
+        # Every use refills after cooldown / uses seconds, the window is only used up if less than that is left
+        expires_at = get_subcommand_cooldowns().get(self.get_cooldown_key(message))
+        return expires_at - self.header.cooldown + self.header.cooldown / self.header.cooldown_uses > get_clock().now()
 
     async def execute(self, cls, message: discord.Message, lang: str, *args: Any, **kwargs: Dict[str, Any]):
         """
@@ -245,20 +305,54 @@ class SubcommandWrapper:
         if self.header.cooldown is None:
             await self.func(cls, message, lang, *args, **kwargs)
         else:
-            now = time.time()
+            seconds_left = get_subcommand_cooldowns().acquire(
+                self.get_cooldown_key(message),
+                self.header.cooldown,
+                self.header.cooldown_uses
+            )
 
-            if not self.check_cooldown(message.author.id):
-                self.cooldowns[message.author.id] = now
+            if not seconds_left:
                 await self.func(cls, message, lang, *args, **kwargs)
-            else:
-                seconds_left = round(self.header.cooldown - (now - self.cooldowns[message.author.id]))
-                await message.channel.send(content=get_i18n_registry().get("global").query_string(lang, "command_handler.cooldown", seconds_left))
+                return
+
+            notices = get_cooldown_notices()
+            notice_key = (message.author.id, self.header.invoke, self.header.name)
+
+            if notices.should_notify(notice_key, seconds_left):
+                await notices.send(
+                    notice_key,
+                    message.channel,
+                    get_i18n_registry().get("global").query_string(lang, "command_handler.cooldown", round(seconds_left))
+                )
+
+
+class EventBatching(NamedTuple):
+    """
+    How events are collected before their handler is called once with all of them
+    """
+    window: float
+    max_batch: int
+    debounce: bool
+    key: Optional[str]
+    max_wait: float
 
 
 class EventWrapper:
-    def __init__(self, func: Callable, event_type: EventType):
+    def __init__(
+            self,
+            func: Callable,
+            event_type: EventType,
+            serial: bool = False,
+            filters: Dict[str, Set[Hashable]] = None,
+            batching: EventBatching = None
+    ):
         self.func = func
         self.event_type = event_type
+        self.serial = serial
+
+        # field -> keys the event has to match, see EventHandler.add_filter_keys for changing them at runtime
+        self.filters = filters if filters is not None else {}
+        self.batching = batching
 
     async def execute(self, cls, *args: Any):
         return await self.func(cls, *args)
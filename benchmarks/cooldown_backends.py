@@ -0,0 +1,101 @@
+"""
+Benchmark of the check-and-set latency (CooldownBackend.acquire) of the cooldown backends
+
+Usage: python -m yukari.benchmarks.cooldown_backends [iterations] [processes]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from yukari.cooldowns import CooldownBackend, CooldownBuckets, CooldownStore
+from yukari.sharedcooldowns import SharedMemoryCooldownBackend
+
+_SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _measure(backend: CooldownBackend, iterations: int, users: int) -> float:
+    """
+    :param backend: the backend to measure
+    :param iterations: the amount of acquire calls
+    :param users: the amount of distinct user ids (the fewer, the more calls hit a running cooldown)
+    :return: the mean latency of acquire in nanoseconds
+    """
+    keys = [(user_id, "command") for user_id in range(users)]
+    started_at = time.perf_counter_ns()
+
+    for idx in range(iterations):
+        backend.acquire(keys[idx % users], 5.0)
+
+    return (time.perf_counter_ns() - started_at) / iterations
+
+
+def _measure_shared_worker(path: str, iterations: int, users: int, offset: int, results) -> None:
+    backend = SharedMemoryCooldownBackend(path)
+    keys = [(offset + user_id, "command") for user_id in range(users)]
+    started_at = time.perf_counter_ns()
+
+    for idx in range(iterations):
+        backend.acquire(keys[idx % users], 5.0)
+
+    results.put((time.perf_counter_ns() - started_at) / iterations)
+    backend.close()
+
+
+def _measure_shared_processes(iterations: int, users: int, processes: int) -> List[float]:
+    """
+    Measures the shared memory backend while multiple processes use the same table
+
+    :return: the mean latency of acquire in nanoseconds of every process
+    """
+    path = os.path.join(_SHARED_MEMORY_DIR, f"yukari-cooldown-bench-{os.getpid()}")
+    SharedMemoryCooldownBackend(path, capacity=1 << 18).close()
+
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_measure_shared_worker, args=(path, iterations, users, idx * users, results))
+        for idx in range(processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    latencies = [results.get() for _ in workers]
+
+    for worker in workers:
+        worker.join()
+
+    os.unlink(path)
+    return latencies
+
+
+def main(iterations: int = 200000, processes: int = 4) -> None:
+    shared_path = os.path.join(_SHARED_MEMORY_DIR, f"yukari-cooldown-bench-{os.getpid()}")
+    backends: List[Callable[[], CooldownBackend]] = [
+        CooldownStore,
+        CooldownBuckets,
+        lambda: SharedMemoryCooldownBackend(shared_path, capacity=1 << 18)
+    ]
+
+    print(f"acquire latency, {iterations} calls per run")
+
+    for create_backend in backends:
+        for users in (1000, iterations):
+            backend = create_backend()
+            latency = _measure(backend, iterations, users)
+            print(f"{type(backend).__name__:<30} {users:>8} users  {latency:>8.0f} ns/op")
+
+            if isinstance(backend, SharedMemoryCooldownBackend):
+                backend.unlink()
+
+    latencies = _measure_shared_processes(iterations // processes, 1000, processes)
+    print(
+        f"{'SharedMemoryCooldownBackend':<30} {processes:>2} processes    "
+        f"{sum(latencies) / len(latencies):>8.0f} ns/op (max {max(latencies):.0f})"
+    )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
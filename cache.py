@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+from yukari.clock import get_clock
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded cache whose entries expire a fixed amount of seconds after they were set
+    If the cache is full, the least recently used entry is evicted
+    """
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        """
+        :param max_size: the maximum amount of entries
+        :param ttl: the seconds after which an entry expires
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        :param key: the key of the entry
+        :param default: the value to return if there is no entry or the entry expired
+        :return: the cached value or the default value
+        """
+        entry = self._entries.get(key, _MISSING)
+
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+
+        if expires_at <= get_clock().now():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Caches a value, evicting the least recently used entry if the cache is full
+
+        :param key: the key of the entry
+        :param value: the value to cache
+        :return: None
+        """
+        self._entries[key] = (get_clock().now() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Removes an entry so the next lookup resolves it again
+
+        :param key: the key of the entry
+        :return: None
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes every entry
+
+        :return: None
+        """
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        :return: the size of the cache and how often lookups hit or missed
+        """
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key, _MISSING)
+        return entry is not _MISSING and entry[0] > get_clock().now()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,33 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable
+
+
+class AsyncCallback:
+    """
+    Wraps a user supplied callback (e.g. a database lookup) so it can always be awaited
+    Coroutine functions are awaited directly, synchronous functions are run on a thread pool
+    so they don't block the event loop
+    """
+    def __init__(self, func: Callable, executor: Executor = None, offload: bool = True):
+        """
+        :param func: the callback, either a coroutine function or a synchronous function
+        :param executor: the executor synchronous callbacks run on, None uses the default executor of the loop
+        :param offload: if set to False, synchronous callbacks are called directly on the event loop
+        """
+        self.func = func
+        self.executor = executor
+        self.offload = offload
+        self.is_coroutine = asyncio.iscoroutinefunction(func) or asyncio.iscoroutinefunction(getattr(func, "__call__", None))
+
+    async def __call__(self, *args: Any) -> Any:
+        if self.is_coroutine:
+            return await self.func(*args)
+
+        if not self.offload:
+            return self.func(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.func, *args)
+
+    def __repr__(self):
+        return f"<AsyncCallback func={self.func} is_coroutine={self.is_coroutine} offload={self.offload}>"
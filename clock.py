@@ -0,0 +1,147 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, List, Tuple
+
+clock_instance = None
+
+
+def get_clock() -> 'Clock':
+    """
+    Every cooldown, cache and other time dependent part of yukari reads the time from this clock
+    Unless another clock is set, the monotonic clock of the system is used
+
+    :return: the clock
+    """
+    global clock_instance
+
+    if clock_instance is None:
+        clock_instance = MonotonicClock()
+
+    return clock_instance
+
+
+def set_clock(clock: 'Clock') -> None:
+    """
+    Replaces the clock, e.g. with a VirtualClock for tests and simulations
+    Should be called before anything is stored, times read from the previous clock are not converted
+
+    :param clock: the new clock
+    :return: None
+    """
+    global clock_instance
+
+    clock_instance = clock
+
+
+async def wait_for(awaitable: Awaitable, timeout: float) -> Any:
+    """
+    Like asyncio.wait_for, but the timeout runs on the clock of get_clock, so a VirtualClock can skip it
+
+    :param awaitable: the awaitable to wait for, it's cancelled once the timeout ended
+    :param timeout: the seconds to wait, None for no timeout
+    :return: the result of the awaitable, raises asyncio.TimeoutError if the timeout ended first
+    """
+    if timeout is None:
+        return await awaitable
+
+    task = asyncio.ensure_future(awaitable)
+    timer = asyncio.ensure_future(get_clock().sleep(timeout))
+
+    try:
+        await asyncio.wait((task, timer), return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        timer.cancel()
+
+    if not task.done():
+        # Like asyncio.wait_for, the timeout only ends once the awaitable handled its cancellation
+        task.cancel()
+        await asyncio.wait((task,))
+
+        try:
+            return task.result()
+        except asyncio.CancelledError:
+            raise asyncio.TimeoutError() from None
+
+    return task.result()
+
+
+class Clock:
+    """
+    Interface of the clocks. Times are seconds as float and only meaningful compared to other times of the same clock
+    """
+    def now(self) -> float:
+        """
+        :return: the current time in seconds
+        """
+        raise NotImplementedError
+
+    async def sleep(self, seconds: float) -> None:
+        """
+        Waits until the clock advanced by the seconds
+
+        :param seconds: the seconds to wait
+        :return: None
+        """
+        raise NotImplementedError
+
+
+class MonotonicClock(Clock):
+    """
+    Clock of the system which never jumps back or forth when the wall clock is changed
+    The monotonic clock is the same for every process on a host, so times can be shared between shards
+    """
+    def now(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Clock which only advances when told to, so hours of cooldowns can be simulated in an instant
+    Sleeping tasks are woken up once the clock is advanced past the end of their sleep
+    """
+    def __init__(self, start: float = 0.0):
+        """
+        :param start: the time the clock starts at
+        """
+        self._now = start
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def now(self) -> float:
+        return self._now
+
+    async def sleep(self, seconds: float) -> None:
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self._now + seconds, next(self._counter), future))
+        await future
+
+    def advance(self, seconds: float) -> None:
+        """
+        Advances the clock and wakes up every task whose sleep ended
+        The woken up tasks run once the event loop gets control again
+
+        :param seconds: the seconds to advance the clock by
+        :return: None
+        """
+        if seconds < 0:
+            raise ValueError("A clock cannot go back in time")
+
+        self._now += seconds
+
+        while self._sleepers and self._sleepers[0][0] <= self._now:
+            _, _, future = heapq.heappop(self._sleepers)
+
+            if not future.done():
+                future.set_result(None)
@@ -1,18 +1,33 @@
 from __future__ import annotations
 
-import time
+import asyncio
+from concurrent.futures import Executor
 from typing import Any, AnyStr, Dict, List, Tuple, Union, Callable
 
 import discord
 
 from yukari.basecommand import BaseCommand
-from yukari.baseheaders import CategoryHeader
+from yukari.cache import TTLCache
+from yukari.callbacks import AsyncCallback
+from yukari.clock import get_clock
+from yukari.cooldowns import CooldownBackend, CooldownStore
+from yukari.dataloader import DataLoader
+from yukari.baseheaders import CategoryHeader, get_scope_id
 from yukari.logger import LogLevel, get_logger
+from yukari.mailboxes import GuildMailboxes
+from yukari.notices import CooldownNotices, CooldownRejection, get_cooldown_notices
 from yukari.permissions.permissions import PermissionHelper
+from yukari.prefilter import CommandPrefilter, PrefixTrie
+from yukari.scheduler import CommandScheduler, get_command_scheduler, set_command_scheduler
+from yukari.throttle import FloodThrottle
+from yukari.tokenizer import TokenList, tokenize
 
 command_handler_instance = None
 category_handler_instance = None
 
+# Returned by the context caches on a miss, because None is a valid guild language
+_MISSING = object()
+
 
 def get_command_handler() -> CommandHandler:
     """
@@ -118,50 +133,183 @@ class CommandHandler:
     This is the CommandHandler which handles the user input, converts it into commands,
     checks for permissions and cooldowns
     """
-    def __init__(self, get_guild_lang: Callable, get_user_lang: Callable, user_exists: Callable, get_user_permission: Callable, prefix: List[str] = None):
+    def __init__(
+            self,
+            get_guild_lang: Callable,
+            get_user_lang: Callable,
+            user_exists: Callable,
+            get_user_permission: Callable,
+            prefix: List[str] = None,
+            get_guild_prefix: Callable = None,
+            prefix_cache_size: int = 1024,
+            prefix_cache_ttl: float = 300.0,
+            callback_executor: Executor = None,
+            offload_sync_callbacks: bool = True,
+            context_cache_size: int = 4096,
+            context_cache_ttl: float = 60.0,
+            get_guild_langs_bulk: Callable = None,
+            get_user_langs_bulk: Callable = None,
+            users_exist_bulk: Callable = None,
+            get_user_permissions_bulk: Callable = None,
+            cooldown_max_entries: int = 100000,
+            cooldown_sweep_interval: float = 60.0,
+            cooldown_backend: CooldownBackend = None,
+            flood_throttle: FloodThrottle = None,
+            cooldown_notices: CooldownNotices = None,
+            command_scheduler: CommandScheduler = None,
+            guild_mailboxes: GuildMailboxes = None
+    ):
+        """
+        Every callback can either be a coroutine function or a synchronous function
+
+        :param get_guild_lang: returns the language of a guild by its id
+        :param get_user_lang: returns the language of a user by its id
+        :param user_exists: returns whetever a user with that id exists
+        :param get_user_permission: returns the bot permission string of a user by its id
+        :param prefix: the command prefixes
+        :param get_guild_prefix: returns the prefix or a list of prefixes of a guild by its id
+                                 or None if the guild uses the default prefixes
+        :param prefix_cache_size: the maximum amount of guilds whose prefixes are cached
+        :param prefix_cache_ttl: the seconds after which cached guild prefixes are resolved again
+        :param callback_executor: the thread pool synchronous callbacks run on, None uses the default executor of the loop
+        :param offload_sync_callbacks: if set to False, synchronous callbacks are called directly on the event loop
+        :param context_cache_size: the maximum amount of users and of guilds whose language and permission are cached
+        :param context_cache_ttl: the seconds after which a cached user or guild is resolved again
+        :param get_guild_langs_bulk: optional bulk version of get_guild_lang, receives a list of guild ids
+                                     and returns a mapping of id to value or a list of values in the same order
+        :param get_user_langs_bulk: optional bulk version of get_user_lang
+        :param users_exist_bulk: optional bulk version of user_exists
+        :param get_user_permissions_bulk: optional bulk version of get_user_permission
+        :param cooldown_max_entries: the maximum amount of command cooldowns kept at the same time
+        :param cooldown_sweep_interval: the seconds between two removals of expired command cooldowns
+        :param cooldown_backend: the store for command cooldowns, e.g. a SharedMemoryCooldownBackend shared by every shard.
+                                 Defaults to an in-memory CooldownStore with cooldown_max_entries entries
+        :param flood_throttle: drops messages of authors and guilds sending commands faster than allowed, None disables it
+        :param cooldown_notices: decides whetever a cooldown rejection is returned, defaults to get_cooldown_notices()
+        :param command_scheduler: limits how many commands run at once, replaces the scheduler of get_command_scheduler()
+        :param guild_mailboxes: if set, commands of the same guild (or direct message channel) run in the order they
+                                were sent, while different guilds run in parallel
+        """
         global command_handler_instance
 
         self.commands = {}
-        self.cooldowns = {}
+        self.cooldowns = cooldown_backend if cooldown_backend is not None else CooldownStore(cooldown_max_entries)
+        self.cooldown_sweep_interval = cooldown_sweep_interval
+        self.cooldown_notices = cooldown_notices if cooldown_notices is not None else get_cooldown_notices()
         self.prefix = prefix or ["n+"]
+        self.prefilter = CommandPrefilter(self.prefix)
+        self.flood_throttle = flood_throttle
+
+        if command_scheduler is not None:
+            set_command_scheduler(command_scheduler)
+
+        self.command_scheduler = get_command_scheduler()
+        self.guild_mailboxes = guild_mailboxes
+
+        # Lowercased command names and aliases mapped to the command name
+        # Kept in sync by register_command and unregister_command so lookups never scan every command
+        self._command_index = {}
+        self._alias_index = {}
+
+        # Increased on every registration change, so e.g. the event dispatch table knows when to rebuild
+        self.revision = 0
+
+        self.get_guild_prefix = get_guild_prefix
+        self.guild_prefixes = TTLCache(prefix_cache_size, prefix_cache_ttl)
 
         self.get_guild_lang = get_guild_lang
         self.get_user_lang = get_user_lang
         self.user_exists = user_exists
         self.get_user_permission = get_user_permission
 
+        # Awaitable versions of the callbacks, synchronous ones are run on the executor
+        # The loaders share concurrent lookups of the same id and batch lookups if there is a bulk callback
+        def wrap(func: Callable) -> Union[AsyncCallback, None]:
+            return AsyncCallback(func, callback_executor, offload_sync_callbacks) if func is not None else None
+
+        self._guild_prefix_loader = DataLoader(wrap(get_guild_prefix)) if get_guild_prefix else None
+        self._guild_lang_loader = DataLoader(wrap(get_guild_lang), wrap(get_guild_langs_bulk))
+        self._user_lang_loader = DataLoader(wrap(get_user_lang), wrap(get_user_langs_bulk))
+        self._user_exists_loader = DataLoader(wrap(user_exists), wrap(users_exist_bulk))
+        self._user_permission_loader = DataLoader(wrap(get_user_permission), wrap(get_user_permissions_bulk))
+
+        # user id -> (user exists, user language, user permission) and guild id -> guild language
+        self.user_contexts = TTLCache(context_cache_size, context_cache_ttl)
+        self.guild_langs = TTLCache(context_cache_size, context_cache_ttl)
+
         command_handler_instance = self
 
     async def run_command(self, message: discord.Message) -> Any:
         """
         This function is called directly in on_message or other message events
-        and splits the content into arguments, invoke and if there is an alias then also that alias
+        and tokenizes the content in a single pass into arguments, invoke and if there is an alias then also that alias
 
         :param message: The message itself
         :return:
-            None if the message does not starts with the prefix
+            None if the message does not start with a prefix followed by a known command name or alias
+            or if it got dropped by the flood throttle or a full guild mailbox,
             otherwise the result of CommandHandler.__run_command is returned
         """
-        prefix = self.prefix[0]
+        prefix_trie = None
 
-        if message.content.startswith(prefix):
-            args = message.content[len(prefix):].split()
+        if self.get_guild_prefix is not None and message.guild is not None:
+            prefix_trie = await self.get_guild_prefix_trie(message.guild.id)
 
-            if not args:
-                return
+        # Most messages are no commands, so they are rejected before anything else happens
+        prefilter_match = self.prefilter.match(message.content, prefix_trie)
 
-            command, *args = args
-            args = list(map(lambda e: e.lower(), args))
+        if prefilter_match is None:
+            return None
 
-            alias = None
+        # Floods are dropped silently before any parsing, lookup or outgoing message
+        if self.flood_throttle is not None and not self.flood_throttle.allow(message):
+            return None
 
-            if self.is_alias(command):
-                alias = command
-                command = self.get_command_name_by_alias(alias)
+        command = prefilter_match.invoke
+        args = tokenize(message.content, prefilter_match.invoke_end)
 
-            return await self.__run_command(command, args, message, alias=alias)
+        alias = None
+        command_name = self.get_command_name_by_alias(command)
 
-        return None
+        if command_name is not None:
+            alias = command
+            command = command_name
+
+        if self.guild_mailboxes is not None:
+            # Commands of a guild wait for the previous ones, so e.g. config changes cannot race each other
+            return await self.guild_mailboxes.submit(get_scope_id(message, "guild"), self.__run_command, command, args, message, alias)
+
+        return await self.__run_command(command, args, message, alias=alias)
+
+    async def get_guild_prefix_trie(self, guild_id: int) -> PrefixTrie:
+        """
+        Resolves the prefixes of a guild. Those are cached until they expire or get invalidated
+
+        :param guild_id: the id of the guild
+        :return: the prefix trie of the guild prefixes or of the default prefixes if the guild has none
+        """
+        prefix_trie = self.guild_prefixes.get(guild_id)
+
+        if prefix_trie is None:
+            guild_prefix = await self._guild_prefix_loader.load(guild_id)
+
+            if not guild_prefix:
+                prefix_trie = self.prefilter.prefix_trie
+            else:
+                prefix_trie = PrefixTrie([guild_prefix] if isinstance(guild_prefix, str) else guild_prefix)
+
+            self.guild_prefixes.set(guild_id, prefix_trie)
+
+        return prefix_trie
+
+    def invalidate_guild_prefix(self, guild_id: int) -> None:
+        """
+        Has to be called when the prefix of a guild changed
+
+        :param guild_id: the id of the guild
+        :return: None
+        """
+        self.guild_prefixes.invalidate(guild_id)
 
     def get_command_permissions(self, command: AnyStr) -> Tuple[Any, Any, Any]:
         """
@@ -171,29 +319,45 @@ class CommandHandler:
         cmd = self.get_command(command)
         return cmd["required_user_perms"], cmd["required_discord_perms"], cmd["only_bot_perm"]
 
-    async def execute_command(self, invoke: AnyStr, arguments: List[AnyStr], message: discord.Message, cog_cls: BaseCommand) -> None:
+    async def execute_command(
+            self,
+            invoke: AnyStr,
+            arguments: TokenList,
+            message: discord.Message,
+            cog_cls: BaseCommand) -> Any:
         """
         This function is the last step before actually executing the command.
         It retrieves the user language and checks for permission.
+        Lookups which don't depend on each other run concurrently.
 
         :param invoke: The command invoke (can be command name or alias)
-        :param arguments: The arguments of the command
+        :param arguments: The argument tokens of the command
         :param message: the message object itself
         :param cog_cls: the command class extending BaseCommand
-        :return: None (may send a message TODO: change that)
+        :return: False if the command got dropped by the command scheduler,
+                 otherwise None (may send a message TODO: change that)
         """
-        lang = self.get_guild_lang(message.guild.id)
+        lang = self.guild_langs.get(message.guild.id, _MISSING)
+        user_context = self.user_contexts.get(message.author.id, _MISSING)
 
-        if self.user_exists(message.author.id):
-            user_language = self.get_user_lang(message.author.id)
+        if lang is _MISSING and user_context is _MISSING:
+            lang, user_context = await asyncio.gather(
+                self._fetch_guild_lang(message.guild.id),
+                self._fetch_user_context(message.author.id)
+            )
+        elif lang is _MISSING:
+            lang = await self._fetch_guild_lang(message.guild.id)
+        elif user_context is _MISSING:
+            user_context = await self._fetch_user_context(message.author.id)
 
-            if lang != user_language:
-                lang = user_language
+        user_exists, user_language, user_permission = user_context
+
+        if user_exists:
+            lang = user_language
 
         bot_permission, guild_permission, only_bot_perm = self.get_command_permissions(
             invoke if self.is_command(invoke) else self.get_command_name_by_alias(invoke)
         )
-        user_permission = self.get_user_permission(message.author.id)
 
         # If there are maintenance
         if self.get_command(invoke)["maintenance"]:
@@ -225,23 +389,102 @@ class CommandHandler:
             description="keine permissions"  # FIXME Strings().search_string(lang, "errors:no_command_perm")
         ))
 
+    async def _fetch_guild_lang(self, guild_id: int) -> str:
+        """
+        Retrieves the language of a guild and caches it
+
+        :param guild_id: the id of the guild
+        :return: the language of the guild
+        """
+        lang = await self._guild_lang_loader.load(guild_id)
+        self.guild_langs.set(guild_id, lang)
+
+        return lang
+
+    async def _fetch_user_context(self, user_id: int) -> Tuple[bool, Union[str, None], Any]:
+        """
+        Retrieves whetever the user exists, its language and its permission and caches them
+
+        :param user_id: the id of the user
+        :return: whetever the user exists, the language of the user (None if the user does not exist) and its permission
+        """
+        user_exists, user_permission = await asyncio.gather(
+            self._user_exists_loader.load(user_id),
+            self._user_permission_loader.load(user_id)
+        )
+        user_language = await self._user_lang_loader.load(user_id) if user_exists else None
+
+        user_context = (user_exists, user_language, user_permission)
+        self.user_contexts.set(user_id, user_context)
+
+        return user_context
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Has to be called when the language or permission of a user changed or the user got created or deleted
+
+        :param user_id: the id of the user
+        :return: None
+        """
+        self.user_contexts.invalidate(user_id)
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        """
+        Has to be called when the language or prefix of a guild changed
+
+        :param guild_id: the id of the guild
+        :return: None
+        """
+        self.guild_langs.invalidate(guild_id)
+        self.guild_prefixes.invalidate(guild_id)
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        :return: the size, hits and misses of the user, guild language and guild prefix caches
+        """
+        return {
+            "users": self.user_contexts.get_stats(),
+            "guild_langs": self.guild_langs.get_stats(),
+            "guild_prefixes": self.guild_prefixes.get_stats()
+        }
+
+    def get_loader_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        :return: how many lookups were requested, shared with a concurrent lookup, sent to the callbacks
+                 and how many ids were looked up in bulk, per callback
+        """
+        loaders = {
+            "guild_langs": self._guild_lang_loader,
+            "user_langs": self._user_lang_loader,
+            "users_exist": self._user_exists_loader,
+            "user_permissions": self._user_permission_loader
+        }
+
+        if self._guild_prefix_loader is not None:
+            loaders["guild_prefixes"] = self._guild_prefix_loader
+
+        return {name: dict(loader.stats) for name, loader in loaders.items()}
+
     async def __run_command(
             self, command: AnyStr,
-            arguments: List[AnyStr],
+            arguments: TokenList,
             message: discord.Message,
             alias: AnyStr = None) -> List[Union[bool, None, AnyStr]]:
         """
         This is the second step of the whole command processing process. This function is called after run_command
-        It's main job is to check whetever this is a real command and also check for cooldown.
+        It's main job is to check whetever this is a real command and also check for command and argument cooldowns.
+        Both are checked before any callback or argument conversion, so spammed commands are rejected cheaply.
         Calls execute_command if possible
 
         :param command: The original command name
-        :param arguments: The command arguments
+        :param arguments: The command argument tokens
         :param message: The message object itself
         :param alias: The alias if there is one else None
         :return:
             [False, None] if the command is not a registered command
             [False, string] if tendo could not execute the command. See string for more details
+            [False, None] also if a cooldown notice got suppressed or was already sent (see CooldownNotices)
+                          or if the command got dropped by the command scheduler
             [True, None] Tendo could execute the command successfully
         """
         invoke = command
@@ -252,25 +495,130 @@ class CommandHandler:
         else:
             invoke = alias
 
-        now = time.time()
-        author = message.author
-        cog_cls = self.get_command(command)["cog_cls"]
+        command_data = self.get_command(command)
+        cog_cls = command_data["cog_cls"]
+        cooldowns = self.__get_cooldowns(command_data, command, arguments, message)
+        previous_cooldowns = []
+
+        if cooldowns:
+            # Checking does not start a cooldown, so a call rejected by one cooldown does not use up the other one
+            rejection = await self.__check_cooldowns(cooldowns, message)
+
+            if rejection is not None:
+                return rejection
+
+            # Calls denied for permissions or maintenance use up the cooldowns as well, so they cannot be spammed
+            previous_cooldowns = self.__start_cooldowns(cooldowns)
+
+        if await self.execute_command(invoke, arguments, message, cog_cls) is False:
+            # Calls dropped by the command scheduler never ran, so they get their cooldowns back
+            self.__refund_cooldowns(previous_cooldowns)
+            return [False, None]
+
+        return [True, None]
 
-        if self.has_command_cooldown(command, author):
-            cooldown = self.get_command_cooldown(command, author)
+    def __get_cooldowns(
+            self,
+            command_data: Dict[AnyStr, Any],
+            command: AnyStr,
+            arguments: TokenList,
+            message: discord.Message) -> List[Tuple[Tuple[int, Any], float, bool]]:
+        """
+        :param command_data: the result of CommandHeader.get_serializable of the command
+        :param command: the command name
+        :param arguments: the command argument tokens
+        :param message: the message object itself
+        :return: the key, the seconds and whetever it is an argument cooldown of every cooldown of the call,
+                 the argument cooldown of the first argument first
+        """
+        cooldowns = []
+        argument_cooldowns = command_data["arg_cooldowns"]
+
+        if argument_cooldowns and arguments:
+            argument = arguments[0].lower
+            argument_cooldown = argument_cooldowns.get(argument)
 
-            if now > cooldown:
-                self.remove_command_cooldown(command, author)
-                self.add_command_cooldown(command, author)
+            if argument_cooldown:
+                cooldowns.append(((message.author.id, command.lower(), argument), argument_cooldown, True))
+
+        if command_data["cooldown"]:
+            cooldowns.append(((message.author.id, command.lower()), command_data["cooldown"], False))
+
+        return cooldowns
+
+    async def __check_cooldowns(
+            self,
+            cooldowns: List[Tuple[Tuple[int, Any], float, bool]],
+            message: discord.Message) -> Union[List[Union[bool, None, AnyStr]], None]:
+        """
+        Checks the cooldowns without starting them
 
-                await self.execute_command(invoke, arguments, message, cog_cls)
-                return [True, None]
+        :param cooldowns: the cooldowns of the call, see __get_cooldowns
+        :param message: the message object itself
+        :return: the result of __run_command if a cooldown is running, otherwise None
+        """
+        now = get_clock().now()
+
+        for key, _, argument in cooldowns:
+            seconds_left = self.cooldowns.get(key) - now
+
+            if seconds_left > 0:
+                return await self.__reject(key, seconds_left, message, argument=argument)
+
+        return None
+
+    def __start_cooldowns(self, cooldowns: List[Tuple[Tuple[int, Any], float, bool]]) -> List[Tuple[Tuple[int, Any], float]]:
+        """
+        :param cooldowns: the cooldowns of the call, see __get_cooldowns
+        :return: the key and the end time before the call of every started cooldown, see __refund_cooldowns
+        """
+        self.cooldowns.start_sweeper(self.cooldown_sweep_interval)
+        previous_cooldowns = []
+
+        for key, seconds, _ in cooldowns:
+            previous_cooldowns.append((key, self.cooldowns.get(key)))
+            self.cooldowns.acquire(key, seconds)
+
+        return previous_cooldowns
+
+    def __refund_cooldowns(self, previous_cooldowns: List[Tuple[Tuple[int, Any], float]]) -> None:
+        """
+        Puts the cooldowns back to where they were before __start_cooldowns
+
+        :param previous_cooldowns: the result of __start_cooldowns
+        :return: None
+        """
+        for key, expires_at in previous_cooldowns:
+            if expires_at:
+                self.cooldowns.set(key, expires_at)
             else:
-                return [False, f"Bitte warte noch {round(cooldown - now, 1)} Sekunde/n, bevor du den Befehl erneut benutzt!"]
-        else:
-            self.add_command_cooldown(command, author)
-            await self.execute_command(invoke, arguments, message, cog_cls)
-            return [True, None]
+                self.cooldowns.remove(key)
+
+    async def __reject(
+            self,
+            key: Tuple[int, Any],
+            seconds_left: float,
+            message: discord.Message,
+            argument: bool = False) -> List[Union[bool, None, AnyStr]]:
+        """
+        :param key: the key of the cooldown which rejected the command
+        :param seconds_left: the seconds until the cooldown ends
+        :param message: the message object itself
+        :param argument: whetever the cooldown is an argument cooldown
+        :return: the result of __run_command, without a rejection if the user should not be notified again
+                 or if the notice was already sent
+        """
+        if not self.cooldown_notices.should_notify(key, seconds_left):
+            return [False, None]
+
+        rejection = str(CooldownRejection(seconds_left, argument))
+
+        # The last notice can only be edited if it is sent here instead of by the caller
+        if self.cooldown_notices.mode == "edit":
+            await self.cooldown_notices.send(key, message.channel, rejection)
+            return [False, None]
+
+        return [False, rejection]
 
     def is_command(self, command) -> bool:
         """
@@ -279,14 +627,14 @@ class CommandHandler:
         :param command: The command name
         :return: the command name is a valid command
         """
-        return self.commands.__contains__(command) or self.commands.__contains__(command.lower())
+        return command.lower() in self._command_index
 
     def is_alias(self, alias) -> bool:
         """
         :param alias: The alias
         :return: the alias does belong to a command
         """
-        return any([True if alias.lower() in self.commands[c]["alias"] else False for c in self.commands])
+        return alias.lower() in self._alias_index
 
     def get_command(self, invoke: AnyStr) -> Dict[AnyStr, Any]:
         """
@@ -294,12 +642,16 @@ class CommandHandler:
         :param invoke: command name or alias
         :return: result of CommandHeader.get_serializable
         """
-        if self.is_command(invoke) and not self.is_alias(invoke):
-            return self.commands.get(invoke) if self.commands.get(invoke) is not None else self.commands.get(invoke.lower())
-        else:
-            for c in self.commands:
-                if invoke.lower() in self.commands[c]["alias"]:
-                    return self.commands.get(c)
+        invoke = invoke.lower()
+        command = self._alias_index.get(invoke)
+
+        if command is None:
+            command = self._command_index.get(invoke)
+
+            if command is None:
+                return None
+
+        return self.commands[command]
 
     def get_aliases(self) -> List[AnyStr]:
         """
@@ -332,11 +684,7 @@ class CommandHandler:
         :param alias: the alias of a command
         :return: the command name if the command was found else None
         """
-        for c in self.commands:
-            if alias.lower() in self.commands[c]["alias"]:
-                return c
-
-        return None
+        return self._alias_index.get(alias.lower())
 
     def register_command(self, cog_cls: BaseCommand, cog_name: str) -> None:
         """
@@ -354,8 +702,58 @@ class CommandHandler:
             raise SyntaxWarning(invoke + " is already a command!")
 
         self.commands[invoke] = header.get_serializable()
+        self._index_command(invoke)
+        self.revision += 1
         get_logger().log(LogLevel.INFO, f"\tRegistered command {invoke}")
 
+    def unregister_command(self, invoke: AnyStr) -> None:
+        """
+        Removes a registered command together with its aliases
+
+        :param invoke: The command name
+        :return: None
+        """
+        command = self._command_index.get(invoke.lower())
+
+        if command is None:
+            get_logger().log(LogLevel.WARNING, f"Cannot unregister {invoke} because it is not a command")
+            return
+
+        self.commands.pop(command)
+        self._rebuild_command_index()
+        self.revision += 1
+        get_logger().log(LogLevel.INFO, f"\tUnregistered command {command}")
+
+    def _index_command(self, invoke: AnyStr) -> None:
+        """
+        Adds a registered command and its aliases to the lookup indexes
+        If an alias is already taken, the command registered first keeps it
+
+        :param invoke: The command name
+        :return: None
+        """
+        self._command_index[invoke.lower()] = invoke
+        self.prefilter.invokes.add(invoke.lower())
+
+        for alias in self.commands[invoke]["alias"]:
+            self.prefilter.invokes.add(alias)
+
+            if self._alias_index.setdefault(alias, invoke) != invoke:
+                get_logger().log(LogLevel.WARNING, f"Alias {alias} of {invoke} is already used by {self._alias_index[alias]}")
+
+    def _rebuild_command_index(self) -> None:
+        """
+        Rebuilds the lookup indexes in registration order
+
+        :return: None
+        """
+        self._command_index = {}
+        self._alias_index = {}
+        self.prefilter.invokes.clear()
+
+        for invoke in self.commands:
+            self._index_command(invoke)
+
     def add_command_cooldown(self, command: AnyStr, user: Union[discord.Member, discord.User]) -> None:
         """
         Adds the command cooldown from the command to that user
@@ -364,20 +762,12 @@ class CommandHandler:
         :param user: discord user, can be type of user or member, depends on the channel type
         :return: None
         """
-        if not self.cooldowns.__contains__(str(user.id)):
-            self.cooldowns[str(user.id)] = {}
-
-        cmd = self.commands.get(command.lower())
+        cmd = self.get_command(command)
 
         if not cmd["cooldown"]:
             return
 
-        if self.cooldowns[str(user.id)].__contains__(command.lower()):
-            self.cooldowns[str(user.id)][command.lower()]["command_cooldown"] = time.time() + cmd["cooldown"]
-        else:
-            self.cooldowns[str(user.id)][command.lower()] = {
-                "command_cooldown": time.time() + cmd["cooldown"]
-            }
+        self.cooldowns.set((user.id, command.lower()), get_clock().now() + cmd["cooldown"])
 
     def has_command_cooldown(self, command: AnyStr, user: Union[discord.Member, discord.User]) -> bool:
         """
@@ -385,34 +775,24 @@ class CommandHandler:
         :param user: discord user, can be type of user or member, depends on the channel type
         :return: whetever that user has a cooldown on that command
         """
-        if not self.cooldowns.__contains__(str(user.id)):
-            return False
-
-        if not self.cooldowns[str(user.id)].__contains__(command.lower()):
-            return False
-
-        if not self.cooldowns[str(user.id)][command.lower()].__contains__("command_cooldown"):
-            return False
-
-        return True
+        return self.cooldowns.get((user.id, command.lower())) != 0
 
     def is_in_cooldown(self, user: Union[discord.Member, discord.User]) -> bool:
         """
+        Has to look at every stored cooldown, so it should not be used while handling messages
+
         :param user: discord user, can be type of user or member, depends on the channel type
         :return: whetever that discord user has a cooldown (can be command and argument cooldown)
         """
-        return self.cooldowns.__contains__(user)
+        return self.cooldowns.has_id(user.id)
 
-    def get_command_cooldown(self, command: AnyStr, user: Union[discord.Member, discord.User]) -> int:
+    def get_command_cooldown(self, command: AnyStr, user: Union[discord.Member, discord.User]) -> float:
         """
         :param command: the command name
         :param user: discord user, can be type of user or member, depends on the channel type
-        :return: The whole command cooldown
+        :return: The time (see get_clock) the command cooldown ends or 0 if there is none
         """
-        if not self.has_command_cooldown(command, user) or self.is_in_cooldown(user):
-            return 0
-
-        return self.cooldowns[str(user.id)][command.lower()]["command_cooldown"]
+        return self.cooldowns.get((user.id, command.lower()))
 
     def remove_command_cooldown(self, command: AnyStr, user: Union[discord.Member, discord.User]) -> None:
         """
@@ -422,24 +802,38 @@ class CommandHandler:
         :param user:
         :return: None
         """
-        if self.has_command_cooldown(command, user):
-            self.cooldowns[str(user.id)][command].pop("command_cooldown")
+        self.cooldowns.remove((user.id, command.lower()))
+
+    def get_argument_cooldown(self, command: AnyStr, argument: AnyStr, user: Union[discord.Member, discord.User]) -> float:
+        """
+        :param command: the command name
+        :param argument: the first argument of the command
+        :param user: discord user, can be type of user or member, depends on the channel type
+        :return: The time (see get_clock) the argument cooldown ends or 0 if there is none
+        """
+        return self.cooldowns.get((user.id, command.lower(), argument.lower()))
+
+    def remove_argument_cooldown(self, command: AnyStr, argument: AnyStr, user: Union[discord.Member, discord.User]) -> None:
+        """
+        Removes an argument cooldown from a user
 
-            self.clean_cooldown(command, user)
+        :param command: the command name
+        :param argument: the first argument of the command
+        :param user: discord user, can be type of user or member, depends on the channel type
+        :return: None
+        """
+        self.cooldowns.remove((user.id, command.lower(), argument.lower()))
 
     def clean_cooldown(self, command: AnyStr, user: Union[discord.Member, discord.User]) -> None:
         """
-        Cleans every cooldown from a user
-        Cleaning means checking if theres e.g. no command cooldown in the list left in order to save some data
+        Cleans every expired cooldown
+        Cleaning is also done while adding cooldowns and by the background sweeper of the cooldown store
 
         :param command: The command name
         :param user: discord user, can be type of user or member, depends on the channel type
         :return: None
         """
-        if self.cooldowns.__contains__(str(user.id)):
-            if self.cooldowns[str(user.id)].__contains__(command.lower()):
-                if len(self.cooldowns[str(user.id)][command.lower()].keys()) == 0:
-                    self.cooldowns[str(user.id)].pop(command.lower())
+        self.cooldowns.sweep()
 
     def remove_cooldown(self, user: Union[discord.Member, discord.User]) -> None:
         """
@@ -448,5 +842,4 @@ class CommandHandler:
         :param user: discord user, can be type of user or member, depends on the channel type
         :return: None
         """
-        if self.cooldowns.__contains__(str(user.id)):
-            self.cooldowns.pop(str(user.id))
+        self.cooldowns.remove_id(user.id)
@@ -1,12 +1,14 @@
-from typing import List, Tuple, Optional, Any, Dict
+from typing import Tuple, Optional, Any, Mapping
 
 import discord
 
+from yukari.tokenizer import TokenList
+
 
 class BaseConverter:
     CONVERTER_TYPE = None
 
-    def __init__(self, function_parameters: Dict, function_parameter_index: int, message: discord.Message):
+    def __init__(self, function_parameters: Mapping, function_parameter_index: int, message: discord.Message):
         """
         Initializes the converter.
         :param function_parameters: The function parameters which represents the subcommand
@@ -17,10 +19,10 @@ class BaseConverter:
         self.function_parameter_index = function_parameter_index
         self.message = message
 
-    def convert(self, arguments: List[str]) -> Optional[Tuple[Any, int]]:
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
         """
         Converts arguments to another type.
-        :param arguments: The arguments to parse
+        :param arguments: The tokens to parse, starting with the token of the current parameter
         :return: The parsed data and the relative index to continue iterating if the conversion was successful otherwise None
         """
         pass
@@ -0,0 +1,19 @@
+from typing import Optional, Tuple, Any
+
+from yukari.converters.baseconverter import BaseConverter
+from yukari.converters.types import EncapsulatedSpacedString
+from yukari.tokenizer import TokenList
+
+
+class EncapsulatedSpacedStringConverter(BaseConverter):
+    """
+    Converts a string encapsulated in quotes (or a single word) to an object
+    """
+    CONVERTER_TYPE = EncapsulatedSpacedString
+
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
+        return arguments[0].text, 1
+
+    @staticmethod
+    def representation(data: str) -> str:
+        return f"<\"{data}\">"
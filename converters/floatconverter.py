@@ -1,6 +1,7 @@
-from typing import List, Optional, Tuple, Any
+from typing import Optional, Tuple, Any
 
 from yukari.converters.baseconverter import BaseConverter
+from yukari.tokenizer import TokenList
 
 
 class FloatConverter(BaseConverter):
@@ -9,9 +10,11 @@ class FloatConverter(BaseConverter):
     """
     CONVERTER_TYPE = float
 
-    def convert(self, arguments: List[str]) -> Optional[Tuple[Any, int]]:
-        if "." in arguments[0] and arguments[0][int(arguments[0].startswith("-")):].replace(".", "", 1).isdecimal():
-            return float(arguments[0]), 1
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
+        argument = arguments[0].text
+
+        if "." in argument and argument[int(argument.startswith("-")):].replace(".", "", 1).isdecimal():
+            return float(argument), 1
         else:
             return None
 
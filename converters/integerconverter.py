@@ -1,6 +1,7 @@
-from typing import List, Optional, Tuple, Any
+from typing import Optional, Tuple, Any
 
 from yukari.converters.baseconverter import BaseConverter
+from yukari.tokenizer import TokenList
 
 
 class IntegerConverter(BaseConverter):
@@ -9,9 +10,11 @@ class IntegerConverter(BaseConverter):
     """
     CONVERTER_TYPE = int
 
-    def convert(self, arguments: List[str]) -> Optional[Tuple[Any, int]]:
-        if arguments[0][int(arguments[0].startswith("-")):].isdecimal():
-            return int(arguments[0]), 1
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
+        argument = arguments[0].text
+
+        if argument[int(argument.startswith("-")):].isdecimal():
+            return int(argument), 1
         else:
             return None
 
@@ -1,8 +1,9 @@
-from typing import List, Optional, Tuple, Any
+from typing import Optional, Tuple, Any
 
 import discord
 
 from yukari.converters.baseconverter import BaseConverter
+from yukari.tokenizer import TokenList
 
 
 class MemberConverter(BaseConverter):
@@ -11,8 +12,8 @@ class MemberConverter(BaseConverter):
     """
     CONVERTER_TYPE = discord.Member
 
-    def convert(self, arguments: List[str]) -> Optional[Tuple[Any, int]]:
-        mention = arguments[0]
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
+        mention = arguments[0].text
 
         if mention.startswith('<@') and mention.endswith('>'):
             mention = mention[2:-1]
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import inspect
+import typing
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type
+
+from yukari.converters import (
+    stringconverter,
+    integerconverter,
+    floatconverter,
+    spacedstringconverter,
+    encapsulatedspacedstringconverter,
+    memberconverter,
+    roleconverter
+)
+from yukari.converters.baseconverter import BaseConverter
+from yukari.logger import get_logger
+
+_DEFAULT_CONVERTERS = (
+    stringconverter.StringConverter,
+    integerconverter.IntegerConverter,
+    floatconverter.FloatConverter,
+    spacedstringconverter.SpacedStringConverter,
+    encapsulatedspacedstringconverter.EncapsulatedSpacedStringConverter,
+    memberconverter.MemberConverter,
+    roleconverter.RoleConverter
+)
+
+converter_registry_instance = None
+
+
+def get_converter_registry() -> 'ConverterRegistry':
+    """
+    The registry is created with the default converters on first use
+
+    :return: the converter registry instance
+    """
+    global converter_registry_instance
+
+    if converter_registry_instance is None:
+        converter_registry_instance = ConverterRegistry()
+
+        for converter in _DEFAULT_CONVERTERS:
+            converter_registry_instance.register(converter)
+
+    return converter_registry_instance
+
+
+class ConverterResolution(NamedTuple):
+    """
+    The converters responsible for a parameter annotation
+    """
+    types: Tuple[Any, ...]
+    converters: Tuple[Type[BaseConverter], ...]
+    optional: bool
+
+
+class ConverterRegistry:
+    """
+    Registry for converters keyed by their CONVERTER_TYPE
+    Types without a converter fall back to the converter of their closest base class
+    """
+    def __init__(self):
+        self.converters: Dict[Any, Type[BaseConverter]] = {}
+        self._resolutions: Dict[Any, ConverterResolution] = {}
+
+    def register(self, converter: Type[BaseConverter], override: bool = False) -> Type[BaseConverter]:
+        """
+        Registers a converter. Can also be used as a class decorator
+        Converters should be registered before the commands using them are created,
+        because subcommands resolve their converters once when they are registered
+
+        :param converter: the converter class extending BaseConverter
+        :param override: replaces an already registered converter for the same type
+        :return: the converter class
+        """
+        if not isinstance(converter, type) or not issubclass(converter, BaseConverter):
+            get_logger().critical(f"{converter} does not extend BaseConverter")
+
+        if converter.CONVERTER_TYPE is None:
+            get_logger().critical(f"{converter} does not declare a CONVERTER_TYPE")
+
+        if converter.CONVERTER_TYPE in self.converters and not override:
+            get_logger().critical(f"There already is a converter for {converter.CONVERTER_TYPE}")
+
+        self.converters[converter.CONVERTER_TYPE] = converter
+        self._resolutions.clear()
+
+        return converter
+
+    def unregister(self, converter_type: Any) -> None:
+        """
+        Removes the converter of a type
+
+        :param converter_type: the CONVERTER_TYPE of the converter
+        :return: None
+        """
+        if converter_type not in self.converters:
+            get_logger().critical(f"There is no converter for {converter_type}")
+
+        self.converters.pop(converter_type)
+        self._resolutions.clear()
+
+    def get(self, converter_type: Any) -> Optional[Type[BaseConverter]]:
+        """
+        Retrieves the converter of a single type
+
+        :param converter_type: the type to convert to
+        :return: the converter of the type or of its closest base class, None if there is none
+        """
+        converter = self.converters.get(converter_type)
+
+        if converter is None and isinstance(converter_type, type):
+            for base in converter_type.__mro__[1:]:
+                converter = self.converters.get(base)
+
+                if converter is not None:
+                    break
+
+        return converter
+
+    def resolve(self, annotation: Any) -> ConverterResolution:
+        """
+        Resolves a parameter annotation. The result is cached per annotation
+        Optional[T] resolves to the converter of T, Union[A, B] to the converters of A and B (tried in that order)
+
+        :param annotation: the annotation of a subcommand parameter
+        :return: the converters for that annotation
+        """
+        resolution = self._resolutions.get(annotation)
+
+        if resolution is None:
+            if annotation is inspect.Parameter.empty:
+                resolution = ConverterResolution((), (), False)
+            else:
+                # Up until Python 3.7, typing supports __args__ and __origin__ in typing objects like Union, Optional, etc
+                # But since Python 3.8 there are two functions provided from the typing module: get_origin and get_args
+                if getattr(annotation, "__origin__", None) == typing.Union:
+                    expected_types = tuple(e for e in annotation.__args__ if e is not type(None))  # noqa: E721
+                    optional = len(expected_types) != len(annotation.__args__)
+                else:
+                    expected_types = (annotation,)
+                    optional = False
+
+                # The same converter might be responsible for multiple types of a Union
+                converters = tuple(dict.fromkeys(
+                    converter for converter in map(self.get, expected_types) if converter is not None
+                ))
+                resolution = ConverterResolution(expected_types, converters, optional)
+
+            self._resolutions[annotation] = resolution
+
+        return resolution
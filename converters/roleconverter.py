@@ -1,8 +1,9 @@
-from typing import List, Optional, Tuple, Any
+from typing import Optional, Tuple, Any
 
 import discord
 
 from yukari.converters.baseconverter import BaseConverter
+from yukari.tokenizer import TokenList
 
 
 class RoleConverter(BaseConverter):
@@ -12,9 +13,9 @@ class RoleConverter(BaseConverter):
 
     CONVERTER_TYPE = discord.Role
 
-    def convert(self, arguments: List[str]) -> Optional[Tuple[Any, int]]:
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
         # Format of roles: <@&role_id>
-        mention = arguments[0]
+        mention = arguments[0].text
 
         if mention.startswith('<@&') and mention.endswith('>'):
             mention = mention[3:-1]
@@ -1,7 +1,8 @@
-from typing import List, Optional, Tuple, Any
+from typing import Optional, Tuple, Any
 
 from yukari.converters.baseconverter import BaseConverter
 from yukari.converters.types import SpacedString
+from yukari.tokenizer import TokenList
 
 
 class SpacedStringConverter(BaseConverter):
@@ -10,11 +11,12 @@ class SpacedStringConverter(BaseConverter):
     """
     CONVERTER_TYPE = SpacedString
 
-    def convert(self, arguments: List[str]) -> Optional[Tuple[Any, int]]:
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
         if self.function_parameter_index != len(self.function_parameters) - 1:
             return None
 
-        return " ".join(arguments), len(arguments)
+        # The tokens keep the case the user typed, quotes are stripped the same way as for every other argument
+        return arguments.text, len(arguments)
 
     @staticmethod
     def representation(data: str) -> str:
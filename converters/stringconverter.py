@@ -1,6 +1,7 @@
-from typing import List, Optional, Tuple, Any
+from typing import Optional, Tuple, Any
 
 from yukari.converters.baseconverter import BaseConverter
+from yukari.tokenizer import TokenList
 
 
 class StringConverter(BaseConverter):
@@ -10,8 +11,8 @@ class StringConverter(BaseConverter):
 
     CONVERTER_TYPE = str
 
-    def convert(self, arguments: List[str]) -> Optional[Tuple[Any, int]]:
-        return arguments[0], 1
+    def convert(self, arguments: TokenList) -> Optional[Tuple[Any, int]]:
+        return arguments[0].text, 1
 
     @staticmethod
     def representation(data: str) -> str:
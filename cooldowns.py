@@ -0,0 +1,434 @@
+import asyncio
+import heapq
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Tuple
+
+from yukari.clock import get_clock
+from yukari.logger import LogLevel, get_logger
+
+# Amount of expired entries removed on every write, so the store shrinks even without the background sweeper
+_SWEEP_ON_WRITE = 8
+
+subcommand_cooldowns_instance = None
+
+
+def get_subcommand_cooldowns() -> 'CooldownBackend':
+    """
+    Every subcommand shares the same cooldown backend
+    Unless another backend is set, in-memory cooldown buckets are used
+
+    :return: the cooldown backend of the subcommands
+    """
+    global subcommand_cooldowns_instance
+
+    if subcommand_cooldowns_instance is None:
+        subcommand_cooldowns_instance = CooldownBuckets()
+
+    return subcommand_cooldowns_instance
+
+
+def set_subcommand_cooldowns(backend: 'CooldownBackend') -> None:
+    """
+    Replaces the cooldown backend of the subcommands, e.g. with a backend shared between multiple processes
+    Should be called before any command is executed, running cooldowns are not transferred
+
+    :param backend: the new cooldown backend
+    :return: None
+    """
+    global subcommand_cooldowns_instance
+
+    subcommand_cooldowns_instance = backend
+
+
+def gcra_acquire(tat: float, now: float, duration: float, uses: int = 1) -> Tuple[float, float]:
+    """
+    Generic cell rate algorithm: allows a burst of uses within a window, refilling one use every duration / uses seconds
+    The whole state of a key is its theoretical arrival time (tat), the time its window is completely refilled,
+    which is also the time the stored entry can be forgotten. With a single use this is a plain cooldown
+
+    :param tat: the stored theoretical arrival time or 0 if there is none
+    :param now: the current time
+    :param duration: the seconds of the window
+    :param uses: the amount of uses allowed within the window
+    :return: 0 and the new theoretical arrival time if the use is allowed,
+             otherwise the seconds until the next use is allowed and the unchanged theoretical arrival time
+    """
+    interval = duration / uses
+    allowed_at = tat - (duration - interval)
+
+    if allowed_at > now:
+        return allowed_at - now, tat
+
+    return 0.0, max(tat, now) + interval
+
+
+class CooldownBackend:
+    """
+    Interface of the stores keeping cooldowns keyed by (id, name), e.g. (user id, command name)
+    The first element of a key always is the id the cooldown belongs to. Every time is a time of get_clock()
+    """
+    def get(self, key: Tuple[int, Hashable]) -> float:
+        """
+        :param key: the id and name of the cooldown
+        :return: the time the cooldown ends or 0 if there is no running cooldown
+        """
+        raise NotImplementedError
+
+    def set(self, key: Tuple[int, Hashable], expires_at: float) -> None:
+        """
+        :param key: the id and name of the cooldown
+        :param expires_at: the time the cooldown ends
+        :return: None
+        """
+        raise NotImplementedError
+
+    def acquire(self, key: Tuple[int, Hashable], duration: float, uses: int = 1) -> float:
+        """
+        Checks the cooldown and uses it if it is not exhausted (see gcra_acquire)
+
+        :param key: the id and name of the cooldown
+        :param duration: the seconds the cooldown lasts
+        :param uses: the amount of uses allowed within the duration
+        :return: 0 if the use is allowed, otherwise the seconds until the next use is allowed
+        """
+        raise NotImplementedError
+
+    def remove(self, key: Tuple[int, Hashable]) -> None:
+        """
+        :param key: the id and name of the cooldown
+        :return: None
+        """
+        raise NotImplementedError
+
+    def remove_id(self, owner_id: int) -> None:
+        """
+        Removes every cooldown of an id
+
+        :param owner_id: the id, e.g. the id of a user
+        :return: None
+        """
+        raise NotImplementedError
+
+    def has_id(self, owner_id: int) -> bool:
+        """
+        :param owner_id: the id, e.g. the id of a user
+        :return: whetever there is any running cooldown of that id
+        """
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """
+        Removes expired cooldowns
+
+        :return: the amount of removed cooldowns
+        """
+        raise NotImplementedError
+
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """
+        Starts removing expired cooldowns in the background, if the backend needs to
+
+        :param interval: the seconds between two sweeps
+        :return: None
+        """
+        pass
+
+    def stop_sweeper(self) -> None:
+        """
+        Stops removing expired cooldowns in the background
+
+        :return: None
+        """
+        pass
+
+    @property
+    def size(self) -> int:
+        """
+        :return: the amount of stored cooldowns (expired ones may not be removed yet)
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class CooldownStore(CooldownBackend):
+    """
+    Expiring store for cooldowns keyed by (id, name), e.g. (user id, command name)
+    Every entry holds the time its cooldown ends. Expired entries are removed through a min-heap of end times,
+    which is swept a little on every write and completely by an optional background task.
+    If the store is full, the entry ending first is evicted.
+    """
+    def __init__(self, max_entries: int = 100000):
+        """
+        :param max_entries: the maximum amount of cooldowns kept at the same time
+        """
+        self.max_entries = max_entries
+        self._expiries: Dict[Tuple[int, Hashable], float] = {}
+        self._heap: List[Tuple[float, Tuple[int, Hashable]]] = []
+        self._sweeper = None
+
+    def get(self, key: Tuple[int, Hashable]) -> float:
+        """
+        :param key: the id and name of the cooldown
+        :return: the time the cooldown ends or 0 if there is no running cooldown
+        """
+        expires_at = self._expiries.get(key, 0.0)
+
+        if expires_at and expires_at <= get_clock().now():
+            return 0.0
+
+        return expires_at
+
+    def set(self, key: Tuple[int, Hashable], expires_at: float) -> None:
+        """
+        :param key: the id and name of the cooldown
+        :param expires_at: the time the cooldown ends
+        :return: None
+        """
+        self._expiries[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+        self.sweep(_SWEEP_ON_WRITE)
+
+        while len(self._expiries) > self.max_entries:
+            self._pop()
+
+        # Replaced end times stay in the heap until they are popped, so it's rebuilt once they pile up
+        if len(self._heap) > 2 * len(self._expiries) + _SWEEP_ON_WRITE:
+            self._heap = [(expires_at, key) for key, expires_at in self._expiries.items()]
+            heapq.heapify(self._heap)
+
+    def acquire(self, key: Tuple[int, Hashable], duration: float, uses: int = 1) -> float:
+        """
+        Checks the cooldown and uses it if it is not exhausted (see gcra_acquire)
+
+        :param key: the id and name of the cooldown
+        :param duration: the seconds the cooldown lasts
+        :param uses: the amount of uses allowed within the duration
+        :return: 0 if the use is allowed, otherwise the seconds until the next use is allowed
+        """
+        seconds_left, expires_at = gcra_acquire(self._expiries.get(key, 0.0), get_clock().now(), duration, uses)
+
+        if not seconds_left:
+            self.set(key, expires_at)
+
+        return seconds_left
+
+    def remove(self, key: Tuple[int, Hashable]) -> None:
+        """
+        :param key: the id and name of the cooldown
+        :return: None
+        """
+        self._expiries.pop(key, None)
+
+    def remove_id(self, owner_id: int) -> None:
+        """
+        Removes every cooldown of an id. Has to look at every entry
+
+        :param owner_id: the id, e.g. the id of a user
+        :return: None
+        """
+        for key in [key for key in self._expiries if key[0] == owner_id]:
+            self._expiries.pop(key)
+
+    def has_id(self, owner_id: int) -> bool:
+        """
+        Has to look at every entry
+
+        :param owner_id: the id, e.g. the id of a user
+        :return: whetever there is any running cooldown of that id
+        """
+        now = get_clock().now()
+        return any(key[0] == owner_id and expires_at > now for key, expires_at in self._expiries.items())
+
+    def sweep(self, limit: int = None) -> int:
+        """
+        Removes expired entries
+
+        :param limit: the maximum amount of heap entries to look at, None for every expired one
+        :return: the amount of removed entries
+        """
+        now = get_clock().now()
+        removed = 0
+
+        while self._heap and self._heap[0][0] <= now and (limit is None or limit > 0):
+            if self._pop():
+                removed += 1
+
+            if limit is not None:
+                limit -= 1
+
+        return removed
+
+    def _pop(self) -> bool:
+        """
+        Removes the entry ending first
+
+        :return: False if the popped heap entry was outdated and nothing got removed
+        """
+        expires_at, key = heapq.heappop(self._heap)
+
+        if self._expiries.get(key) == expires_at:
+            del self._expiries[key]
+            return True
+
+        return False
+
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """
+        Starts the background task removing expired entries if it is not running yet
+        Has to be called from within a running event loop
+
+        :param interval: the seconds between two sweeps
+        :return: None
+        """
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever(interval))
+
+    def stop_sweeper(self) -> None:
+        """
+        Stops the background task removing expired entries
+
+        :return: None
+        """
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    async def _sweep_forever(self, interval: float) -> None:
+        while True:
+            await get_clock().sleep(interval)
+            removed = self.sweep()
+
+            if removed:
+                get_logger().log(LogLevel.DEBUG, f"Removed {removed} expired cooldowns, {len(self)} left")
+
+    @property
+    def size(self) -> int:
+        return len(self._expiries)
+
+
+class _CooldownBucket:
+    """
+    Cooldowns sharing the same length
+    A cooldown used now ends at the latest after its length, so queueing that deadline keeps the queue sorted
+    """
+    __slots__ = ("expiries", "queue")
+
+    def __init__(self):
+        self.expiries: Dict[Tuple[int, Hashable], float] = {}
+        self.queue: Deque[Tuple[float, Tuple[int, Hashable], float]] = deque()
+
+    def sweep(self, now: float) -> int:
+        """
+        Removes every cooldown which ended, starting with the oldest one
+
+        :param now: the current time
+        :return: the amount of removed cooldowns
+        """
+        queue = self.queue
+        removed = 0
+
+        while queue and queue[0][0] <= now:
+            _, key, expires_at = queue.popleft()
+
+            # The cooldown might have been used again or removed and started again after this entry was queued
+            if self.expiries.get(key) == expires_at:
+                del self.expiries[key]
+                removed += 1
+
+        return removed
+
+
+class CooldownBuckets(CooldownBackend):
+    """
+    In-memory store for cooldowns with a fixed length per name, e.g. subcommand cooldowns
+    Each cooldown length gets its own bucket. Because cooldowns of the same length end in the order they started,
+    a bucket is swept from its front whenever it is used, which keeps checks O(1)
+    and memory proportional to the amount of running cooldowns.
+    Cooldowns started with set have no known length, so they are kept in a CooldownStore instead
+    until they end or are used again with acquire
+    """
+    def __init__(self, max_entries: int = 100000):
+        """
+        :param max_entries: the maximum amount of cooldowns started with set kept at the same time
+        """
+        self._buckets: Dict[float, _CooldownBucket] = {}
+        self._fixed = CooldownStore(max_entries)
+
+    def get(self, key: Tuple[int, Hashable]) -> float:
+        now = get_clock().now()
+        latest = self._fixed.get(key)
+
+        # There only are as many buckets as there are different cooldown lengths
+        for bucket in self._buckets.values():
+            expires_at = bucket.expiries.get(key)
+
+            if expires_at is not None and expires_at > now:
+                latest = max(latest, expires_at)
+
+        return latest
+
+    def set(self, key: Tuple[int, Hashable], expires_at: float) -> None:
+        """
+        Replaces every running cooldown of the key
+
+        :param key: the id and name of the cooldown
+        :param expires_at: the time the cooldown ends
+        :return: None
+        """
+        for bucket in self._buckets.values():
+            bucket.expiries.pop(key, None)
+
+        self._fixed.set(key, expires_at)
+
+    def acquire(self, key: Tuple[int, Hashable], duration: float, uses: int = 1) -> float:
+        now = get_clock().now()
+        bucket = self._buckets.get(duration)
+
+        if bucket is None:
+            bucket = self._buckets[duration] = _CooldownBucket()
+        else:
+            bucket.sweep(now)
+
+        tat = max(bucket.expiries.get(key, 0.0), self._fixed.get(key))
+        seconds_left, expires_at = gcra_acquire(tat, now, duration, uses)
+
+        if not seconds_left:
+            # An allowed use never ends later than now + duration, so the bucket stays sorted
+            bucket.expiries[key] = expires_at
+            bucket.queue.append((now + duration, key, expires_at))
+            self._fixed.remove(key)
+
+        return seconds_left
+
+    def remove(self, key: Tuple[int, Hashable]) -> None:
+        for bucket in self._buckets.values():
+            bucket.expiries.pop(key, None)
+
+        self._fixed.remove(key)
+
+    def remove_id(self, owner_id: int) -> None:
+        for bucket in self._buckets.values():
+            for key in [key for key in bucket.expiries if key[0] == owner_id]:
+                bucket.expiries.pop(key)
+
+        self._fixed.remove_id(owner_id)
+
+    def has_id(self, owner_id: int) -> bool:
+        now = get_clock().now()
+
+        return self._fixed.has_id(owner_id) or any(
+            key[0] == owner_id and expires_at > now
+            for bucket in self._buckets.values()
+            for key, expires_at in bucket.expiries.items()
+        )
+
+    def sweep(self) -> int:
+        now = get_clock().now()
+        return sum(bucket.sweep(now) for bucket in self._buckets.values()) + self._fixed.sweep()
+
+    @property
+    def size(self) -> int:
+        return sum(len(bucket.expiries) for bucket in self._buckets.values()) + len(self._fixed)
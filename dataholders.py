@@ -1,9 +1,23 @@
 import discord
+import emoji
 from typing import Union
 
 from yukari.enums import EventType
 
 
+def normalize_emoji_name(name: Union[str, None]) -> Union[str, None]:
+    """
+    Unicode emojis are named by their alias (e.g. :thumbs_up:), names of guild emojis stay as they are
+
+    :param name: the name of the emoji or the unicode emoji itself
+    :return: the normalized name
+    """
+    if name is not None and emoji.is_emoji(name):
+        return emoji.demojize(name)
+
+    return name
+
+
 class _EventDataHolder:
     """
     Base Class for Event class holders
@@ -0,0 +1,118 @@
+import asyncio
+from typing import Any, Dict, Hashable, List, Mapping, Set
+
+from yukari.callbacks import AsyncCallback
+
+
+class DataLoader:
+    """
+    Coalesces lookups of a callback
+    Concurrent lookups of the same key share one call and, if a bulk callback is given,
+    every key requested within one loop iteration is looked up by a single bulk call
+    """
+    def __init__(self, load: AsyncCallback, load_many: AsyncCallback = None):
+        """
+        :param load: looks up a single key
+        :param load_many: looks up a list of keys at once and returns either a mapping of key to value
+                          or a list of values in the order of the keys
+        """
+        self._load = load
+        self._load_many = load_many
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._batch: List[Hashable] = []
+
+        # The loop only keeps weak references to tasks, so running lookups are kept here until they are done
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats: Dict[str, int] = dict.fromkeys(("requests", "coalesced", "calls", "batched_keys"), 0)
+
+    async def load(self, key: Hashable) -> Any:
+        """
+        :param key: the key to look up
+        :return: the value of the key
+        """
+        self.stats["requests"] += 1
+        future = self._in_flight.get(key)
+
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._in_flight[key] = future
+
+            if self._load_many is None:
+                self._track(loop.create_task(self._dispatch_single(key, future)))
+            else:
+                if not self._batch:
+                    loop.call_soon(self._dispatch_batch)
+
+                self._batch.append(key)
+
+        # A cancelled caller must not cancel the lookup other callers are waiting for
+        return await asyncio.shield(future)
+
+    async def _dispatch_single(self, key: Hashable, future: asyncio.Future) -> None:
+        """
+        Looks up a single key and resolves the future every caller waits for
+
+        :param key: the key to look up
+        :param future: the future of the key
+        :return: None
+        """
+        self.stats["calls"] += 1
+
+        try:
+            future.set_result(await self._load(key))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _dispatch_batch(self) -> None:
+        """
+        Sends every key collected during the last loop iteration to the bulk callback
+
+        :return: None
+        """
+        keys = self._batch
+        self._batch = []
+
+        self._track(asyncio.get_running_loop().create_task(self._load_batch(keys)))
+
+    def _track(self, task: asyncio.Task) -> None:
+        """
+        Keeps a reference to a lookup task until it is done
+
+        :param task: the task of the lookup
+        :return: None
+        """
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, keys: List[Hashable]) -> None:
+        """
+        Looks up a batch of keys and resolves their futures
+
+        :param keys: the keys to look up
+        :return: None
+        """
+        self.stats["calls"] += 1
+        self.stats["batched_keys"] += len(keys)
+
+        try:
+            values = await self._load_many(keys)
+
+            if not isinstance(values, Mapping):
+                values = dict(zip(keys, values))
+
+            for key in keys:
+                self._in_flight[key].set_result(values.get(key))
+        except Exception as e:
+            for key in keys:
+                future = self._in_flight[key]
+
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for key in keys:
+                self._in_flight.pop(key, None)
@@ -1,7 +1,11 @@
+from typing import Any, Iterable, Optional, Union
+
 from yukari.baseheaders import EventWrapper, SubcommandWrapper
 from yukari.enums import EventType
 from yukari.logger import LogLevel, get_logger
 from yukari.permissions.permissions import PermissionHelper, PermissionHolder
+from yukari.scheduler import ConcurrencyLimit, validate_concurrency_limit
+from yukari.utils import create_event_batching, normalize_event_filters
 
 
 def SubCommand(name: str = ""):
@@ -82,11 +86,15 @@ def Translation(query: str):
     return inner
 
 
-def Cooldown(seconds: int):
+def Cooldown(seconds: int, uses: int = 1, per: str = "user"):
     """
     Cooldown decorator used to indicate the amount of seconds a user waits between each execution
+    With more than one use it becomes a rate limit: a burst of uses is allowed within the seconds,
+    afterwards one use gets available every seconds / uses seconds
 
     :param seconds: the amount of seconds the user has to wait
+    :param uses: the amount of executions allowed within the seconds
+    :param per: whom the cooldown applies to, either "user", "guild" or "channel". In direct messages "guild" means the channel
     :return: a descriptor
     """
 
@@ -95,7 +103,42 @@ def Cooldown(seconds: int):
             get_logger().log(LogLevel.CRITICAL, "Subcommand was not initialized with SubCommand decorator")
             raise RuntimeError("See logger exception")
 
+        if uses < 1:
+            get_logger().critical(f"A cooldown needs at least one use, got {uses}")
+
+        if per not in ("user", "guild", "channel"):
+            get_logger().critical(f"Unknown cooldown scope {per}, use user, guild or channel")
+
         func.header.cooldown = seconds
+        func.header.cooldown_uses = uses
+        func.header.cooldown_per = per
+
+        return func
+
+    return inner
+
+
+def MaxConcurrency(limit: int, per: str = "global", queue_size: int = 100, overflow: str = "wait"):
+    """
+    MaxConcurrency decorator used to limit how many executions of a subcommand run at once
+    Executions over the limit wait in a bounded queue for a free slot
+
+    :param limit: the maximum amount of executions running at once
+    :param per: whom the limit applies to, either "global", "user", "guild" or "channel"
+    :param queue_size: the maximum amount of executions waiting for a free slot
+    :param overflow: what happens if the queue is full: "wait" until there is room, "reject" the new execution
+                     or "drop_oldest" waiting execution
+    :return: a descriptor
+    """
+
+    def inner(func):
+        if not isinstance(func, SubcommandWrapper):
+            get_logger().log(LogLevel.CRITICAL, "Subcommand was not initialized with SubCommand decorator")
+            raise RuntimeError("See logger exception")
+
+        concurrency_limit = ConcurrencyLimit(limit, per, queue_size, overflow)
+        validate_concurrency_limit(concurrency_limit)
+        func.header.max_concurrency = concurrency_limit
 
         return func
 
@@ -140,15 +183,46 @@ def PermissionUnion(*general_permissions: bytes, enforce_bot_permissions: bool =
     return inner
 
 
-def Event(event_type: EventType):
+def Event(
+        event_type: EventType,
+        serial: bool = False,
+        message_id: Union[int, Iterable[int]] = None,
+        channel_id: Union[int, Iterable[int]] = None,
+        guild_id: Union[int, Iterable[int]] = None,
+        emoji: Union[Any, Iterable[Any]] = None,
+        batch_window: float = None,
+        max_batch: int = None,
+        debounce: float = None,
+        batch_key: Optional[str] = "message_id",
+        max_wait: float = None
+):
     """
     Event decorator used for standalone event class bound methods
+    The method is only called for events matching every given filter, a filter can be one key or multiple keys
+    With batch_window or debounce, events of the same batch_key are collected and the method is called once
+    with a list of them instead of once per event
 
     :param event_type: The event type
+    :param serial: if set to True, the method runs one after another with the other serial handlers
+                   even if the event handler runs handlers concurrently. Cannot be combined with batching
+    :param message_id: the ids of the messages
+    :param channel_id: the ids of the channels
+    :param guild_id: the ids of the guilds
+    :param emoji: the emojis, either ReactionEmoji, emoji id, unicode emoji or name
+    :param batch_window: the seconds events are collected after the first one
+    :param max_batch: the amount of events after which the method is called right away
+    :param debounce: the seconds without a new event after which the method is called, instead of a fixed window
+    :param batch_key: the field events are batched by, e.g. "message_id" for one batch per message.
+                      The first argument of the event is used, the id of a discord.Message is its message_id.
+                      Events without that field are handed over one by one, None batches every event together
+    :param max_wait: the seconds after the first event a debounced batch is handed over at the latest,
+                     defaults to 10 times the debounce
     :return:
     """
+    filters = normalize_event_filters(message_id=message_id, channel_id=channel_id, guild_id=guild_id, emoji=emoji)
+    batching = create_event_batching(batch_window, max_batch, debounce, batch_key, max_wait, serial)
 
     def inner(func):
-        return EventWrapper(func, event_type)
+        return EventWrapper(func, event_type, serial, filters, batching)
 
     return inner
\ No newline at end of file
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any
+import functools
+import traceback
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Sequence, Set, Tuple, Union
 
 import discord
-import emoji
 
+from yukari.baseheaders import EventBatching, EventWrapper
+from yukari.clock import get_clock, wait_for
 from yukari.commandhandler import get_command_handler
-from yukari.dataholders import ReactionEmoji, ReactionAddEvent
+from yukari.cache import TTLCache
+from yukari.dataholders import ReactionEmoji, ReactionAddEvent, normalize_emoji_name
 from yukari.enums import EventType
 from yukari.logger import get_logger
+from yukari.utils import EVENT_FILTER_FIELDS, create_event_batching, get_event_filter_keys, normalize_event_filters
 
 event_handler_instance = None
 
@@ -17,50 +22,544 @@ def get_event_handler() -> 'EventHandler':
     return event_handler_instance  # noqa
 
 
+class EventSubscription:
+    """
+    A handler of an event type, bound to its command if it belongs to one
+    """
+    __slots__ = ("handler", "name", "serial", "filters", "source", "position")
+
+    def __init__(self, handler: Callable, name: str, serial: bool, filters: Dict[str, Set[Hashable]], source: Any):
+        """
+        :param handler: the coroutine function called with the event data
+        :param name: the name used in logs
+        :param serial: whetever the handler has to run one after another with the other serial handlers
+        :param filters: field -> keys the event has to match, shared with the EventWrapper of the handler
+        :param source: the EventWrapper or injected function the subscription was created from
+        """
+        self.handler = handler
+        self.name = name
+        self.serial = serial
+        self.filters = filters
+        self.source = source
+        self.position = 0
+
+    @property
+    def routing_field(self) -> Union[str, None]:
+        """
+        :return: the most selective filtered field, whose keys are indexed
+        """
+        for field in EVENT_FILTER_FIELDS:
+            if field in self.filters:
+                return field
+
+        return None
+
+    def matches(self, event: Any) -> bool:
+        """
+        :param event: the event data
+        :return: whetever the event matches every filter
+        """
+        for field, keys in self.filters.items():
+            if not any(key in keys for key in get_event_filter_keys(event, field)):
+                return False
+
+        return True
+
+
+class _EventRoute:
+    """
+    The subscriptions of one event type
+    Subscriptions without filters are always called, the others are indexed by the keys of their most selective
+    filter, so an event only looks at the subscriptions whose keys it matches
+    """
+    __slots__ = ("subscriptions", "unfiltered", "indexes")
+
+    def __init__(self, subscriptions: List[EventSubscription]):
+        self.subscriptions = tuple(subscriptions)
+        self.unfiltered = tuple(subscription for subscription in subscriptions if not subscription.filters)
+        self.indexes: Dict[str, Dict[Hashable, List[EventSubscription]]] = {}
+
+        for subscription in subscriptions:
+            if subscription.filters:
+                self.index_keys(subscription, subscription.filters[subscription.routing_field])
+
+    def index_keys(self, subscription: EventSubscription, keys: Iterable[Hashable]) -> None:
+        index = self.indexes.setdefault(subscription.routing_field, {})
+
+        for key in keys:
+            subscriptions = index.setdefault(key, [])
+
+            if subscription not in subscriptions:
+                subscriptions.append(subscription)
+
+    def unindex_keys(self, subscription: EventSubscription, keys: Iterable[Hashable]) -> None:
+        index = self.indexes.get(subscription.routing_field, {})
+
+        for key in keys:
+            subscriptions = index.get(key)
+
+            if subscriptions is not None and subscription in subscriptions:
+                subscriptions.remove(subscription)
+
+                if not subscriptions:
+                    del index[key]
+
+    def match(self, event: Any) -> Sequence[EventSubscription]:
+        """
+        :param event: the event data
+        :return: the subscriptions matching the event in registration order
+        """
+        if not self.indexes:
+            return self.unfiltered
+
+        candidates = []
+
+        for field, index in self.indexes.items():
+            for key in get_event_filter_keys(event, field):
+                candidates.extend(index.get(key, ()))
+
+        if not candidates:
+            return self.unfiltered
+
+        matched = [subscription for subscription in dict.fromkeys(candidates) if subscription.matches(event)]
+
+        return sorted((*self.unfiltered, *matched), key=lambda subscription: subscription.position)
+
+
+class _EventBatcher:
+    """
+    Collects the events of a handler per batch key and calls the handler once with the list of events
+    The batch is handed over once its window ended (or, when debouncing, once no event came in for the window
+    or max_wait seconds after its first event) or once it holds max_batch events
+    Every batch is handed over in a task of its own, so collecting an event never waits for the handler
+    """
+    def __init__(self, event_handler: 'EventHandler', subscription: EventSubscription, batching: EventBatching):
+        """
+        :param event_handler: the event handler running the batches
+        :param subscription: the subscription of the handler receiving the batches
+        :param batching: the batching settings
+        """
+        self.event_handler = event_handler
+        self.subscription = subscription
+        self.batching = batching
+        self._batches: Dict[Hashable, List[Any]] = {}
+        self._deadlines: Dict[Hashable, float] = {}
+        self._timers: Dict[Hashable, asyncio.Task] = {}
+        self._flushes: Set[asyncio.Task] = set()
+        self._warned_missing_key = False
+
+    async def __call__(self, *data: Any) -> None:
+        event = data[0] if len(data) == 1 else data
+        key = None
+
+        if self.batching.key is not None:
+            # Events with multiple arguments (e.g. a message before and after an edit) are batched by the first one
+            keys = get_event_filter_keys(data[0], self.batching.key)
+
+            if not keys:
+                # Otherwise every event without the key would end up in one batch
+                if not self._warned_missing_key:
+                    self._warned_missing_key = True
+                    get_logger().warning(
+                        f"Events of {self.subscription.name} have no {self.batching.key} to be batched by, "
+                        f"they are handed over one by one"
+                    )
+
+                self.event_handler.stats["unbatched"] += 1
+                self._start_flush([event])
+                return
+
+            key = keys[0]
+
+        now = get_clock().now()
+        batch = self._batches.get(key)
+
+        if batch is None:
+            batch = self._batches[key] = []
+            self._deadlines[key] = now + self.batching.max_wait
+
+        batch.append(event)
+        self.event_handler.stats["batched"] += 1
+
+        if (self.batching.max_batch and len(batch) >= self.batching.max_batch) or now >= self._deadlines[key]:
+            self._cancel_timer(key)
+            self._start_flush(self._pop(key))
+        elif key not in self._timers or self.batching.debounce:
+            self._cancel_timer(key)
+
+            # The end of the window is taken when the event came in, not when the timer starts
+            flush_at = min(now + self.batching.window, self._deadlines[key])
+            self._timers[key] = asyncio.get_running_loop().create_task(self._flush_later(key, flush_at))
+
+    def _pop(self, key: Hashable) -> List[Any]:
+        """
+        :param key: the batch key
+        :return: the events of the batch, which are removed so the next event starts a new batch
+        """
+        self._deadlines.pop(key, None)
+        return self._batches.pop(key, [])
+
+    def _cancel_timer(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+
+        if timer is not None:
+            timer.cancel()
+
+    async def _flush_later(self, key: Hashable, flush_at: float) -> None:
+        await get_clock().sleep(flush_at - get_clock().now())
+
+        self._timers.pop(key, None)
+        self._start_flush(self._pop(key))
+
+    def _start_flush(self, events: List[Any]) -> None:
+        """
+        Calls the handler with the events of a batch in a task of its own, which is kept until it is done
+
+        :param events: the events of the batch
+        :return: None
+        """
+        if not events:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._flush(events))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, events: List[Any]) -> None:
+        self.event_handler.stats["batches"] += 1
+        await self.event_handler._run_handler(self.subscription, (events,))
+
+    async def flush_all(self) -> None:
+        """
+        Calls the handler with every collected batch right away and waits until every batch was handled
+
+        :return: None
+        """
+        for key in list(self._batches):
+            self._cancel_timer(key)
+            self._start_flush(self._pop(key))
+
+        await asyncio.gather(*self._flushes)
+
+
 class EventHandler:
-    def __init__(self):
+    def __init__(
+            self,
+            concurrent: bool = False,
+            handler_timeout: float = None,
+            reaction_dedup_window: float = 2.0,
+            reaction_dedup_size: int = 10000
+    ):
+        """
+        :param concurrent: if set to True, the handlers of an event run concurrently.
+                           Handlers registered with serial=True still run one after another in registration order
+        :param handler_timeout: the seconds (on the clock of get_clock) after which a handler is cancelled, None for no timeout
+        :param reaction_dedup_window: the seconds a reaction is remembered, so discord.py's cached and raw reaction
+                                      event of the same reaction are only dispatched once
+        :param reaction_dedup_size: the maximum amount of remembered reactions
+        """
         global event_handler_instance
 
+        self.concurrent = concurrent
+        self.handler_timeout = handler_timeout
         self.event_injections = {}
+        self._injected_subscriptions: Dict[EventType, List[EventSubscription]] = {}
+        self._recent_reactions = TTLCache(reaction_dedup_size, reaction_dedup_window)
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("dispatched", "handled", "errors", "timeouts", "deduplicated", "batched", "batches", "unbatched"), 0
+        )
+
+        # (EventWrapper, command) or (injected function, None) -> batcher, kept when the dispatch table is rebuilt
+        self._batchers: Dict[Tuple[Any, Any], _EventBatcher] = {}
+
+        # EventType -> handlers of the registered commands followed by the injected functions
+        # Rebuilt whenever the revision of the command handler changed since it was built
+        self._dispatch_table: Dict[EventType, _EventRoute] = {}
+        self._dispatch_table_revision = None
+        self._subscriptions_by_source: Dict[Any, List[Tuple[_EventRoute, EventSubscription]]] = {}
 
         event_handler_instance = self
 
     async def dispatch_event(self, event_type: EventType, *data: Any):
         """
         Dispatches a discord event to the commands which registered for it.
+        Only the handlers of that event type whose filters match the event are looked at
+        An exception or timeout of a handler is logged and does not stop the other handlers
         :param event_type: The type of the event to dispatch
         :param data: The data passed to the event function
         :return:
         """
+        self.stats["dispatched"] += 1
+        subscriptions = self.get_route(event_type).match(data[0] if data else None)
+
+        if not self.concurrent or len(subscriptions) < 2:
+            await self._run_serial(subscriptions, data)
+            return
+
+        serial = [subscription for subscription in subscriptions if subscription.serial]
+        runs = [self._run_handler(subscription, data) for subscription in subscriptions if not subscription.serial]
+
+        if serial:
+            runs.append(self._run_serial(serial, data))
+
+        await asyncio.gather(*runs)
+
+    async def _run_serial(self, subscriptions: Sequence[EventSubscription], data: Tuple[Any, ...]) -> None:
+        for subscription in subscriptions:
+            await self._run_handler(subscription, data)
+
+    async def _run_handler(self, subscription: EventSubscription, data: Tuple[Any, ...]) -> None:
+        """
+        Runs a single handler, logging instead of raising its exceptions
+
+        :param subscription: the handler
+        :param data: the data passed to the handler
+        :return: None
+        """
+        try:
+            if self.handler_timeout is None:
+                await subscription.handler(*data)
+            else:
+                await wait_for(subscription.handler(*data), self.handler_timeout)
+
+            self.stats["handled"] += 1
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            get_logger().error(f"Event handler {subscription.name} timed out after {self.handler_timeout} seconds", prevent_exception=True)
+        except Exception:
+            self.stats["errors"] += 1
+            get_logger().error(f"Event handler {subscription.name} raised an exception:\n{traceback.format_exc()}", prevent_exception=True)
+
+    def get_handlers(self, event_type: EventType) -> Tuple[EventSubscription, ...]:
+        """
+        :param event_type: The type of the event
+        :return: every handler of that event type regardless of its filters
+        """
+        return self.get_route(event_type).subscriptions
+
+    def get_route(self, event_type: EventType) -> _EventRoute:
+        """
+        :param event_type: The type of the event
+        :return: the indexed handlers of that event type
+        """
+        command_handler = get_command_handler()
+        revision = command_handler.revision if command_handler is not None else None
+
+        if revision != self._dispatch_table_revision:
+            self._rebuild_dispatch_table()
+
+        route = self._dispatch_table.get(event_type)
+
+        if route is None:
+            route = self._dispatch_table[event_type] = _EventRoute([])
+
+        return route
+
+    def _rebuild_dispatch_table(self) -> None:
+        """
+        Collects the event functions of every registered command and every injected function per event type
+
+        :return: None
+        """
         command_handler = get_command_handler()
+        table: Dict[EventType, list] = {}
+
+        if command_handler is not None:
+            for command_invoke in command_handler.commands:
+                command_group_class = command_handler.commands[command_invoke]["cog_cls"]
+
+                for event_wrapper in command_group_class._events:
+                    table.setdefault(event_wrapper.event_type, []).append(self._subscribe(
+                        functools.partial(event_wrapper.execute, command_group_class),
+                        f"{command_invoke}.{event_wrapper.func.__name__}",
+                        event_wrapper.serial,
+                        event_wrapper.filters,
+                        event_wrapper,
+                        event_wrapper.batching,
+                        command_group_class
+                    ))
 
-        for command_invoke in command_handler.commands:
-            command_group_class = command_handler.commands[command_invoke]["cog_cls"]
+        for event_type, subscriptions in self._injected_subscriptions.items():
+            table.setdefault(event_type, []).extend(subscriptions)
 
-            for _, event_wrapper in command_group_class._events.gets(event_type):
-                await event_wrapper.execute(command_group_class, *data)
+        self._dispatch_table = {}
+        self._subscriptions_by_source = {}
 
-        [await event_function(*data) for event_function in self.event_injections.get(event_type, [])]
+        for event_type, subscriptions in table.items():
+            for position, subscription in enumerate(subscriptions):
+                subscription.position = position
 
-    def on_event(self, event_type: EventType):
+            route = self._dispatch_table[event_type] = _EventRoute(subscriptions)
+
+            for subscription in subscriptions:
+                self._subscriptions_by_source.setdefault(subscription.source, []).append((route, subscription))
+
+        self._dispatch_table_revision = command_handler.revision if command_handler is not None else None
+
+    def _subscribe(
+            self,
+            handler: Callable,
+            name: str,
+            serial: bool,
+            filters: Dict[str, Set[Hashable]],
+            source: Any,
+            batching: EventBatching = None,
+            owner: Any = None
+    ) -> EventSubscription:
+        """
+        Creates the subscription of a handler. Handlers with batching receive their events through a batcher
+
+        :param owner: the command the handler is bound to, None for injected functions.
+                      The EventWrapper of a command is shared by every instance of its class,
+                      so every registered instance needs a batcher of its own
+        :return: the subscription
+        """
+        if batching is None:
+            return EventSubscription(handler, name, serial, filters, source)
+
+        batcher = self._batchers.get((source, owner))
+
+        if batcher is None:
+            batcher = self._batchers[(source, owner)] = _EventBatcher(
+                self, EventSubscription(handler, name, serial, {}, source), batching
+            )
+
+        # Collecting an event never waits for the handler, so it does not need to run serially
+        # Batching handlers cannot be serial themselves, see create_event_batching
+        return EventSubscription(batcher, name, False, filters, source)
+
+    async def flush_batches(self) -> None:
+        """
+        Calls every batching handler with its collected events right away, e.g. before shutting down
+
+        :return: None
+        """
+        for batcher in list(self._batchers.values()):
+            await batcher.flush_all()
+
+    def add_filter_keys(self, handler: Any, **keys: Any) -> None:
+        """
+        Lets a handler receive events of more keys, e.g. of a reaction menu which was just sent
+        Adding a field the handler was not filtered by before restricts it to that field
+
+        :param handler: the EventWrapper of a command (e.g. self.on_reaction) or an injected function
+        :param keys: for every field of EVENT_FILTER_FIELDS a single key or an iterable of keys
+        :return: None
+        """
+        filters = self._get_filters(handler)
+
+        for field, field_keys in normalize_event_filters(**keys).items():
+            if field not in filters:
+                filters[field] = set(field_keys)
+
+                # The routing of the handler might change, so the indexes are rebuilt
+                self._dispatch_table_revision = None
+                continue
+
+            filters[field] |= field_keys
+
+            for route, subscription in self._subscriptions_by_source.get(handler, ()):
+                if subscription.routing_field == field:
+                    route.index_keys(subscription, field_keys)
+
+    def remove_filter_keys(self, handler: Any, **keys: Any) -> None:
+        """
+        Stops a handler from receiving events of some keys, e.g. of a reaction menu which expired
+        A field without any keys left matches no event
+
+        :param handler: the EventWrapper of a command (e.g. self.on_reaction) or an injected function
+        :param keys: for every field of EVENT_FILTER_FIELDS a single key or an iterable of keys
+        :return: None
+        """
+        filters = self._get_filters(handler)
+
+        for field, field_keys in normalize_event_filters(**keys).items():
+            if field not in filters:
+                continue
+
+            filters[field] -= field_keys
+
+            for route, subscription in self._subscriptions_by_source.get(handler, ()):
+                if subscription.routing_field == field:
+                    route.unindex_keys(subscription, field_keys)
+
+    def _get_filters(self, handler: Any) -> Dict[str, Set[Hashable]]:
+        """
+        :param handler: the EventWrapper of a command or an injected function
+        :return: the filters of the handler, which are shared with its subscriptions
+        """
+        if isinstance(handler, EventWrapper):
+            return handler.filters
+
+        for subscriptions in self._injected_subscriptions.values():
+            for subscription in subscriptions:
+                if subscription.source is handler:
+                    return subscription.filters
+
+        get_logger().critical(f"{handler} is neither an EventWrapper nor an injected function")
+
+    def on_event(
+            self,
+            event_type: EventType,
+            serial: bool = False,
+            message_id: Union[int, Iterable[int]] = None,
+            channel_id: Union[int, Iterable[int]] = None,
+            guild_id: Union[int, Iterable[int]] = None,
+            emoji: Union[Any, Iterable[Any]] = None,
+            batch_window: float = None,
+            max_batch: int = None,
+            debounce: float = None,
+            batch_key: Union[str, None] = "message_id",
+            max_wait: float = None
+    ):
         """
         Decorator for injecting a function into the event handling process.
+        The function is only called for events matching every given filter, a filter can be one key or multiple keys
+        With batch_window or debounce, events of the same batch_key are collected and the function is called once
+        with a list of them instead of once per event
 
         :param event_type: The type of the event to inject
+        :param serial: if set to True, the function runs one after another with the other serial handlers
+                       even if the handlers run concurrently. Cannot be combined with batching
+        :param message_id: the ids of the messages
+        :param channel_id: the ids of the channels
+        :param guild_id: the ids of the guilds
+        :param emoji: the emojis, either ReactionEmoji, emoji id, unicode emoji or name
+        :param batch_window: the seconds events are collected after the first one
+        :param max_batch: the amount of events after which the function is called right away
+        :param debounce: the seconds without a new event after which the function is called, instead of a fixed window
+        :param batch_key: the field events are batched by, e.g. "message_id" for one batch per message.
+                          The first argument of the event is used, the id of a discord.Message is its message_id.
+                          Events without that field are handed over one by one, None batches every event together
+        :param max_wait: the seconds after the first event a debounced batch is handed over at the latest,
+                         defaults to 10 times the debounce
         :return: The decorated function
         """
+        filters = normalize_event_filters(message_id=message_id, channel_id=channel_id, guild_id=guild_id, emoji=emoji)
+        batching = create_event_batching(batch_window, max_batch, debounce, batch_key, max_wait, serial)
+
         def inner(func):
-            self._inject_event(event_type, func)
+            self._inject_event(event_type, func, serial, filters, batching)
             return func
 
         return inner
 
-    def _inject_event(self, event_type: EventType, event_function_coroutine):
+    def _inject_event(
+            self,
+            event_type: EventType,
+            event_function_coroutine,
+            serial: bool = False,
+            filters: Dict[str, Set[Hashable]] = None,
+            batching: EventBatching = None
+    ):
         """
         Injects a custom function into the event handling process.
 
         :param event_type: The type of the event to inject
         :param event_function_coroutine: The coro to execute when the event is dispatched
+        :param serial: whetever the function has to run one after another with the other serial handlers
+        :param filters: field -> keys the event has to match, see normalize_event_filters
+        :param batching: how events are collected before the function is called with a list of them, None for no batching
         :return: None
         """
         if not asyncio.iscoroutinefunction(event_function_coroutine):
@@ -70,50 +569,98 @@ class EventHandler:
         event_list.append(event_function_coroutine)
         self.event_injections[event_type] = event_list
 
-    def register_events(self, client: discord.Client):
+        subscription = self._subscribe(
+            event_function_coroutine,
+            getattr(event_function_coroutine, "__qualname__", repr(event_function_coroutine)),
+            serial,
+            filters if filters is not None else {},
+            event_function_coroutine,
+            batching
+        )
+        self._injected_subscriptions.setdefault(event_type, []).append(subscription)
+
+        # Injected functions run after the command handlers, so only the route of this event type is rebuilt
+        subscriptions = [*self._dispatch_table[event_type].subscriptions] if event_type in self._dispatch_table else []
+        subscription.position = len(subscriptions)
+        subscriptions.append(subscription)
+
+        route = self._dispatch_table[event_type] = _EventRoute(subscriptions)
+
+        for other in subscriptions:
+            routes = self._subscriptions_by_source.setdefault(other.source, [])
+            routes[:] = [(other_route, entry) for other_route, entry in routes if entry is not other]
+            routes.append((route, other))
+
+    async def dispatch_reaction_add(self, reaction_add_event: ReactionAddEvent) -> None:
+        """
+        Dispatches a reaction unless the same reaction (user, message and emoji) was dispatched within the dedup window
+        discord.py fires both on_reaction_add and on_raw_reaction_add for reactions on cached messages
+
+        :param reaction_add_event: the reaction
+        :return: None
+        """
+        reaction_emoji = reaction_add_event.emoji
+        key = (
+            reaction_add_event.author_id,
+            reaction_add_event.message_id,
+            reaction_emoji.emoji_id if reaction_emoji.is_guild else reaction_emoji.name
+        )
+
+        if key in self._recent_reactions:
+            self.stats["deduplicated"] += 1
+            return
+
+        self._recent_reactions.set(key, True)
+        await self.dispatch_event(EventType.REACTION_ADD, reaction_add_event)
+
+    def register_events(self, client: discord.Client, raw_only: bool = False):
         """
         Registers all the necessary events
 
         :param client: the discord client
+        :param raw_only: if set to True, only the raw reaction event is used, which fires exactly once for every
+                         reaction and skips building discord.py's cached objects. Otherwise the raw and the cached
+                         reaction events are deduplicated
         :return: None
         """
 
-        @client.event
-        async def on_reaction_add(reaction, user):
-            if emoji.is_emoji(str(reaction.emoji)):
-                reaction_emoji = ReactionEmoji(
-                    emoji.demojize(str(reaction.emoji)),
-                    None,
-                    False
-                )
-            else:
-                reaction_emoji = ReactionEmoji(
-                    reaction.emoji.name,
-                    reaction.emoji.id,
-                    reaction.emoji.animated
-                )
+        if not raw_only:
+            @client.event
+            async def on_reaction_add(reaction, user):
+                if reaction.is_custom_emoji():
+                    reaction_emoji = ReactionEmoji(
+                        reaction.emoji.name,
+                        reaction.emoji.id,
+                        reaction.emoji.animated
+                    )
+                else:
+                    reaction_emoji = ReactionEmoji(
+                        normalize_emoji_name(str(reaction.emoji)),
+                        None,
+                        False
+                    )
 
-            guild_id = None
+                guild_id = None
 
-            if hasattr(reaction, "guild"):
-                if reaction.guild.id is not None:
-                    guild_id = reaction.guild.id
+                if reaction.message.guild is not None:
+                    guild_id = reaction.message.guild.id
 
-            reaction_add_event = ReactionAddEvent(
-                user.id,
-                reaction.message.id,
-                reaction.message.channel.id,
-                guild_id,
-                reaction_emoji,
-                client
-            )
+                reaction_add_event = ReactionAddEvent(
+                    user.id,
+                    reaction.message.id,
+                    reaction.message.channel.id,
+                    guild_id,
+                    reaction_emoji,
+                    client
+                )
 
-            await self.dispatch_event(EventType.REACTION_ADD, reaction_add_event)
+                await self.dispatch_reaction_add(reaction_add_event)
 
         @client.event
         async def on_raw_reaction_add(payload):
+            # Unicode emojis only have their name, which is the emoji itself
             reaction_emoji = ReactionEmoji(
-                payload.emoji.name,
+                payload.emoji.name if payload.emoji.id is not None else normalize_emoji_name(payload.emoji.name),
                 payload.emoji.id,
                 payload.emoji.animated
             )
@@ -127,4 +674,4 @@ class EventHandler:
                 client
             )
 
-            await self.dispatch_event(EventType.REACTION_ADD, reaction_add_event)
+            await self.dispatch_reaction_add(reaction_add_event)
@@ -0,0 +1,173 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from yukari.clock import wait_for
+from yukari.logger import get_logger
+
+_MISSING = object()
+
+
+class _Worker:
+    """
+    Task working through one mailbox, one message after another
+    """
+    __slots__ = ("mailbox", "task")
+
+    def __init__(self, mailbox_size: int):
+        self.mailbox: asyncio.Queue = asyncio.Queue(mailbox_size)
+        self.task = None
+
+
+class GuildMailboxes:
+    """
+    Runs work of the same guild in order while different guilds run in parallel, like actors with mailboxes
+    Every guild id is hashed onto one of a fixed amount of workers, so work of a guild always goes through
+    the same mailbox. A worker task is started on the first message for its mailbox and is reaped after
+    being idle for idle_timeout seconds, so only workers of active guilds exist
+    """
+    def __init__(self, workers: int = 256, mailbox_size: int = 100, idle_timeout: float = 60.0, overflow: str = "wait"):
+        """
+        :param workers: the maximum amount of workers, i.e. guilds running at the same time
+        :param mailbox_size: the maximum amount of messages waiting in a mailbox
+        :param idle_timeout: the seconds a worker waits for new messages before it is stopped
+        :param overflow: what happens if a mailbox is full: "wait" until there is room or "reject" the message
+        """
+        if workers < 1:
+            get_logger().critical(f"There has to be at least one worker, got {workers}")
+
+        if overflow not in ("wait", "reject"):
+            get_logger().critical(f"Unknown mailbox overflow mode {overflow}, use wait or reject")
+
+        self.workers = workers
+        self.mailbox_size = mailbox_size
+        self.idle_timeout = idle_timeout
+        self.overflow = overflow
+        self._workers: Dict[int, _Worker] = {}
+        self.stats: Dict[str, int] = dict.fromkeys(("submitted", "rejected", "completed", "started", "reaped", "max_depth"), 0)
+
+    async def submit(self, key: Hashable, func: Callable, *args: Any) -> Any:
+        """
+        Queues a coroutine function in the mailbox of the key and waits for its result
+
+        :param key: the key whose work runs in order, e.g. the guild id
+        :param func: the coroutine function
+        :param args: the arguments of the function
+        :return: the result of the function, None if the mailbox was full and the overflow mode is "reject"
+        """
+        index = hash(key) % self.workers
+        worker = self._workers.get(index)
+
+        if worker is None:
+            worker = self._workers[index] = _Worker(self.mailbox_size)
+
+        future = asyncio.get_running_loop().create_future()
+        item = (func, args, future)
+
+        if self.overflow == "reject":
+            try:
+                worker.mailbox.put_nowait(item)
+            except asyncio.QueueFull:
+                self.stats["rejected"] += 1
+                return None
+        else:
+            # A full mailbox is never empty, so its worker cannot be reaped while waiting for room
+            await worker.mailbox.put(item)
+
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], worker.mailbox.qsize())
+
+        # The task of the worker is None once reaped, a stopped task is replaced as well
+        if worker.task is None or worker.task.done():
+            worker.task = asyncio.get_running_loop().create_task(self._work(index, worker))
+            self.stats["started"] += 1
+
+        return await future
+
+    async def _work(self, index: int, worker: _Worker) -> None:
+        """
+        Runs the messages of a mailbox until it stays empty for idle_timeout seconds
+
+        :param index: the index of the worker
+        :param worker: the worker
+        :return: None
+        """
+        mailbox = worker.mailbox
+
+        try:
+            while True:
+                item = _MISSING
+
+                try:
+                    item = mailbox.get_nowait()
+                except asyncio.QueueEmpty:
+                    try:
+                        item = await wait_for(mailbox.get(), self.idle_timeout)
+                    except asyncio.TimeoutError:
+                        pass
+
+                if item is _MISSING:
+                    if mailbox.empty():
+                        self.stats["reaped"] += 1
+                        return
+
+                    continue
+
+                func, args, future = item
+
+                try:
+                    result = await func(*args)
+                except asyncio.CancelledError:
+                    if not future.done():
+                        future.cancel()
+
+                    # Only stop if the worker itself got cancelled and not just something the function waited for
+                    if asyncio.current_task().cancelling():
+                        raise
+                except BaseException as e:
+                    # The exception is raised to the caller of submit, so it never waits forever
+                    if not future.done():
+                        future.set_exception(e)
+
+                    # KeyboardInterrupt, SystemExit and the like still stop the worker
+                    if not isinstance(e, Exception):
+                        raise
+                else:
+                    if not future.done():
+                        future.set_result(result)
+
+                self.stats["completed"] += 1
+        finally:
+            worker.task = None
+
+            if mailbox.empty():
+                if self._workers.get(index) is worker:
+                    del self._workers[index]
+            else:
+                # The worker got stopped with messages left, their callers would wait forever otherwise
+                # The worker stays registered, so the next message (or a caller waiting for room) starts a new task
+                while not mailbox.empty():
+                    mailbox.get_nowait()[2].cancel()
+
+    def get_depths(self) -> Dict[int, int]:
+        """
+        :return: the amount of waiting messages of every running worker
+        """
+        return {index: worker.mailbox.qsize() for index, worker in self._workers.items()}
+
+    async def close(self) -> None:
+        """
+        Stops every worker, waiting messages are cancelled
+
+        :return: None
+        """
+        workers: Tuple[_Worker, ...] = tuple(self._workers.values())
+        self._workers.clear()
+
+        for worker in workers:
+            while not worker.mailbox.empty():
+                worker.mailbox.get_nowait()[2].cancel()
+
+            if worker.task is not None:
+                worker.task.cancel()
+
+        await asyncio.gather(*(worker.task for worker in workers if worker.task is not None), return_exceptions=True)
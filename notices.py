@@ -0,0 +1,134 @@
+from typing import Dict, Hashable, Tuple
+
+import discord
+
+from yukari.cache import TTLCache
+from yukari.cooldowns import CooldownStore
+from yukari.logger import get_logger
+
+_NOTICE_MODES = ("always", "once", "edit")
+
+cooldown_notices_instance = None
+
+
+def get_cooldown_notices() -> 'CooldownNotices':
+    """
+    The command handler and every subcommand share the same cooldown notices
+    Unless others are set, a notice is sent on every rejection
+
+    :return: the cooldown notices
+    """
+    global cooldown_notices_instance
+
+    if cooldown_notices_instance is None:
+        cooldown_notices_instance = CooldownNotices()
+
+    return cooldown_notices_instance
+
+
+def set_cooldown_notices(notices: 'CooldownNotices') -> None:
+    """
+    :param notices: the new cooldown notices, e.g. CooldownNotices("once")
+    :return: None
+    """
+    global cooldown_notices_instance
+
+    cooldown_notices_instance = notices
+
+
+class CooldownRejection:
+    """
+    Reason a command was rejected because of a cooldown
+    The message is only built once it is converted to a string, so suppressed rejections are cheap
+    """
+    __slots__ = ("seconds_left", "argument")
+
+    def __init__(self, seconds_left: float, argument: bool = False):
+        """
+        :param seconds_left: the seconds until the command can be used again
+        :param argument: whetever the cooldown is an argument cooldown
+        """
+        self.seconds_left = seconds_left
+        self.argument = argument
+
+    def __str__(self):
+        if self.argument:
+            return f"Bitte warte noch {round(self.seconds_left, 1)} Sekunde/n, bevor du den Befehl mit diesem Argument erneut benutzt!"
+
+        return f"Bitte warte noch {round(self.seconds_left, 1)} Sekunde/n, bevor du den Befehl erneut benutzt!"
+
+    def __repr__(self):
+        return f"<CooldownRejection seconds_left={self.seconds_left} argument={self.argument}>"
+
+
+class CooldownNotices:
+    """
+    Decides whetever a user is told about a cooldown
+    "always" sends a notice on every rejection,
+    "once" sends at most one notice per user and cooldown until the cooldown ends,
+    "edit" does the same but edits the last notice of that user and cooldown instead of sending a new one.
+    In "edit" mode the command handler sends the notices of command and argument cooldowns itself,
+    otherwise it returns them to the caller of run_command
+    """
+    def __init__(self, mode: str = "always", max_entries: int = 100000, notice_ttl: float = 300.0):
+        """
+        :param mode: either "always", "once" or "edit"
+        :param max_entries: the maximum amount of users and cooldowns whose notices are remembered
+        :param notice_ttl: the seconds a notice can be edited in "edit" mode
+        """
+        if mode not in _NOTICE_MODES:
+            get_logger().critical(f"Unknown cooldown notice mode {mode}, use always, once or edit")
+
+        self.mode = mode
+        self._notified = CooldownStore(max_entries)
+        self._notices = TTLCache(max_entries, notice_ttl)
+        self.stats: Dict[str, int] = dict.fromkeys(("sent", "edited", "suppressed"), 0)
+
+    def should_notify(self, key: Tuple[int, Hashable], seconds_left: float) -> bool:
+        """
+        Has to be called on every rejection, counts the suppressed notices
+
+        :param key: the user id and the name of the cooldown
+        :param seconds_left: the seconds until the cooldown ends
+        :return: whetever the user should be told about the cooldown
+        """
+        if self.mode == "always" or not self._notified.acquire(key, seconds_left):
+            return True
+
+        self.stats["suppressed"] += 1
+        return False
+
+    async def send(self, key: Tuple[int, Hashable], channel: discord.abc.Messageable, content: str) -> None:
+        """
+        Sends a notice or, in "edit" mode, edits the last notice in the same channel
+
+        :param key: the user id and the name of the cooldown
+        :param channel: the channel the command was used in
+        :param content: the notice
+        :return: None
+        """
+        if self.mode == "edit":
+            notice = self._notices.get(key)
+
+            if notice is not None and notice.channel.id == channel.id:
+                try:
+                    await notice.edit(content=content)
+                    self.stats["edited"] += 1
+                    return
+                except discord.HTTPException:
+                    self._notices.invalidate(key)
+
+        notice = await channel.send(content=content)
+        self.stats["sent"] += 1
+
+        if self.mode == "edit":
+            self._notices.set(key, notice)
+
+    def reset_stats(self) -> None:
+        """
+        Resets every counter to 0
+
+        :return: None
+        """
+        for counter in self.stats:
+            self.stats[counter] = 0
@@ -0,0 +1,108 @@
+import re
+from typing import Dict, Iterable, NamedTuple, Optional
+
+_INVOKE_PATTERN = re.compile(r"\s*(\S+)")
+
+# Marks a node of the PrefixTrie at which a prefix ends
+_END = ""
+
+
+class PrefixTrie:
+    """
+    Prefix automaton over every command prefix
+    Finds the longest prefix a message starts with in a single walk over the first characters
+    """
+    def __init__(self, prefixes: Iterable[str]):
+        """
+        :param prefixes: the command prefixes
+        """
+        self.prefixes = tuple(prefixes)
+        self._root = {}
+
+        for prefix in self.prefixes:
+            node = self._root
+
+            for char in prefix:
+                node = node.setdefault(char, {})
+
+            node[_END] = len(prefix)
+
+    def match(self, content: str) -> int:
+        """
+        :param content: the message content
+        :return: the length of the longest prefix the content starts with, -1 if it does not start with any prefix
+        """
+        node = self._root
+        length = node.get(_END, -1)
+
+        for char in content:
+            node = node.get(char)
+
+            if node is None:
+                break
+
+            length = node.get(_END, length)
+
+        return length
+
+
+class PrefilterMatch(NamedTuple):
+    """
+    Positions of a message which passed the prefilter
+    """
+    prefix_end: int
+    invoke_end: int
+    invoke: str
+
+
+class CommandPrefilter:
+    """
+    Rejects messages which are not commands before they are tokenized or any callback runs
+    Also counts how many messages got rejected at each stage
+    """
+    def __init__(self, prefixes: Iterable[str]):
+        """
+        :param prefixes: the command prefixes
+        """
+        self.prefix_trie = PrefixTrie(prefixes)
+        self.invokes = set()
+        self.stats: Dict[str, int] = dict.fromkeys(("received", "no_prefix", "no_invoke", "unknown_invoke", "accepted"), 0)
+
+    def match(self, content: str, prefix_trie: PrefixTrie = None) -> Optional[PrefilterMatch]:
+        """
+        :param content: the message content
+        :param prefix_trie: the prefixes to match instead of the default ones
+        :return: the positions of the prefix and the invoke or None if the message is no command
+        """
+        stats = self.stats
+        stats["received"] += 1
+
+        prefix_end = (prefix_trie or self.prefix_trie).match(content)
+
+        if prefix_end < 0:
+            stats["no_prefix"] += 1
+            return None
+
+        invoke_match = _INVOKE_PATTERN.match(content, prefix_end)
+
+        if invoke_match is None:
+            stats["no_invoke"] += 1
+            return None
+
+        invoke = invoke_match.group(1).lower()
+
+        if invoke not in self.invokes:
+            stats["unknown_invoke"] += 1
+            return None
+
+        stats["accepted"] += 1
+        return PrefilterMatch(prefix_end, invoke_match.end(), invoke)
+
+    def reset_stats(self) -> None:
+        """
+        Resets every counter to 0
+
+        :return: None
+        """
+        for stage in self.stats:
+            self.stats[stage] = 0
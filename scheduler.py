@@ -0,0 +1,270 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, NamedTuple, Tuple
+
+from yukari.clock import get_clock
+from yukari.logger import get_logger
+
+_OVERFLOW_MODES = ("wait", "reject", "drop_oldest")
+
+command_scheduler_instance = None
+
+
+def get_command_scheduler() -> 'CommandScheduler':
+    """
+    Every command shares the same scheduler
+    Unless another scheduler is set, there is no global limit and only subcommand limits (see MaxConcurrency) apply
+
+    :return: the command scheduler
+    """
+    global command_scheduler_instance
+
+    if command_scheduler_instance is None:
+        command_scheduler_instance = CommandScheduler()
+
+    return command_scheduler_instance
+
+
+def set_command_scheduler(scheduler: 'CommandScheduler') -> None:
+    """
+    Should be called before any command is executed, running commands are not transferred
+
+    :param scheduler: the new command scheduler
+    :return: None
+    """
+    global command_scheduler_instance
+
+    command_scheduler_instance = scheduler
+
+
+class ConcurrencyLimit(NamedTuple):
+    """
+    How many executions may run at once and what happens to the executions waiting for a free slot
+    """
+    limit: int
+    per: str = "global"
+    queue_size: int = 100
+    overflow: str = "wait"
+
+
+class _Limiter:
+    """
+    Slots of one concurrency limit together with the executions waiting for a slot
+    A released slot is handed directly to the oldest waiting execution, so the order of arrival is kept
+    """
+    __slots__ = ("limit", "active", "queue", "overflow_waiters", "stats")
+
+    def __init__(self, limit: ConcurrencyLimit, stats: Dict[str, float]):
+        self.limit = limit
+        self.active = 0
+        self.queue: Deque[asyncio.Future] = deque()
+        self.overflow_waiters: Deque[asyncio.Future] = deque()
+        self.stats = stats
+
+    def is_idle(self) -> bool:
+        return not self.active and not self.queue and not self.overflow_waiters
+
+    async def acquire(self) -> bool:
+        """
+        :return: True if a slot was acquired, False if the execution was rejected or dropped
+        """
+        stats = self.stats
+
+        while True:
+            if self.active < self.limit.limit and not self.queue:
+                self.active += 1
+                stats["accepted"] += 1
+                return True
+
+            if len(self.queue) < self.limit.queue_size:
+                break
+
+            if self.limit.overflow == "reject" or not self.limit.queue_size:
+                stats["rejected"] += 1
+                return False
+
+            if self.limit.overflow == "drop_oldest":
+                self.queue.popleft().set_result(False)
+                stats["dropped"] += 1
+                stats["queued"] -= 1
+                break
+
+            # "wait": Wait for a free place in the queue, the caller receives the backpressure
+            waiter = asyncio.get_running_loop().create_future()
+            self.overflow_waiters.append(waiter)
+
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass the free place on if it was already given to this caller
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_overflow_waiter()
+                else:
+                    self._remove_overflow_waiter(waiter)
+
+                raise
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.queue.append(waiter)
+        stats["queued"] += 1
+        stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+        queued_at = get_clock().now()
+
+        try:
+            acquired = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                # The slot was already handed over
+                self.release()
+            elif waiter in self.queue:
+                self.queue.remove(waiter)
+                stats["queued"] -= 1
+                self._wake_overflow_waiter()
+
+            raise
+
+        if acquired:
+            waited = get_clock().now() - queued_at
+            stats["accepted"] += 1
+            stats["wait_time"] += waited
+            stats["max_wait_time"] = max(stats["max_wait_time"], waited)
+
+        return acquired
+
+    def release(self) -> None:
+        """
+        Hands the slot to the oldest waiting execution or frees it
+
+        :return: None
+        """
+        while self.queue:
+            waiter = self.queue.popleft()
+            self.stats["queued"] -= 1
+            self._wake_overflow_waiter()
+
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+
+        self.active -= 1
+
+    def _wake_overflow_waiter(self) -> None:
+        while self.overflow_waiters:
+            waiter = self.overflow_waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _remove_overflow_waiter(self, waiter: asyncio.Future) -> None:
+        try:
+            self.overflow_waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class CommandScheduler:
+    """
+    Limits how many commands run at once, globally and per subcommand (see MaxConcurrency)
+    Executions without a free slot wait in a bounded queue. If the queue is full, depending on the overflow mode,
+    the new execution is rejected ("reject"), the oldest waiting execution is dropped ("drop_oldest")
+    or the caller waits until there is room in the queue ("wait")
+    """
+    def __init__(self, max_concurrency: int = None, queue_size: int = 1000, overflow: str = "wait"):
+        """
+        :param max_concurrency: the maximum amount of commands running at once, None for no global limit
+        :param queue_size: the maximum amount of commands waiting for the global limit
+        :param overflow: what happens if the global queue is full, either "wait", "reject" or "drop_oldest"
+        """
+        self.global_limit = None
+
+        if max_concurrency is not None:
+            self.global_limit = ConcurrencyLimit(max_concurrency, "global", queue_size, overflow)
+            validate_concurrency_limit(self.global_limit)
+
+        self._limiters: Dict[Tuple[str, Hashable], _Limiter] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    async def acquire(self, name: str, scope_id: Hashable, limit: ConcurrencyLimit) -> bool:
+        """
+        Waits for a free slot. Every successful acquire has to be followed by a release
+
+        :param name: the name of the limit, e.g. the command and subcommand name
+        :param scope_id: the id of the user, guild or channel the limit applies to, 0 for global limits
+        :param limit: the concurrency limit
+        :return: True if a slot was acquired, False if the execution was rejected or dropped
+        """
+        limiter = self._limiters.get((name, scope_id))
+
+        if limiter is None:
+            stats = self._stats.get(name)
+
+            if stats is None:
+                stats = self._stats[name] = dict.fromkeys(
+                    ("accepted", "rejected", "dropped", "queued", "max_queued", "wait_time", "max_wait_time"), 0
+                )
+
+            limiter = self._limiters[(name, scope_id)] = _Limiter(limit, stats)
+
+        try:
+            acquired = await limiter.acquire()
+        finally:
+            self._forget_if_idle(name, scope_id, limiter)
+
+        return acquired
+
+    def release(self, name: str, scope_id: Hashable) -> None:
+        """
+        :param name: the name of the limit
+        :param scope_id: the id of the user, guild or channel the limit applies to, 0 for global limits
+        :return: None
+        """
+        limiter = self._limiters[(name, scope_id)]
+        limiter.release()
+        self._forget_if_idle(name, scope_id, limiter)
+
+    async def acquire_global(self) -> bool:
+        """
+        :return: True if a slot of the global limit was acquired (or there is no global limit),
+                 False if the execution was rejected or dropped
+        """
+        if self.global_limit is None:
+            return True
+
+        return await self.acquire("global", 0, self.global_limit)
+
+    def release_global(self) -> None:
+        if self.global_limit is not None:
+            self.release("global", 0)
+
+    def _forget_if_idle(self, name: str, scope_id: Hashable, limiter: _Limiter) -> None:
+        # Limits per user, guild or channel would otherwise keep a limiter for every id ever seen
+        if limiter.is_idle() and self._limiters.get((name, scope_id)) is limiter:
+            del self._limiters[(name, scope_id)]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Limits per user, guild or channel are summed up per name
+
+        :return: for every limit the amount of accepted, rejected and dropped executions,
+                 the current and maximum queue depth and the total and maximum seconds spent waiting
+        """
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+def validate_concurrency_limit(limit: ConcurrencyLimit) -> None:
+    """
+    :param limit: the concurrency limit to check
+    :return: None
+    """
+    if limit.limit < 1:
+        get_logger().critical(f"A concurrency limit needs at least one slot, got {limit.limit}")
+
+    if limit.queue_size < 0:
+        get_logger().critical(f"The queue size cannot be negative, got {limit.queue_size}")
+
+    if limit.overflow not in _OVERFLOW_MODES:
+        get_logger().critical(f"Unknown overflow mode {limit.overflow}, use wait, reject or drop_oldest")
+
+    if limit.per not in ("global", "user", "guild", "channel"):
+        get_logger().critical(f"Unknown concurrency scope {limit.per}, use global, user, guild or channel")
@@ -0,0 +1,239 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+from typing import Hashable, Optional, Tuple
+
+from yukari.clock import get_clock
+from yukari.cooldowns import CooldownBackend, gcra_acquire
+from yukari.logger import get_logger
+
+_MAGIC = b"YKCOOLD1"
+
+# magic, amount of slots, amount of slots a key may be stored in
+_HEADER = struct.Struct("<8sQQ")
+
+# key hash (0 marks an empty slot), id the cooldown belongs to, time the cooldown ends
+_SLOT = struct.Struct("<QQd")
+
+
+def _hash_key(key: Tuple[int, Hashable]) -> int:
+    """
+    Python's hash() of strings differs between processes, so keys are hashed with blake2b instead
+
+    :param key: the id and name of the cooldown
+    :return: a 64 bit hash which is never 0
+    """
+    return int.from_bytes(hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class SharedMemoryCooldownBackend(CooldownBackend):
+    """
+    Cooldown backend shared by every process on the same host which opens the same file (e.g. multiple shards)
+    The cooldowns are stored in a fixed size hash table inside a memory mapped file, /dev/shm keeps it in memory.
+    A key can only be stored in a small window of slots starting at the position of its hash.
+    If the window is full, the cooldown ending first is replaced, so the table never grows.
+    Only the window of a key is locked (POSIX range lock) while it is used,
+    so processes only wait for each other when they use keys in overlapping windows.
+    Every process has to use the default monotonic clock (or the same virtual one), as the end times are shared.
+    """
+    def __init__(self, path: str = "/dev/shm/yukari-cooldowns", capacity: int = 1 << 20, window: int = 16):
+        """
+        If the file already exists, its capacity and window are used instead of the supplied ones
+
+        :param path: the file the hash table is stored in
+        :param capacity: the amount of slots of the hash table
+        :param window: the amount of slots a key may be stored in
+        """
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        # The first process creates the table, every other process reads its dimensions
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER.size, 0, os.SEEK_SET)
+
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                if window > capacity:
+                    get_logger().critical(f"The window ({window}) cannot be larger than the capacity ({capacity})")
+
+                os.ftruncate(self._fd, _HEADER.size + capacity * _SLOT.size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, capacity, window), 0)
+            else:
+                magic, capacity, window = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+
+                if magic != _MAGIC:
+                    get_logger().critical(f"{path} is not a cooldown table")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER.size, 0, os.SEEK_SET)
+
+        self.capacity = capacity
+        self.window = window
+        self._map = mmap.mmap(self._fd, _HEADER.size + capacity * _SLOT.size)
+
+    def _lock(self, first_slot: int, slots: int, exclusive: bool) -> None:
+        fcntl.lockf(
+            self._fd,
+            fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH,
+            slots * _SLOT.size,
+            _HEADER.size + first_slot * _SLOT.size,
+            os.SEEK_SET
+        )
+
+    def _unlock(self, first_slot: int, slots: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, slots * _SLOT.size, _HEADER.size + first_slot * _SLOT.size, os.SEEK_SET)
+
+    def _probe(self, key_hash: int, first_slot: int, now: float) -> Tuple[Optional[int], int]:
+        """
+        Searches the window of a key. Has to be called while the window is locked
+
+        :param key_hash: the hash of the key
+        :param first_slot: the first slot of the window
+        :param now: the current time
+        :return: the slot of the key (None if it is not stored) and the slot a new entry should be written to
+        """
+        free_slot = None
+        free_expires_at = None
+
+        for slot in range(first_slot, first_slot + self.window):
+            slot_hash, _, expires_at = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)
+
+            if slot_hash == key_hash:
+                return slot, slot
+
+            # Prefer empty and expired slots, otherwise replace the cooldown ending first
+            if free_slot is None or (free_expires_at > now and expires_at < free_expires_at):
+                free_slot, free_expires_at = slot, expires_at
+
+        return None, free_slot
+
+    def _window_of(self, key: Tuple[int, Hashable]) -> Tuple[int, int]:
+        key_hash = _hash_key(key)
+
+        # Windows never wrap around, so each of them is a single lockable range
+        return key_hash, key_hash % (self.capacity - self.window + 1)
+
+    def _write(self, slot: int, key_hash: int, key: Tuple[int, Hashable], expires_at: float) -> None:
+        owner_id = key[0] if isinstance(key[0], int) else 0
+        _SLOT.pack_into(self._map, _HEADER.size + slot * _SLOT.size, key_hash, owner_id, expires_at)
+
+    def get(self, key: Tuple[int, Hashable]) -> float:
+        key_hash, first_slot = self._window_of(key)
+        self._lock(first_slot, self.window, False)
+
+        try:
+            now = get_clock().now()
+            slot, _ = self._probe(key_hash, first_slot, now)
+
+            if slot is None:
+                return 0.0
+
+            expires_at = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)[2]
+            return expires_at if expires_at > now else 0.0
+        finally:
+            self._unlock(first_slot, self.window)
+
+    def set(self, key: Tuple[int, Hashable], expires_at: float) -> None:
+        key_hash, first_slot = self._window_of(key)
+        self._lock(first_slot, self.window, True)
+
+        try:
+            _, free_slot = self._probe(key_hash, first_slot, get_clock().now())
+            self._write(free_slot, key_hash, key, expires_at)
+        finally:
+            self._unlock(first_slot, self.window)
+
+    def acquire(self, key: Tuple[int, Hashable], duration: float, uses: int = 1) -> float:
+        key_hash, first_slot = self._window_of(key)
+        self._lock(first_slot, self.window, True)
+
+        try:
+            now = get_clock().now()
+            slot, free_slot = self._probe(key_hash, first_slot, now)
+            expires_at = 0.0
+
+            if slot is not None:
+                expires_at = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)[2]
+
+            seconds_left, expires_at = gcra_acquire(expires_at, now, duration, uses)
+
+            if not seconds_left:
+                self._write(free_slot, key_hash, key, expires_at)
+
+            return seconds_left
+        finally:
+            self._unlock(first_slot, self.window)
+
+    def remove(self, key: Tuple[int, Hashable]) -> None:
+        key_hash, first_slot = self._window_of(key)
+        self._lock(first_slot, self.window, True)
+
+        try:
+            slot, _ = self._probe(key_hash, first_slot, get_clock().now())
+
+            if slot is not None:
+                _SLOT.pack_into(self._map, _HEADER.size + slot * _SLOT.size, 0, 0, 0.0)
+        finally:
+            self._unlock(first_slot, self.window)
+
+    def remove_id(self, owner_id: int) -> None:
+        """
+        Has to look at (and lock) the whole table
+        """
+        self._lock(0, self.capacity, True)
+
+        try:
+            for slot, (_, slot_owner_id, _) in enumerate(_SLOT.iter_unpack(self._map[_HEADER.size:])):
+                if slot_owner_id == owner_id:
+                    _SLOT.pack_into(self._map, _HEADER.size + slot * _SLOT.size, 0, 0, 0.0)
+        finally:
+            self._unlock(0, self.capacity)
+
+    def has_id(self, owner_id: int) -> bool:
+        """
+        Has to look at (and lock) the whole table
+        """
+        self._lock(0, self.capacity, False)
+
+        try:
+            now = get_clock().now()
+            return any(
+                slot_owner_id == owner_id and expires_at > now
+                for _, slot_owner_id, expires_at in _SLOT.iter_unpack(self._map[_HEADER.size:])
+            )
+        finally:
+            self._unlock(0, self.capacity)
+
+    def sweep(self) -> int:
+        """
+        Expired slots are reused when new cooldowns are written, so there is nothing to remove
+        """
+        return 0
+
+    @property
+    def size(self) -> int:
+        """
+        Has to look at the whole table
+
+        :return: the amount of running cooldowns
+        """
+        now = get_clock().now()
+        return sum(1 for _, _, expires_at in _SLOT.iter_unpack(self._map[_HEADER.size:]) if expires_at > now)
+
+    def close(self) -> None:
+        """
+        Closes the table of this process. The file stays for the other processes
+
+        :return: None
+        """
+        self._map.close()
+        os.close(self._fd)
+
+    def unlink(self) -> None:
+        """
+        Closes the table and deletes the file
+
+        :return: None
+        """
+        self.close()
+        os.unlink(self.path)
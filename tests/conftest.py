@@ -0,0 +1,54 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import yukari  # noqa: F401
+except ImportError:
+    # The repository itself is the yukari package, so it's loaded under that name when it is not installed
+    spec = importlib.util.spec_from_file_location("yukari", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["yukari"] = module
+    spec.loader.exec_module(module)
+
+from yukari import clock, commandhandler, cooldowns, eventhandler, notices, scheduler  # noqa: E402
+from yukari.logger import Logger  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def logger(tmp_path):
+    """
+    Every test logs into its own directory
+    """
+    instance = Logger()
+    instance.path = str(tmp_path) + "/"
+
+    return instance
+
+
+@pytest.fixture(autouse=True)
+def virtual_clock():
+    """
+    Every test runs on a virtual clock, so cooldowns and timeouts can be skipped instead of waited for
+    """
+    instance = clock.VirtualClock(1000.0)
+    clock.set_clock(instance)
+
+    yield instance
+
+    clock.set_clock(None)
+
+
+@pytest.fixture(autouse=True)
+def reset_singletons():
+    yield
+
+    commandhandler.command_handler_instance = None
+    eventhandler.event_handler_instance = None
+    cooldowns.subcommand_cooldowns_instance = None
+    notices.cooldown_notices_instance = None
+    scheduler.command_scheduler_instance = None
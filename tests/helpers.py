@@ -0,0 +1,93 @@
+import asyncio
+import types
+from typing import Any, List
+
+import discord
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.commandhandler import CommandHandler
+from yukari.decorators import SubCommand
+from yukari.permissions.permissions import Permission
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int = 10):
+        self.id = channel_id
+        self.sent: List[Any] = []
+
+    async def send(self, content: str = None, embed: discord.Embed = None):
+        self.sent.append(content if embed is None else embed.description)
+        return types.SimpleNamespace(content=content, channel=self, edit=self._edit)
+
+    async def _edit(self, content: str = None, **_):
+        self.sent.append(("edit", content))
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int = 1):
+        self.id = guild_id
+
+    def get_member(self, _):
+        return None
+
+    def get_role(self, _):
+        return None
+
+
+class FakeUser:
+    def __init__(self, user_id: int = 5):
+        self.id = user_id
+        self.guild_permissions = discord.Permissions.none()
+
+
+class FakeMessage:
+    def __init__(self, content: str, user_id: int = 5, guild_id: int = 1, channel: FakeChannel = None):
+        self.content = content
+        self.author = FakeUser(user_id)
+        self.guild = FakeGuild(guild_id) if guild_id is not None else None
+        self.channel = channel if channel is not None else FakeChannel()
+
+
+class Ping(BaseCommand):
+    def __init__(self, invoke: str = "ping", alias=("P", "pong")):
+        super().__init__(invoke, CommandHeader(Permission.NONE, alias=list(alias)))
+        self.calls = []
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str, *rest):
+        self.calls.append(rest)
+
+
+def make_handler(**kwargs: Any) -> CommandHandler:
+    """
+    :return: a command handler whose users all exist, speak english and have every permission
+    """
+    return CommandHandler(lambda _: "en", lambda _: "en", lambda _: True, lambda _: b"1111", **kwargs)
+
+
+def register(handler: CommandHandler, command: BaseCommand, category: str = "test") -> BaseCommand:
+    command._header.set_category(category)
+    command._header.set_cog_cls(command)
+    handler.register_command(command, category)
+
+    return command
+
+
+async def settle(rounds: int = 10) -> None:
+    """
+    Lets every ready task of the event loop run
+    """
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+class FakeTranslations:
+    """
+    Stands in for the i18n registry, every query returns its name and format data
+    """
+    def get(self, namespace: str) -> 'FakeTranslations':
+        return self
+
+    def query_string(self, language: str, query: str, *format_data: Any) -> str:
+        return " ".join(map(str, (query, *format_data)))
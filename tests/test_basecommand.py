@@ -0,0 +1,120 @@
+import asyncio
+from typing import Optional
+
+import discord
+import pytest
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.converters.floatconverter import FloatConverter
+from yukari.converters.integerconverter import IntegerConverter
+from yukari.decorators import Alias, SubCommand, Translation
+from yukari.permissions.permissions import Permission
+
+from helpers import FakeMessage, Ping, make_handler, register
+
+
+class Config(BaseCommand):
+    def __init__(self):
+        super().__init__("config", CommandHeader(Permission.NONE, alias=["cfg"]))
+        self.calls = []
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str, *rest):
+        self.calls.append(("root", rest))
+
+    @Alias("s")
+    @Translation("config.set")
+    @SubCommand("set")
+    async def set(self, message: discord.Message, lang: str, key: str, value: str):
+        self.calls.append(("set", key, value))
+
+    @Translation("config.set.prefix")
+    @SubCommand("set.prefix")
+    async def set_prefix(self, message: discord.Message, lang: str, prefix: str = None):
+        self.calls.append(("set.prefix", prefix))
+
+
+def run(handler, *contents):
+    async def main():
+        for content in contents:
+            await handler.run_command(FakeMessage(content))
+
+    asyncio.run(main())
+
+
+def test_arguments_walk_down_to_the_deepest_subcommand():
+    handler = make_handler()
+    command = register(handler, Config())
+
+    run(handler, "n+config SET language de", "n+config set PREFIX ?", "n+config s a b")
+
+    assert command.calls == [("set", "language", "de"), ("set.prefix", "?"), ("set", "a", "b")]
+
+
+def test_unknown_arguments_go_to_the_default_subcommand():
+    handler = make_handler()
+    command = register(handler, Config())
+
+    run(handler, "n+config", "n+config unknown set")
+
+    assert [call[0] for call in command.calls] == ["root", "root"]
+
+
+def test_command_aliases_use_the_subcommands_of_the_command():
+    handler = make_handler()
+    command = register(handler, Config())
+
+    run(handler, "n+cfg set prefix !")
+
+    assert command.calls == [("set.prefix", "!")]
+
+
+class Convert(BaseCommand):
+    def __init__(self):
+        super().__init__("convert", CommandHeader(Permission.NONE))
+        self.calls = []
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str, amount: int, factor: float, note: Optional[int]):
+        self.calls.append((amount, factor, note))
+
+
+def test_conversion_plan_is_compiled_once_per_subcommand():
+    command = Convert()
+    steps = command.root.conversion_plan.steps
+
+    assert [step.name for step in steps] == ["amount", "factor", "note"]
+    assert [step.converters for step in steps] == [(IntegerConverter,), (FloatConverter,), (IntegerConverter,)]
+    assert [step.optional for step in steps] == [False, False, True]
+
+
+def test_conversion_plan_converts_and_fills_missing_optionals():
+    handler = make_handler()
+    command = register(handler, Convert())
+
+    run(handler, "n+convert -3 1.5 7", "n+convert 2 0.5")
+
+    assert command.calls == [(-3, 1.5, 7), (2, 0.5, None)]
+
+
+def test_variadic_parameters_receive_the_first_argument():
+    handler = make_handler()
+    command = register(handler, Ping())
+
+    run(handler, "n+ping a b", "n+ping")
+
+    assert command.calls == [("a",), (None,)]
+
+
+def test_keyword_variadic_parameters_are_refused():
+    class Keywords(BaseCommand):
+        def __init__(self):
+            super().__init__("keywords", CommandHeader(Permission.NONE))
+
+        @SubCommand()
+        async def root(self, message: discord.Message, lang: str, **options):
+            pass
+
+    with pytest.raises(Exception):
+        Keywords()
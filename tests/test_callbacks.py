@@ -0,0 +1,45 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from yukari.callbacks import AsyncCallback
+
+
+def test_coroutine_functions_are_awaited_on_the_loop():
+    async def lookup(user_id):
+        return threading.current_thread(), user_id
+
+    callback = AsyncCallback(lookup)
+
+    assert callback.is_coroutine
+    assert asyncio.run(callback(5)) == (threading.main_thread(), 5)
+
+
+def test_synchronous_functions_run_on_the_executor():
+    executor = ThreadPoolExecutor(1, thread_name_prefix="lookups")
+    callback = AsyncCallback(lambda user_id: (threading.current_thread().name, user_id), executor)
+
+    try:
+        name, user_id = asyncio.run(callback(5))
+    finally:
+        executor.shutdown()
+
+    assert not callback.is_coroutine
+    assert name.startswith("lookups") and user_id == 5
+
+
+def test_synchronous_functions_can_run_on_the_loop():
+    callback = AsyncCallback(lambda: threading.current_thread(), offload=False)
+
+    assert asyncio.run(callback()) is threading.main_thread()
+
+
+def test_callable_objects_with_a_coroutine_call_are_awaited():
+    class Lookup:
+        async def __call__(self, user_id):
+            return user_id * 2
+
+    callback = AsyncCallback(Lookup())
+
+    assert callback.is_coroutine
+    assert asyncio.run(callback(4)) == 8
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from yukari.cache import TTLCache
+from yukari.clock import MonotonicClock, VirtualClock, get_clock, set_clock, wait_for
+
+from helpers import settle
+
+
+def test_the_monotonic_clock_is_used_by_default():
+    set_clock(None)
+
+    assert isinstance(get_clock(), MonotonicClock)
+
+
+def test_sleepers_wake_up_in_order_once_the_clock_passed_their_end():
+    clock = VirtualClock()
+    woken = []
+
+    async def sleeper(name, seconds):
+        await clock.sleep(seconds)
+        woken.append((name, clock.now()))
+
+    async def main():
+        tasks = [asyncio.ensure_future(sleeper(name, seconds)) for name, seconds in (("b", 20), ("a", 10), ("c", 30))]
+        await settle()
+
+        clock.advance(15)
+        await settle()
+        assert woken == [("a", 15)]
+
+        clock.advance(15)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    assert woken == [("a", 15), ("b", 30), ("c", 30)]
+
+
+def test_a_virtual_clock_cannot_go_back():
+    with pytest.raises(ValueError):
+        VirtualClock().advance(-1)
+
+
+def test_caches_expire_with_the_injected_clock(virtual_clock):
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+
+    virtual_clock.advance(9.9)
+
+    assert cache.get("a") == 1
+
+    virtual_clock.advance(0.1)
+
+    assert cache.get("a") is None
+    assert cache.get_stats() == {"size": 0, "hits": 1, "misses": 1}
+
+
+def test_timeouts_run_on_the_injected_clock(virtual_clock):
+    async def main():
+        never = asyncio.Event()
+        waiting = asyncio.ensure_future(wait_for(never.wait(), 5))
+        await settle()
+
+        virtual_clock.advance(4.9)
+        await settle()
+        assert not waiting.done()
+
+        virtual_clock.advance(0.1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await waiting
+
+        assert await wait_for(asyncio.sleep(0, "done"), 5) == "done"
+
+    asyncio.run(main())
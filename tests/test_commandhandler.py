@@ -0,0 +1,233 @@
+import asyncio
+from typing import Optional
+
+import discord
+import pytest
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.commandhandler import CommandHandler
+from yukari.decorators import SubCommand
+from yukari.permissions.permissions import Permission
+
+from helpers import FakeChannel, FakeMessage, FakeUser, Ping, make_handler, register
+
+
+def test_commands_and_aliases_are_case_insensitive():
+    handler = make_handler()
+    command = register(handler, Ping())
+
+    assert handler.is_command("PING")
+    assert handler.is_alias("p")
+    assert handler.get_command_name_by_alias("POng") == "ping"
+    assert handler.get_command("pong")["cog_cls"] is command
+    assert handler.get_command("unknown") is None
+
+
+def test_unregister_removes_aliases():
+    handler = make_handler()
+    register(handler, Ping())
+    revision = handler.revision
+
+    handler.unregister_command("Ping")
+
+    assert not handler.is_command("ping")
+    assert not handler.is_alias("pong")
+    assert handler.revision > revision
+
+
+def test_first_command_keeps_a_shared_alias():
+    handler = make_handler()
+    register(handler, Ping())
+    register(handler, Ping("other", alias=("pong",)))
+
+    assert handler.get_command_name_by_alias("pong") == "ping"
+
+
+def test_registering_a_command_twice_fails():
+    handler = make_handler()
+    register(handler, Ping())
+
+    with pytest.raises(SyntaxWarning):
+        register(handler, Ping())
+
+
+def test_run_command_resolves_aliases():
+    handler = make_handler()
+    command = register(handler, Ping())
+
+    assert asyncio.run(handler.run_command(FakeMessage("n+POng"))) == [True, None]
+    assert asyncio.run(handler.run_command(FakeMessage("n+unknown"))) is None
+    assert len(command.calls) == 1
+
+
+def test_guild_prefixes_are_resolved_once_and_cached(virtual_clock):
+    lookups = []
+
+    def get_guild_prefix(guild_id):
+        lookups.append(guild_id)
+        return {1: "?", 2: ["!!", "!"]}.get(guild_id)
+
+    handler = make_handler(prefix=["n+", "y!"], get_guild_prefix=get_guild_prefix, prefix_cache_ttl=60.0)
+    command = register(handler, Ping())
+
+    async def main():
+        results = []
+
+        for content, guild_id in (("?ping", 1), ("n+ping", 1), ("!!ping", 2), ("!ping", 2), ("y!ping", 3), ("?ping", 3)):
+            results.append(await handler.run_command(FakeMessage(content, guild_id=guild_id)))
+
+        return results
+
+    assert asyncio.run(main()) == [[True, None], None, [True, None], [True, None], [True, None], None]
+    assert lookups == [1, 2, 3]
+    assert len(command.calls) == 4
+
+    virtual_clock.advance(61.0)
+    asyncio.run(handler.run_command(FakeMessage("?ping", guild_id=1)))
+    handler.invalidate_guild_prefix(1)
+    asyncio.run(handler.run_command(FakeMessage("?ping", guild_id=1)))
+
+    assert lookups == [1, 2, 3, 1, 1]
+
+
+def count_lookups(lookups, name, value):
+    def lookup(_):
+        lookups[name] += 1
+        return value
+
+    return lookup
+
+
+def test_user_contexts_and_guild_languages_are_cached_until_invalidated():
+    lookups = dict.fromkeys(("guild_lang", "user_lang", "exists", "permission"), 0)
+    handler = CommandHandler(
+        count_lookups(lookups, "guild_lang", "de"),
+        count_lookups(lookups, "user_lang", "en"),
+        count_lookups(lookups, "exists", True),
+        count_lookups(lookups, "permission", b"1111")
+    )
+    register(handler, Ping())
+
+    async def main():
+        for _ in range(5):
+            await handler.run_command(FakeMessage("n+ping", user_id=5))
+
+        await handler.run_command(FakeMessage("n+ping", user_id=6))
+        handler.invalidate_user(5)
+        handler.invalidate_guild(1)
+        await handler.run_command(FakeMessage("n+ping", user_id=5))
+
+    asyncio.run(main())
+
+    assert lookups == {"guild_lang": 2, "user_lang": 3, "exists": 3, "permission": 3}
+
+
+def test_guilds_without_a_language_are_cached():
+    lookups = dict.fromkeys(("guild_lang", "user_lang", "exists", "permission"), 0)
+    handler = CommandHandler(
+        count_lookups(lookups, "guild_lang", None),
+        count_lookups(lookups, "user_lang", None),
+        count_lookups(lookups, "exists", False),
+        count_lookups(lookups, "permission", b"1111")
+    )
+    register(handler, Ping())
+
+    async def main():
+        for _ in range(3):
+            await handler.run_command(FakeMessage("n+ping"))
+
+    asyncio.run(main())
+
+    assert lookups["guild_lang"] == 1
+    assert handler.get_cache_stats()["guild_langs"]["hits"] == 2
+
+
+class Dice(BaseCommand):
+    def __init__(self):
+        super().__init__("dice", CommandHeader(Permission.NONE, command_cooldown=10, argument_cooldown={"Roll": 60}))
+        self.calls = []
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str, what: Optional[str]):
+        self.calls.append(what)
+
+
+def test_argument_cooldowns_apply_to_the_first_argument(virtual_clock):
+    handler = make_handler()
+    command = register(handler, Dice())
+    user = FakeUser(5)
+
+    async def main():
+        assert await handler.run_command(FakeMessage("n+dice roll")) == [True, None]
+        virtual_clock.advance(10)
+
+        assert await handler.run_command(FakeMessage("n+dice ROLL")) == [
+            False, "Bitte warte noch 50.0 Sekunde/n, bevor du den Befehl mit diesem Argument erneut benutzt!"
+        ]
+
+        assert await handler.run_command(FakeMessage("n+dice other")) == [True, None]
+
+    asyncio.run(main())
+
+    assert command.calls == ["roll", "other"]
+    assert handler.get_argument_cooldown("dice", "Roll", user) == 1060.0
+
+
+def test_a_rejected_call_does_not_start_the_other_cooldown(virtual_clock):
+    handler = make_handler()
+    register(handler, Dice())
+    user = FakeUser(5)
+
+    async def main():
+        await handler.run_command(FakeMessage("n+dice"))
+
+        # Rejected by the command cooldown, so the argument cooldown is not started
+        assert (await handler.run_command(FakeMessage("n+dice roll")))[0] is False
+        assert handler.get_argument_cooldown("dice", "roll", user) == 0
+
+        virtual_clock.advance(10)
+        assert await handler.run_command(FakeMessage("n+dice roll")) == [True, None]
+
+        # Rejected by the argument cooldown, so the command cooldown is not started
+        virtual_clock.advance(10)
+        assert (await handler.run_command(FakeMessage("n+dice roll")))[0] is False
+        assert handler.get_command_cooldown("dice", user) == 0
+
+    asyncio.run(main())
+
+
+class Shutdown(BaseCommand):
+    def __init__(self, maintenance: bool = False):
+        super().__init__("shutdown", CommandHeader(Permission.BOT_ADMIN, command_cooldown=30, only_for_bot_perm=True, maintenance=maintenance))
+        self.calls = []
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str):
+        self.calls.append(message.author.id)
+
+
+@pytest.mark.parametrize("maintenance,reply", [(False, "keine permissions"), (True, "maintenance")])
+def test_denied_calls_start_the_cooldown(virtual_clock, maintenance, reply):
+    lookups = dict.fromkeys(("guild_lang", "user_lang", "exists", "permission"), 0)
+    handler = CommandHandler(
+        count_lookups(lookups, "guild_lang", "de"),
+        count_lookups(lookups, "user_lang", "en"),
+        count_lookups(lookups, "exists", True),
+        count_lookups(lookups, "permission", bytes(Permission.BOT_USER))
+    )
+    command = register(handler, Shutdown(maintenance))
+    channel = FakeChannel()
+
+    async def main():
+        return [await handler.run_command(FakeMessage("n+shutdown", channel=channel)) for _ in range(3)]
+
+    first, *repeats = asyncio.run(main())
+
+    assert first == [True, None]
+    assert all(result[0] is False and "30.0" in result[1] for result in repeats)
+
+    # Only the first call got a reply and looked the user up
+    assert channel.sent == [reply]
+    assert lookups["permission"] == 1
+    assert not command.calls
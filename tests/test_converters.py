@@ -0,0 +1,78 @@
+import typing
+
+import pytest
+
+from yukari.converters.baseconverter import BaseConverter
+from yukari.converters.floatconverter import FloatConverter
+from yukari.converters.integerconverter import IntegerConverter
+from yukari.converters.registry import ConverterRegistry, get_converter_registry
+
+
+class Duration(int):
+    pass
+
+
+class DurationConverter(BaseConverter):
+    CONVERTER_TYPE = Duration
+
+    def convert(self, arguments):
+        argument = arguments[0].text
+        return (int(argument[:-1]) * 60, 1) if argument.endswith("m") else None
+
+
+def test_default_converters_are_registered():
+    registry = get_converter_registry()
+
+    assert registry.get(int) is IntegerConverter
+    assert registry.get(float) is FloatConverter
+
+
+def test_types_fall_back_to_the_converter_of_their_base_class():
+    registry = ConverterRegistry()
+    registry.register(IntegerConverter)
+
+    assert registry.get(Duration) is IntegerConverter
+
+    registry.register(DurationConverter)
+
+    assert registry.get(Duration) is DurationConverter
+
+
+def test_registering_a_type_twice_needs_override():
+    registry = ConverterRegistry()
+    registry.register(IntegerConverter)
+
+    with pytest.raises(Exception):
+        registry.register(IntegerConverter)
+
+    registry.register(IntegerConverter, override=True)
+
+    with pytest.raises(Exception):
+        registry.register(int)
+
+
+def test_unions_and_optionals_resolve_to_the_converters_of_their_types():
+    registry = ConverterRegistry()
+    registry.register(IntegerConverter)
+    registry.register(FloatConverter)
+
+    union = registry.resolve(typing.Union[int, float])
+    optional = registry.resolve(typing.Optional[int])
+
+    assert union.converters == (IntegerConverter, FloatConverter) and not union.optional
+    assert optional.converters == (IntegerConverter,) and optional.optional
+
+
+def test_resolutions_are_dropped_when_a_converter_changes():
+    registry = ConverterRegistry()
+    registry.register(IntegerConverter)
+
+    assert registry.resolve(Duration).converters == (IntegerConverter,)
+
+    registry.register(DurationConverter)
+
+    assert registry.resolve(Duration).converters == (DurationConverter,)
+
+    registry.unregister(Duration)
+
+    assert registry.resolve(Duration).converters == (IntegerConverter,)
@@ -0,0 +1,289 @@
+import asyncio
+
+import discord
+import pytest
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.cooldowns import CooldownBuckets, CooldownStore, gcra_acquire
+from yukari.decorators import Cooldown, SubCommand
+from yukari.i18n import registry as i18n_registry
+from yukari.permissions.permissions import Permission
+from yukari.sharedcooldowns import SharedMemoryCooldownBackend
+
+from helpers import FakeChannel, FakeMessage, FakeTranslations, make_handler, register, settle
+
+
+def test_cooldowns_expire_with_the_clock(virtual_clock):
+    store = CooldownStore()
+    store.set((5, "ping"), virtual_clock.now() + 10)
+
+    assert store.get((5, "ping")) == virtual_clock.now() + 10
+    assert store.has_id(5)
+
+    virtual_clock.advance(10)
+
+    assert store.get((5, "ping")) == 0
+    assert not store.has_id(5)
+
+
+def test_a_full_store_evicts_the_cooldown_ending_first(virtual_clock):
+    store = CooldownStore(max_entries=2)
+    now = virtual_clock.now()
+
+    store.set((1, "a"), now + 30)
+    store.set((2, "a"), now + 10)
+    store.set((3, "a"), now + 20)
+
+    assert len(store) == 2
+    assert store.get((2, "a")) == 0
+    assert store.get((1, "a")) and store.get((3, "a"))
+
+
+def test_sweep_removes_expired_cooldowns_and_ignores_replaced_ones(virtual_clock):
+    store = CooldownStore()
+    now = virtual_clock.now()
+
+    store.set((1, "a"), now + 5)
+    store.set((1, "a"), now + 50)
+    store.set((2, "a"), now + 5)
+    virtual_clock.advance(10)
+
+    assert store.sweep() == 1
+    assert len(store) == 1
+    assert store.get((1, "a")) == now + 50
+
+
+def test_replaced_end_times_do_not_pile_up(virtual_clock):
+    store = CooldownStore()
+
+    for i in range(1000):
+        store.set((1, "a"), virtual_clock.now() + 100 + i)
+
+    assert len(store) == 1
+    assert len(store._heap) < 100
+
+
+def test_remove_id_removes_every_cooldown_of_a_user(virtual_clock):
+    store = CooldownStore()
+
+    for key in ((1, "a"), (1, "b", "arg"), (2, "a")):
+        store.set(key, virtual_clock.now() + 10)
+
+    store.remove_id(1)
+
+    assert not store.has_id(1)
+    assert store.has_id(2)
+
+
+def test_the_sweeper_runs_on_the_clock(virtual_clock):
+    store = CooldownStore()
+
+    async def main():
+        store.set((1, "a"), virtual_clock.now() + 5)
+        store.start_sweeper(60)
+        await settle()
+
+        virtual_clock.advance(60)
+        await settle()
+        size = len(store)
+        store.stop_sweeper()
+
+        return size
+
+    assert asyncio.run(main()) == 0
+
+
+def test_buckets_expire_cooldowns_of_every_length(virtual_clock):
+    buckets = CooldownBuckets()
+
+    assert buckets.acquire((1, "a"), 10) == 0
+    assert buckets.acquire((1, "b"), 30) == 0
+    assert buckets.acquire((1, "a"), 10) == 10
+    assert buckets.get((1, "b")) == virtual_clock.now() + 30
+
+    virtual_clock.advance(10)
+
+    assert buckets.acquire((1, "a"), 10) == 0
+    assert buckets.get((1, "b"))
+
+
+def test_buckets_only_keep_running_cooldowns(virtual_clock):
+    buckets = CooldownBuckets()
+
+    for user_id in range(1000):
+        buckets.acquire((user_id, "a"), 5)
+        virtual_clock.advance(0.1)
+
+    # Every use sweeps the cooldowns which ended, so only the last 5 seconds of cooldowns are kept
+    assert len(buckets) == 51
+
+    virtual_clock.advance(5)
+    buckets.acquire((0, "a"), 5)
+
+    assert len(buckets) == 1
+
+
+def test_buckets_remove_cooldowns_of_a_user(virtual_clock):
+    buckets = CooldownBuckets()
+    buckets.acquire((1, "a"), 10)
+    buckets.acquire((1, "b"), 20)
+    buckets.acquire((2, "a"), 10)
+
+    buckets.remove((2, "a"))
+    buckets.remove_id(1)
+
+    assert not buckets.has_id(1) and not buckets.has_id(2)
+    assert buckets.acquire((1, "a"), 10) == 0
+
+
+class Daily(BaseCommand):
+    def __init__(self):
+        super().__init__("daily", CommandHeader(Permission.NONE))
+        self.calls = 0
+
+    @Cooldown(60)
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str):
+        self.calls += 1
+
+
+def test_subcommand_cooldowns_reject_and_notify(virtual_clock, monkeypatch):
+    monkeypatch.setattr(i18n_registry, "i18n_registry_instance", FakeTranslations())
+    handler = make_handler()
+    command = register(handler, Daily())
+    channel = FakeChannel()
+
+    async def main():
+        for _ in range(2):
+            await handler.run_command(FakeMessage("n+daily", channel=channel))
+
+        virtual_clock.advance(60)
+        await handler.run_command(FakeMessage("n+daily", channel=channel))
+
+    asyncio.run(main())
+
+    assert command.calls == 2
+    assert channel.sent == ["command_handler.cooldown 60"]
+
+
+@pytest.fixture(params=["store", "buckets", "shared"])
+def backend(request, tmp_path):
+    if request.param == "store":
+        yield CooldownStore()
+    elif request.param == "buckets":
+        yield CooldownBuckets()
+    else:
+        shared = SharedMemoryCooldownBackend(str(tmp_path / "cooldowns"), capacity=64, window=4)
+        yield shared
+        shared.unlink()
+
+
+def test_backends_start_and_end_cooldowns(backend, virtual_clock):
+    assert backend.acquire((1, "a"), 10) == 0
+    assert backend.acquire((1, "a"), 10) == 10
+    assert backend.get((1, "a")) == virtual_clock.now() + 10
+
+    virtual_clock.advance(10)
+
+    assert backend.get((1, "a")) == 0
+    assert backend.acquire((1, "a"), 10) == 0
+
+
+def test_backends_set_cooldowns_acquire_respects(backend, virtual_clock):
+    backend.acquire((1, "a"), 10)
+    backend.set((1, "a"), virtual_clock.now() + 30)
+    backend.set((2, "a"), virtual_clock.now() + 5)
+
+    assert backend.get((1, "a")) == virtual_clock.now() + 30
+    assert backend.acquire((1, "a"), 10) == 30
+    assert backend.has_id(2)
+
+    virtual_clock.advance(5)
+
+    assert not backend.has_id(2)
+    assert backend.acquire((2, "a"), 10) == 0
+
+    virtual_clock.advance(25)
+
+    assert backend.acquire((1, "a"), 10) == 0
+    assert backend.get((1, "a")) == virtual_clock.now() + 10
+
+
+def test_backends_remove_cooldowns(backend, virtual_clock):
+    backend.set((1, "a"), virtual_clock.now() + 30)
+    backend.acquire((1, "b"), 10)
+    backend.acquire((2, "a"), 10)
+
+    backend.remove((2, "a"))
+
+    assert backend.get((2, "a")) == 0
+    assert backend.has_id(1)
+
+    backend.remove_id(1)
+
+    assert not backend.has_id(1)
+    assert len(backend) == 0
+
+
+def test_shared_tables_are_seen_by_every_instance(tmp_path, virtual_clock):
+    path = str(tmp_path / "cooldowns")
+    first = SharedMemoryCooldownBackend(path, capacity=64, window=4)
+
+    # The dimensions of an existing table are used instead of the supplied ones
+    second = SharedMemoryCooldownBackend(path, capacity=2, window=1)
+
+    try:
+        assert first.acquire((1, "a"), 10) == 0
+        assert second.acquire((1, "a"), 10) == 10
+        assert second.capacity == 64
+    finally:
+        second.close()
+        first.unlink()
+
+
+def test_gcra_allows_a_burst_and_refills_one_use_per_interval():
+    tat = 0.0
+    results = []
+
+    for now in (100.0, 100.0, 100.0, 100.0, 110.0, 110.0):
+        seconds_left, tat = gcra_acquire(tat, now, 30.0, 3)
+        results.append(seconds_left)
+
+    assert results == [0.0, 0.0, 0.0, 10.0, 0.0, 10.0]
+    assert tat == 140.0
+
+
+def test_gcra_with_a_single_use_is_a_plain_cooldown():
+    seconds_left, tat = gcra_acquire(0.0, 100.0, 10.0)
+
+    assert (seconds_left, tat) == (0.0, 110.0)
+    assert gcra_acquire(tat, 104.0, 10.0) == (6.0, 110.0)
+
+
+class Vote(BaseCommand):
+    def __init__(self):
+        super().__init__("vote", CommandHeader(Permission.NONE))
+        self.calls = []
+
+    @Cooldown(30, uses=2, per="guild")
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str):
+        self.calls.append(message.author.id)
+
+
+def test_rate_limits_are_shared_by_their_scope(virtual_clock, monkeypatch):
+    monkeypatch.setattr(i18n_registry, "i18n_registry_instance", FakeTranslations())
+    handler = make_handler()
+    command = register(handler, Vote())
+
+    async def main():
+        for user_id, guild_id in ((1, 1), (2, 1), (3, 1), (3, 2)):
+            await handler.run_command(FakeMessage("n+vote", user_id=user_id, guild_id=guild_id))
+
+        virtual_clock.advance(15)
+        await handler.run_command(FakeMessage("n+vote", user_id=4, guild_id=1))
+
+    asyncio.run(main())
+
+    assert command.calls == [1, 2, 3, 4]
@@ -0,0 +1,101 @@
+import asyncio
+import gc
+
+import pytest
+
+from yukari.callbacks import AsyncCallback
+from yukari.dataloader import DataLoader
+
+
+def test_concurrent_lookups_of_a_key_share_one_call():
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0)
+        return key * 2
+
+    loader = DataLoader(AsyncCallback(load))
+
+    async def main():
+        return await asyncio.gather(*(loader.load(key) for key in (1, 1, 2, 1)))
+
+    assert asyncio.run(main()) == [2, 2, 4, 2]
+    assert calls == [1, 2]
+    assert loader.stats == {"requests": 4, "coalesced": 2, "calls": 2, "batched_keys": 0}
+
+
+def test_keys_of_one_loop_iteration_are_loaded_in_bulk():
+    batches = []
+
+    async def load_many(keys):
+        batches.append(list(keys))
+        return [key * 2 for key in keys]
+
+    loader = DataLoader(AsyncCallback(lambda key: None), AsyncCallback(load_many))
+
+    async def main():
+        return await asyncio.gather(*(loader.load(key) for key in (1, 2, 2, 3)))
+
+    assert asyncio.run(main()) == [2, 4, 4, 6]
+    assert batches == [[1, 2, 3]]
+
+
+def test_errors_are_raised_to_every_caller():
+    async def load_many(keys):
+        raise LookupError("database down")
+
+    loader = DataLoader(AsyncCallback(lambda key: None), AsyncCallback(load_many))
+
+    async def main():
+        return await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(main())] == [LookupError, LookupError]
+    assert not loader._in_flight
+
+
+def test_running_lookups_survive_garbage_collection():
+    release = None
+
+    async def load(key):
+        await release.wait()
+        return key
+
+    loader = DataLoader(AsyncCallback(load))
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        lookup = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0)
+
+        assert len(loader._tasks) == 1
+
+        gc.collect()
+        release.set()
+
+        return await asyncio.wait_for(lookup, 1.0)
+
+    assert asyncio.run(main()) == 1
+    assert not loader._tasks
+
+
+def test_a_cancelled_caller_does_not_cancel_the_lookup():
+    async def load(key):
+        await asyncio.sleep(0.01)
+        return key
+
+    loader = DataLoader(AsyncCallback(load))
+
+    async def main():
+        first = asyncio.ensure_future(loader.load(1))
+        second = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        return await second
+
+    assert asyncio.run(main()) == 1
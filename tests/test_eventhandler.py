@@ -0,0 +1,436 @@
+import asyncio
+
+import discord
+import pytest
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.dataholders import ReactionAddEvent, ReactionEmoji
+from yukari.decorators import Event, SubCommand
+from yukari.enums import EventType
+from yukari.eventhandler import EventHandler
+from yukari.permissions.permissions import Permission
+from yukari.utils import create_event_batching
+
+from helpers import FakeChannel, make_handler, register, settle
+
+
+def reaction(message_id: int = 100, user_id: int = 5, name: str = "👍", emoji_id: int = None) -> ReactionAddEvent:
+    return ReactionAddEvent(user_id, message_id, 10, 1, ReactionEmoji(name, emoji_id, False), None)
+
+
+class Poll(BaseCommand):
+    def __init__(self, invoke: str = "poll"):
+        super().__init__(invoke, CommandHeader(Permission.NONE))
+        self.reactions = []
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str):
+        pass
+
+    @Event(EventType.REACTION_ADD)
+    async def on_reaction(self, event: ReactionAddEvent):
+        self.reactions.append(event)
+
+
+def test_the_dispatch_table_follows_registered_commands():
+    handler = make_handler()
+    event_handler = EventHandler()
+    poll = register(handler, Poll())
+
+    asyncio.run(event_handler.dispatch_event(EventType.REACTION_ADD, reaction()))
+
+    assert len(poll.reactions) == 1
+    assert [subscription.name for subscription in event_handler.get_handlers(EventType.REACTION_ADD)] == ["poll.on_reaction"]
+
+    # Looking up the route again does not rebuild the table
+    route = event_handler.get_route(EventType.REACTION_ADD)
+    assert event_handler.get_route(EventType.REACTION_ADD) is route
+
+    handler.unregister_command("poll")
+
+    asyncio.run(event_handler.dispatch_event(EventType.REACTION_ADD, reaction()))
+
+    assert len(poll.reactions) == 1
+    assert not event_handler.get_handlers(EventType.REACTION_ADD)
+
+
+def test_injected_functions_run_after_the_commands():
+    handler = make_handler()
+    event_handler = EventHandler()
+    calls = []
+
+    @event_handler.on_event(EventType.REACTION_ADD)
+    async def injected(event):
+        calls.append("injected")
+
+    class Ordered(Poll):
+        @Event(EventType.REACTION_ADD)
+        async def on_reaction(self, event: ReactionAddEvent):
+            calls.append("command")
+
+    register(handler, Ordered())
+
+    asyncio.run(event_handler.dispatch_event(EventType.REACTION_ADD, reaction()))
+
+    assert calls == ["command", "injected"]
+    assert event_handler.stats["dispatched"] == 1
+    assert event_handler.stats["handled"] == 2
+
+
+def test_concurrent_handlers_run_at_once_and_serial_ones_in_order():
+    make_handler()
+    event_handler = EventHandler(concurrent=True)
+    events = []
+
+    async def main():
+        release = asyncio.Event()
+
+        @event_handler.on_event(EventType.REACTION_ADD)
+        async def waiting(event):
+            events.append("waiting")
+            await release.wait()
+
+        @event_handler.on_event(EventType.REACTION_ADD)
+        async def releasing(event):
+            events.append("releasing")
+            release.set()
+
+        @event_handler.on_event(EventType.REACTION_ADD, serial=True)
+        async def first(event):
+            events.append("first")
+            await asyncio.sleep(0)
+            events.append("first done")
+
+        @event_handler.on_event(EventType.REACTION_ADD, serial=True)
+        async def second(event):
+            events.append("second")
+
+        # Run one after another, the waiting handler would wait forever
+        await asyncio.wait_for(event_handler.dispatch_event(EventType.REACTION_ADD, reaction()), 1.0)
+
+    asyncio.run(main())
+
+    assert events.index("first done") < events.index("second")
+    assert event_handler.stats["handled"] == 4
+
+
+def test_failing_and_slow_handlers_do_not_stop_the_others(virtual_clock):
+    make_handler()
+    event_handler = EventHandler(concurrent=True, handler_timeout=5)
+    calls = []
+
+    @event_handler.on_event(EventType.REACTION_ADD)
+    async def failing(event):
+        raise ValueError("nope")
+
+    @event_handler.on_event(EventType.REACTION_ADD)
+    async def slow(event):
+        await asyncio.Event().wait()
+
+    @event_handler.on_event(EventType.REACTION_ADD)
+    async def working(event):
+        calls.append(event)
+
+    async def main():
+        dispatch = asyncio.ensure_future(event_handler.dispatch_event(EventType.REACTION_ADD, reaction()))
+        await settle()
+
+        assert calls and not dispatch.done()
+
+        virtual_clock.advance(5)
+        await dispatch
+
+    asyncio.run(main())
+
+    assert len(calls) == 1
+    assert {key: event_handler.stats[key] for key in ("handled", "errors", "timeouts")} == {"handled": 1, "errors": 1, "timeouts": 1}
+
+
+def make_menu() -> Poll:
+    """
+    :return: a new command class every time, since changing the filter keys changes the EventWrapper of the class
+    """
+    class Menu(Poll):
+        def __init__(self):
+            super().__init__("menu")
+
+        @Event(EventType.REACTION_ADD, message_id=100, emoji=("👍", 42))
+        async def on_reaction(self, event: ReactionAddEvent):
+            self.reactions.append((event.message_id, event.emoji.name))
+
+    return Menu()
+
+
+def test_events_only_reach_handlers_whose_filters_match():
+    handler = make_handler()
+    event_handler = EventHandler()
+    menu = register(handler, make_menu())
+
+    async def main():
+        for event in (reaction(), reaction(name="👎"), reaction(101), reaction(name="custom", emoji_id=42)):
+            await event_handler.dispatch_event(EventType.REACTION_ADD, event)
+
+    asyncio.run(main())
+
+    assert menu.reactions == [(100, "👍"), (100, "custom")]
+
+
+def test_filter_keys_can_be_changed_at_runtime():
+    handler = make_handler()
+    event_handler = EventHandler()
+    menu = register(handler, make_menu())
+    calls = []
+
+    @event_handler.on_event(EventType.REACTION_ADD, message_id=200)
+    async def injected(event):
+        calls.append(event.message_id)
+
+    async def main():
+        for message_id in (100, 101, 200, 201):
+            await event_handler.dispatch_event(EventType.REACTION_ADD, reaction(message_id))
+
+    event_handler.add_filter_keys(menu.on_reaction, message_id=101)
+    event_handler.add_filter_keys(injected, message_id=(201, 202))
+    asyncio.run(main())
+
+    assert menu.reactions == [(100, "👍"), (101, "👍")]
+    assert calls == [200, 201]
+
+    event_handler.remove_filter_keys(menu.on_reaction, message_id=100)
+    event_handler.remove_filter_keys(injected, message_id=200)
+    asyncio.run(main())
+
+    assert menu.reactions == [(100, "👍"), (101, "👍"), (101, "👍")]
+    assert calls == [200, 201, 201]
+
+
+def test_adding_a_new_filter_field_restricts_the_handler():
+    handler = make_handler()
+    event_handler = EventHandler()
+    class Unfiltered(Poll):
+        @Event(EventType.REACTION_ADD)
+        async def on_reaction(self, event: ReactionAddEvent):
+            self.reactions.append(event)
+
+    poll = register(handler, Unfiltered())
+
+    event_handler.add_filter_keys(poll.on_reaction, message_id=100)
+
+    async def main():
+        for message_id in (100, 101):
+            await event_handler.dispatch_event(EventType.REACTION_ADD, reaction(message_id))
+
+    asyncio.run(main())
+
+    assert [event.message_id for event in poll.reactions] == [100]
+
+
+def test_the_same_reaction_is_only_dispatched_once_within_the_window(virtual_clock):
+    make_handler()
+    event_handler = EventHandler(reaction_dedup_window=2.0)
+    calls = []
+
+    @event_handler.on_event(EventType.REACTION_ADD)
+    async def injected(event):
+        calls.append((event.author_id, event.message_id, event.emoji.name))
+
+    async def main():
+        # The cached and the raw event of a reaction, then other users, messages and emojis
+        for event in (reaction(), reaction(), reaction(user_id=6), reaction(101), reaction(name="👎")):
+            await event_handler.dispatch_reaction_add(event)
+
+        virtual_clock.advance(2.0)
+        await event_handler.dispatch_reaction_add(reaction())
+
+    asyncio.run(main())
+
+    assert calls == [(5, 100, "👍"), (6, 100, "👍"), (5, 101, "👍"), (5, 100, "👎"), (5, 100, "👍")]
+    assert event_handler.stats["deduplicated"] == 1
+
+
+def test_guild_emojis_are_deduplicated_by_their_id():
+    make_handler()
+    event_handler = EventHandler()
+    calls = []
+
+    @event_handler.on_event(EventType.REACTION_ADD)
+    async def injected(event):
+        calls.append(event.emoji.name)
+
+    async def main():
+        await event_handler.dispatch_reaction_add(reaction(name="pog", emoji_id=42))
+        await event_handler.dispatch_reaction_add(reaction(name="renamed", emoji_id=42))
+        await event_handler.dispatch_reaction_add(reaction(name="pog", emoji_id=43))
+
+    asyncio.run(main())
+
+    assert calls == ["pog", "pog"]
+
+
+def discord_message(message_id: int, channel_id: int = 10) -> discord.Message:
+    """
+    :return: a discord.Message without a connection, holding just its id and channel
+    """
+    message = discord.Message.__new__(discord.Message)
+    message.id = message_id
+    message.channel = FakeChannel(channel_id)
+    message.guild = None
+
+    return message
+
+
+def test_events_are_batched_per_message_within_the_window(virtual_clock):
+    make_handler()
+    event_handler = EventHandler()
+    batches = []
+
+    @event_handler.on_event(EventType.REACTION_ADD, batch_window=5)
+    async def injected(events):
+        batches.append([(event.message_id, event.author_id) for event in events])
+
+    async def main():
+        for message_id, user_id in ((100, 1), (101, 1), (100, 2)):
+            await event_handler.dispatch_event(EventType.REACTION_ADD, reaction(message_id, user_id))
+
+        await settle()
+        assert not batches
+
+        virtual_clock.advance(5)
+        await settle()
+
+    asyncio.run(main())
+
+    assert batches == [[(100, 1), (100, 2)], [(101, 1)]]
+    assert (event_handler.stats["batched"], event_handler.stats["batches"]) == (3, 2)
+
+
+def test_full_batches_are_handed_over_without_blocking_the_dispatch():
+    make_handler()
+    event_handler = EventHandler(handler_timeout=5)
+    batches = []
+
+    async def main():
+        release = asyncio.Event()
+
+        @event_handler.on_event(EventType.REACTION_ADD, batch_window=5, max_batch=2)
+        async def injected(events):
+            await release.wait()
+            batches.append(len(events))
+
+        for user_id in (1, 2, 3):
+            await asyncio.wait_for(event_handler.dispatch_event(EventType.REACTION_ADD, reaction(user_id=user_id)), 1.0)
+
+        release.set()
+        await event_handler.flush_batches()
+
+    asyncio.run(main())
+
+    assert batches == [2, 1]
+
+
+def test_messages_are_batched_by_their_id():
+    make_handler()
+    event_handler = EventHandler()
+    batches = []
+
+    @event_handler.on_event(EventType.MESSAGE_SEND, batch_window=5)
+    async def sent(messages):
+        batches.append([message.id for message in messages])
+
+    @event_handler.on_event(EventType.MESSAGE_EDIT, batch_window=5)
+    async def edited(edits):
+        batches.append([(before.id, after.id) for before, after in edits])
+
+    async def main():
+        for message_id in (1, 2, 1):
+            await event_handler.dispatch_event(EventType.MESSAGE_SEND, discord_message(message_id))
+
+        await event_handler.dispatch_event(EventType.MESSAGE_EDIT, discord_message(3), discord_message(3))
+        await event_handler.dispatch_event(EventType.MESSAGE_EDIT, discord_message(3), discord_message(3))
+        await event_handler.flush_batches()
+
+    asyncio.run(main())
+
+    assert sorted(batches, key=str) == [[(3, 3), (3, 3)], [1, 1], [2]]
+
+
+def test_events_without_the_batch_key_are_handed_over_one_by_one():
+    make_handler()
+    event_handler = EventHandler()
+    batches = []
+
+    @event_handler.on_event(EventType.REACTION_ADD, batch_window=5, batch_key="emoji")
+    async def injected(events):
+        batches.append(len(events))
+
+    async def main():
+        for _ in range(2):
+            await event_handler.dispatch_event(EventType.REACTION_ADD, ReactionAddEvent(5, 100, 10, 1, None, None))
+
+        await settle()
+
+    asyncio.run(main())
+
+    assert batches == [1, 1]
+    assert event_handler.stats["unbatched"] == 2
+
+
+def test_debounced_batches_are_handed_over_after_max_wait(virtual_clock):
+    make_handler()
+    event_handler = EventHandler()
+    batches = []
+
+    @event_handler.on_event(EventType.REACTION_ADD, debounce=1, max_wait=3)
+    async def injected(events):
+        batches.append((virtual_clock.now() - 1000, len(events)))
+
+    async def main():
+        # An event every half second never leaves a second without events
+        for _ in range(10):
+            await event_handler.dispatch_event(EventType.REACTION_ADD, reaction())
+            await settle()
+            virtual_clock.advance(0.5)
+            await settle()
+
+        # The last event came in at 4.5
+        virtual_clock.advance(0.5)
+        await settle()
+
+    asyncio.run(main())
+
+    assert batches == [(3.0, 6), (5.5, 4)]
+
+
+def test_debounce_waits_ten_windows_at_most_by_default():
+    assert create_event_batching(None, None, 2, "message_id").max_wait == 20
+    assert create_event_batching(5, None, None, "message_id").max_wait == 5
+
+
+def test_batching_cannot_be_combined_with_serial():
+    with pytest.raises(Exception):
+        Event(EventType.REACTION_ADD, serial=True, batch_window=5)
+
+    with pytest.raises(Exception):
+        create_event_batching(5, None, None, "message_id", max_wait=10)
+
+
+def test_every_registered_command_batches_its_own_events(virtual_clock):
+    class BatchedPoll(Poll):
+        @Event(EventType.REACTION_ADD, batch_window=1.0)
+        async def on_reaction(self, events):
+            self.reactions.append(len(events))
+
+    handler = make_handler()
+    event_handler = EventHandler()
+    polls = [register(handler, BatchedPoll(invoke)) for invoke in ("a", "b")]
+
+    async def main():
+        await event_handler.dispatch_event(EventType.REACTION_ADD, reaction())
+
+        virtual_clock.advance(1.0)
+        await settle()
+
+    asyncio.run(main())
+
+    assert [poll.reactions for poll in polls] == [[1], [1]]
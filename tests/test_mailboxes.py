@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from yukari.mailboxes import GuildMailboxes
+
+from helpers import settle
+
+
+def test_work_of_a_key_runs_in_order_while_keys_run_in_parallel():
+    mailboxes = GuildMailboxes(workers=4)
+    events = []
+
+    async def work(key, name):
+        events.append(("start", key, name))
+        await asyncio.sleep(0)
+        events.append(("end", key, name))
+        return name
+
+    async def main():
+        results = await asyncio.gather(*(mailboxes.submit(key, work, key, name) for name in "ab" for key in (1, 2)))
+        await mailboxes.close()
+        return results
+
+    assert asyncio.run(main()) == ["a", "a", "b", "b"]
+
+    for key in (1, 2):
+        assert [event for event in events if event[1] == key] == [("start", key, "a"), ("end", key, "a"), ("start", key, "b"), ("end", key, "b")]
+
+    # Both keys started before either finished
+    assert [event[0] for event in events[:2]] == ["start", "start"]
+
+
+def test_exceptions_reach_the_caller_and_the_worker_goes_on():
+    mailboxes = GuildMailboxes()
+
+    async def fail():
+        raise ValueError("nope")
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    async def ok():
+        return 1
+
+    async def main():
+        with pytest.raises(ValueError):
+            await mailboxes.submit(1, fail)
+
+        with pytest.raises(asyncio.CancelledError):
+            await mailboxes.submit(1, cancelled)
+
+        result = await mailboxes.submit(1, ok)
+        await mailboxes.close()
+        return result
+
+    assert asyncio.run(main()) == 1
+    assert mailboxes.stats["started"] == 1
+    assert mailboxes.stats["completed"] == 3
+
+
+def test_a_cancelled_worker_is_restarted_by_the_next_message():
+    mailboxes = GuildMailboxes(workers=1)
+
+    async def block(event):
+        await event.wait()
+
+    async def ok():
+        return 1
+
+    async def main():
+        event = asyncio.Event()
+        running = asyncio.ensure_future(mailboxes.submit(1, block, event))
+        waiting = asyncio.ensure_future(mailboxes.submit(1, ok))
+        await settle()
+
+        worker = mailboxes._workers[0]
+        worker.task.cancel()
+        await settle()
+
+        # Neither the running nor the waiting message is left hanging
+        assert running.cancelled() and waiting.cancelled()
+        assert worker.task is None
+
+        result = await asyncio.wait_for(mailboxes.submit(1, ok), 1.0)
+        await mailboxes.close()
+        return result
+
+    assert asyncio.run(main()) == 1
+    assert mailboxes.stats["started"] == 2
+
+
+def test_idle_workers_are_reaped(virtual_clock):
+    mailboxes = GuildMailboxes(idle_timeout=60)
+
+    async def ok():
+        return 1
+
+    async def main():
+        await mailboxes.submit(1, ok)
+        await settle()
+        virtual_clock.advance(59)
+        await settle()
+
+        # A new message restarts the idle timeout of the worker
+        await mailboxes.submit(1, ok)
+        await settle()
+        virtual_clock.advance(59)
+        await settle()
+        assert mailboxes.get_depths()
+
+        virtual_clock.advance(1)
+        await settle()
+
+    asyncio.run(main())
+
+    assert not mailboxes.get_depths()
+    assert (mailboxes.stats["started"], mailboxes.stats["reaped"]) == (1, 1)
+
+
+def test_full_mailboxes_reject_messages():
+    mailboxes = GuildMailboxes(workers=1, mailbox_size=1, overflow="reject")
+
+    async def block(event):
+        await event.wait()
+        return True
+
+    async def main():
+        event = asyncio.Event()
+        running = asyncio.ensure_future(mailboxes.submit(1, block, event))
+        await settle()
+        queued = asyncio.ensure_future(mailboxes.submit(1, block, event))
+        await settle()
+
+        assert await mailboxes.submit(1, block, event) is None
+
+        event.set()
+        results = await asyncio.gather(running, queued)
+        await mailboxes.close()
+        return results
+
+    assert asyncio.run(main()) == [True, True]
+    assert mailboxes.stats["rejected"] == 1
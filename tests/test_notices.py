@@ -0,0 +1,101 @@
+import asyncio
+
+import discord
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.decorators import Cooldown, SubCommand
+from yukari.i18n import registry as i18n_registry
+from yukari.notices import CooldownNotices, CooldownRejection, set_cooldown_notices
+from yukari.permissions.permissions import Permission
+
+from helpers import FakeChannel, FakeMessage, FakeTranslations, make_handler, register
+
+
+class Slow(BaseCommand):
+    def __init__(self):
+        super().__init__("slow", CommandHeader(Permission.NONE, command_cooldown=10))
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str):
+        pass
+
+
+class Daily(BaseCommand):
+    def __init__(self):
+        super().__init__("daily", CommandHeader(Permission.NONE))
+
+    @Cooldown(60)
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str):
+        pass
+
+
+def spam(handler, channel, content, times, clock=None, advance=0.0):
+    async def main():
+        results = []
+
+        for _ in range(times):
+            results.append(await handler.run_command(FakeMessage(content, channel=channel)))
+
+            if clock is not None:
+                clock.advance(advance)
+
+        return results
+
+    return asyncio.run(main())
+
+
+def test_rejections_are_messages_built_on_demand():
+    rejection = CooldownRejection(2.345)
+
+    assert str(rejection) == "Bitte warte noch 2.3 Sekunde/n, bevor du den Befehl erneut benutzt!"
+    assert "Argument" in str(CooldownRejection(1, argument=True))
+
+
+def test_always_returns_every_rejection_as_string(virtual_clock):
+    handler = make_handler(cooldown_notices=CooldownNotices("always"))
+    register(handler, Slow())
+
+    results = spam(handler, FakeChannel(), "n+slow", 3)
+
+    assert results[0] == [True, None]
+    assert all(result[0] is False and isinstance(result[1], str) for result in results[1:])
+
+
+def test_once_returns_one_rejection_per_cooldown(virtual_clock):
+    notices = CooldownNotices("once")
+    handler = make_handler(cooldown_notices=notices)
+    register(handler, Slow())
+
+    results = spam(handler, FakeChannel(), "n+slow", 12, virtual_clock, 1.0)
+
+    assert [result[1] is not None for result in results if result[0] is False] == [True] + [False] * 8 + [True]
+    assert notices.stats["suppressed"] == 8
+
+
+def test_edit_sends_command_rejections_and_edits_them_later(virtual_clock):
+    notices = CooldownNotices("edit")
+    handler = make_handler(cooldown_notices=notices)
+    register(handler, Slow())
+    channel = FakeChannel()
+
+    results = spam(handler, channel, "n+slow", 21, virtual_clock, 1.0)
+
+    # The first notice of every cooldown is sent once, the notices of the following cooldowns edit it
+    assert all(result == [False, None] for result in results if result[0] is not True)
+    assert len(channel.sent) == 2
+    assert channel.sent[1][0] == "edit"
+    assert notices.stats == {"sent": 1, "edited": 1, "suppressed": 16}
+
+
+def test_edit_edits_subcommand_notices(virtual_clock, monkeypatch):
+    monkeypatch.setattr(i18n_registry, "i18n_registry_instance", FakeTranslations())
+    set_cooldown_notices(CooldownNotices("edit"))
+    handler = make_handler()
+    register(handler, Daily())
+    channel = FakeChannel()
+
+    spam(handler, channel, "n+daily", 5, virtual_clock, 30.0)
+
+    assert channel.sent == ["command_handler.cooldown 30", ("edit", "command_handler.cooldown 30")]
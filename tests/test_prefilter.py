@@ -0,0 +1,44 @@
+from yukari.prefilter import CommandPrefilter, PrefixTrie
+
+
+def test_prefix_trie_matches_the_longest_prefix():
+    trie = PrefixTrie(["!", "!!", "n+"])
+
+    assert trie.match("!!ping") == 2
+    assert trie.match("!ping") == 1
+    assert trie.match("n+ping") == 2
+    assert trie.match("n-ping") == -1
+    assert trie.match("") == -1
+
+
+def test_prefilter_rejects_non_command_messages_per_stage():
+    prefilter = CommandPrefilter(["n+"])
+    prefilter.invokes.add("ping")
+
+    for content in ("hello", "n+", "n+   ", "n+unknown"):
+        assert prefilter.match(content) is None
+
+    assert prefilter.stats == {"received": 4, "no_prefix": 1, "no_invoke": 2, "unknown_invoke": 1, "accepted": 0}
+
+
+def test_prefilter_matches_invokes_case_insensitive():
+    prefilter = CommandPrefilter(["n+"])
+    prefilter.invokes.add("ping")
+
+    match = prefilter.match("n+ PING now")
+
+    assert match.invoke == "ping"
+    assert (match.prefix_end, match.invoke_end) == (2, 7)
+    assert prefilter.stats["accepted"] == 1
+
+
+def test_prefilter_uses_the_given_prefixes_instead_of_the_default_ones():
+    prefilter = CommandPrefilter(["n+"])
+    prefilter.invokes.add("ping")
+
+    assert prefilter.match("?ping", PrefixTrie(["?"])) is not None
+    assert prefilter.match("n+ping", PrefixTrie(["?"])) is None
+
+    prefilter.reset_stats()
+
+    assert not any(prefilter.stats.values())
@@ -0,0 +1,240 @@
+import asyncio
+
+import discord
+import pytest
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.decorators import MaxConcurrency, SubCommand, Translation
+from yukari.permissions.permissions import Permission
+from yukari.scheduler import CommandScheduler, ConcurrencyLimit, get_command_scheduler
+
+from helpers import FakeMessage, FakeUser, Ping, make_handler, register, settle
+
+
+def test_a_full_queue_rejects_new_executions():
+    scheduler = CommandScheduler()
+    limit = ConcurrencyLimit(1, queue_size=1, overflow="reject")
+
+    async def main():
+        assert await scheduler.acquire("cmd", 0, limit)
+        queued = asyncio.ensure_future(scheduler.acquire("cmd", 0, limit))
+        await settle()
+
+        assert not await scheduler.acquire("cmd", 0, limit)
+
+        scheduler.release("cmd", 0)
+        assert await queued
+        scheduler.release("cmd", 0)
+
+    asyncio.run(main())
+
+    stats = scheduler.get_stats()["cmd"]
+    assert (stats["accepted"], stats["rejected"], stats["queued"], stats["max_queued"]) == (2, 1, 0, 1)
+
+
+def test_drop_oldest_drops_the_longest_waiting_execution():
+    scheduler = CommandScheduler()
+    limit = ConcurrencyLimit(1, queue_size=1, overflow="drop_oldest")
+
+    async def main():
+        await scheduler.acquire("cmd", 0, limit)
+        oldest = asyncio.ensure_future(scheduler.acquire("cmd", 0, limit))
+        await settle()
+        newest = asyncio.ensure_future(scheduler.acquire("cmd", 0, limit))
+        await settle()
+
+        assert oldest.done() and oldest.result() is False
+
+        scheduler.release("cmd", 0)
+        assert await newest
+
+    asyncio.run(main())
+
+    assert scheduler.get_stats()["cmd"]["dropped"] == 1
+
+
+def test_wait_holds_callers_back_until_the_queue_has_room():
+    scheduler = CommandScheduler()
+    limit = ConcurrencyLimit(1, queue_size=1, overflow="wait")
+
+    async def main():
+        await scheduler.acquire("cmd", 0, limit)
+        queued = asyncio.ensure_future(scheduler.acquire("cmd", 0, limit))
+        await settle()
+        waiting = asyncio.ensure_future(scheduler.acquire("cmd", 0, limit))
+        await settle()
+
+        assert not waiting.done()
+
+        scheduler.release("cmd", 0)
+        await settle()
+        assert await queued and not waiting.done()
+
+        scheduler.release("cmd", 0)
+        assert await waiting
+
+    asyncio.run(main())
+
+
+def test_slots_are_handed_over_in_order_of_arrival():
+    scheduler = CommandScheduler()
+    limit = ConcurrencyLimit(1)
+    order = []
+
+    async def execution(name):
+        await scheduler.acquire("cmd", 0, limit)
+        order.append(name)
+        await asyncio.sleep(0)
+        scheduler.release("cmd", 0)
+
+    async def main():
+        await asyncio.gather(*(execution(name) for name in "abcde"))
+
+    asyncio.run(main())
+
+    assert order == list("abcde")
+
+
+def test_cancelled_waiters_give_up_their_place():
+    scheduler = CommandScheduler()
+    limit = ConcurrencyLimit(1)
+
+    async def main():
+        await scheduler.acquire("cmd", 0, limit)
+        cancelled = asyncio.ensure_future(scheduler.acquire("cmd", 0, limit))
+        queued = asyncio.ensure_future(scheduler.acquire("cmd", 0, limit))
+        await settle()
+
+        cancelled.cancel()
+        await settle()
+        scheduler.release("cmd", 0)
+
+        assert await queued
+        scheduler.release("cmd", 0)
+
+    asyncio.run(main())
+
+    assert scheduler.get_stats()["cmd"]["queued"] == 0
+    assert not scheduler._limiters
+
+
+def test_wait_time_is_measured_with_the_clock(virtual_clock):
+    scheduler = CommandScheduler()
+    limit = ConcurrencyLimit(1, per="user")
+
+    async def main():
+        await scheduler.acquire("cmd", 5, limit)
+        queued = asyncio.ensure_future(scheduler.acquire("cmd", 5, limit))
+        await settle()
+
+        virtual_clock.advance(2.5)
+        scheduler.release("cmd", 5)
+        await queued
+        scheduler.release("cmd", 5)
+
+    asyncio.run(main())
+
+    stats = scheduler.get_stats()["cmd"]
+    assert stats["wait_time"] == stats["max_wait_time"] == 2.5
+
+    # Limits per user are forgotten once nobody uses them
+    assert not scheduler._limiters
+
+
+def test_invalid_limits_are_refused():
+    with pytest.raises(Exception):
+        CommandScheduler(max_concurrency=0)
+
+    with pytest.raises(Exception):
+        MaxConcurrency(1, per="planet")(lambda: None)
+
+
+class Report(BaseCommand):
+    def __init__(self, gate: asyncio.Event):
+        super().__init__("report", CommandHeader(Permission.NONE, command_cooldown=10))
+        self.gate = gate
+        self.calls = []
+
+    @MaxConcurrency(1, queue_size=10)
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str):
+        self.calls.append(message.author.id)
+        await self.gate.wait()
+
+    @Translation("report.quick")
+    @MaxConcurrency(1, queue_size=0, overflow="reject")
+    @SubCommand("quick")
+    async def quick(self, message: discord.Message, lang: str):
+        self.calls.append(message.author.id)
+        await self.gate.wait()
+
+
+def test_executions_waiting_for_a_subcommand_do_not_hold_global_slots():
+    handler = make_handler(command_scheduler=CommandScheduler(max_concurrency=2))
+    ping = register(handler, Ping())
+
+    async def main():
+        report = register(handler, Report(asyncio.Event()))
+        reports = [asyncio.ensure_future(handler.run_command(FakeMessage("n+report", user_id=user_id))) for user_id in (1, 2, 3)]
+        await settle()
+
+        # One report runs and two wait for the report slot, so there still is a global slot for other commands
+        assert await asyncio.wait_for(handler.run_command(FakeMessage("n+ping")), 1.0) == [True, None]
+
+        report.gate.set()
+        assert await asyncio.gather(*reports) == [[True, None]] * 3
+
+    asyncio.run(main())
+
+    assert len(ping.calls) == 1
+    assert get_command_scheduler().get_stats()["global"]["max_queued"] == 0
+
+
+def test_dropped_executions_do_not_start_cooldowns():
+    handler = make_handler()
+
+    async def main():
+        report = register(handler, Report(asyncio.Event()))
+        running = asyncio.ensure_future(handler.run_command(FakeMessage("n+report quick", user_id=1)))
+        await settle()
+
+        assert await handler.run_command(FakeMessage("n+report quick", user_id=2)) == [False, None]
+        assert handler.get_command_cooldown("report", FakeUser(2)) == 0
+        assert handler.get_command_cooldown("report", FakeUser(1))
+
+        report.gate.set()
+        await running
+
+        return report.calls
+
+    assert asyncio.run(main()) == [1]
+    assert get_command_scheduler().get_stats()["report.quick"]["rejected"] == 1
+
+
+def test_queued_executions_hold_their_cooldown():
+    handler = make_handler()
+
+    async def main():
+        report = register(handler, Report(asyncio.Event()))
+        running = asyncio.ensure_future(handler.run_command(FakeMessage("n+report", user_id=1)))
+        await settle()
+
+        queued = asyncio.ensure_future(handler.run_command(FakeMessage("n+report", user_id=2)))
+        await settle()
+
+        # The queued call started the cooldown, so the user cannot queue up more calls
+        assert handler.get_command_cooldown("report", FakeUser(2))
+        repeated = await handler.run_command(FakeMessage("n+report", user_id=2))
+
+        report.gate.set()
+        results = await asyncio.gather(running, queued)
+
+        return report.calls, results, repeated
+
+    calls, results, repeated = asyncio.run(main())
+
+    assert calls == [1, 2]
+    assert results == [[True, None], [True, None]]
+    assert repeated[0] is False and "Sekunde" in repeated[1]
+
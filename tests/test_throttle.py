@@ -0,0 +1,51 @@
+import asyncio
+
+from yukari.throttle import FloodThrottle
+
+from helpers import FakeMessage, Ping, make_handler, register
+
+
+def test_authors_may_send_a_burst_then_their_rate(virtual_clock):
+    throttle = FloodThrottle(user_rate=1.0, user_burst=3)
+
+    assert [throttle.allow(FakeMessage("n+ping")) for _ in range(4)] == [True, True, True, False]
+
+    virtual_clock.advance(1.0)
+
+    assert throttle.allow(FakeMessage("n+ping"))
+    assert not throttle.allow(FakeMessage("n+ping"))
+    assert throttle.allow(FakeMessage("n+ping", user_id=6))
+    assert throttle.stats == {"received": 7, "dropped_user": 2, "dropped_guild": 0, "allowed": 5}
+
+
+def test_guild_buckets_are_shared_by_every_author(virtual_clock):
+    throttle = FloodThrottle(guild_rate=1.0, guild_burst=2)
+
+    assert [throttle.allow(FakeMessage("n+ping", user_id=user_id)) for user_id in (1, 2, 3)] == [True, True, False]
+    assert throttle.allow(FakeMessage("n+ping", user_id=3, guild_id=2))
+    assert throttle.allow(FakeMessage("n+ping", user_id=4, guild_id=None))
+
+
+def test_a_flooding_author_does_not_use_up_the_guild(virtual_clock):
+    throttle = FloodThrottle(user_rate=1.0, user_burst=1, guild_rate=1.0, guild_burst=2)
+
+    for _ in range(5):
+        throttle.allow(FakeMessage("n+ping", user_id=1))
+
+    assert throttle.allow(FakeMessage("n+ping", user_id=2))
+    assert throttle.stats["dropped_user"] == 4
+
+    throttle.reset_stats()
+
+    assert not any(throttle.stats.values())
+
+
+def test_the_handler_drops_floods_silently(virtual_clock):
+    handler = make_handler(flood_throttle=FloodThrottle(user_rate=1.0, user_burst=2))
+    command = register(handler, Ping())
+
+    async def main():
+        return [await handler.run_command(FakeMessage(content)) for content in ("n+ping", "hello", "n+ping", "n+ping")]
+
+    assert asyncio.run(main()) == [[True, None], None, [True, None], None]
+    assert len(command.calls) == 2
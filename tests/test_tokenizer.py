@@ -0,0 +1,77 @@
+import asyncio
+
+import discord
+
+from yukari.basecommand import BaseCommand
+from yukari.baseheaders import CommandHeader
+from yukari.converters.types import EncapsulatedSpacedString, SpacedString
+from yukari.decorators import SubCommand, Translation
+from yukari.permissions.permissions import Permission
+from yukari.tokenizer import tokenize
+
+from helpers import FakeMessage, make_handler, register
+
+
+def test_tokens_keep_case_and_compute_lowercase_forms():
+    tokens = tokenize("n+Say Hello WORLD", 2)
+
+    assert [token.text for token in tokens] == ["Say", "Hello", "WORLD"]
+    assert [token.lower for token in tokens] == ["say", "hello", "world"]
+
+
+def test_quoted_arguments_may_contain_whitespace():
+    tokens = tokenize('a "b  c" “d e” f"g h"')
+
+    assert [token.text for token in tokens] == ["a", "b  c", "d e", 'f"g', 'h"']
+    assert [token.quoted for token in tokens] == [False, True, True, False, False]
+
+
+def test_a_quote_followed_by_text_is_part_of_the_argument():
+    tokens = tokenize('"a"b c')
+
+    assert [token.text for token in tokens] == ['"a"b', "c"]
+
+
+def test_slices_to_the_end_are_views():
+    tokens = tokenize("a b c d")
+    view = tokens[1:][1:]
+
+    assert [token.text for token in view] == ["c", "d"]
+    assert view.tokens is tokens.tokens
+    assert view[-1].text == "d"
+    assert len(tokens[10:]) == 0
+
+
+def test_text_of_a_view_strips_the_quotes_of_every_token():
+    tokens = tokenize('x "Hello World" again')
+
+    assert tokens[1:].text == "Hello World again"
+    assert tokens[5:].text == ""
+
+
+class Say(BaseCommand):
+    def __init__(self):
+        super().__init__("say", CommandHeader(Permission.NONE))
+        self.calls = []
+
+    @SubCommand()
+    async def root(self, message: discord.Message, lang: str, times: int, text: SpacedString):
+        self.calls.append((times, text))
+
+    @Translation("say.title")
+    @SubCommand("title")
+    async def title(self, message: discord.Message, lang: str, title: EncapsulatedSpacedString, text: SpacedString):
+        self.calls.append((title, text))
+
+
+def test_spaced_strings_are_the_same_whetever_they_are_quoted():
+    handler = make_handler()
+    command = register(handler, Say())
+
+    async def main():
+        for content in ('n+say 2 Hello World', 'n+say 2 "Hello World"', 'n+say title "Big News" Read It'):
+            await handler.run_command(FakeMessage(content))
+
+    asyncio.run(main())
+
+    assert command.calls == [(2, "Hello World"), (2, "Hello World"), ("Big News", "Read It")]
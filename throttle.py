@@ -0,0 +1,70 @@
+from typing import Dict
+
+import discord
+
+from yukari.cooldowns import CooldownStore
+
+
+class FloodThrottle:
+    """
+    Anti-flood throttle for messages which look like commands, checked before they are parsed
+    Every author and every guild gets a token bucket: a burst of messages is allowed,
+    afterwards the bucket refills with rate messages per second. Excess messages are dropped silently.
+    The buckets are kept as generic cell rate algorithm state (see gcra_acquire) in bounded cooldown stores,
+    which is equivalent to a token bucket but only needs a single float per author and guild
+    """
+    def __init__(
+            self,
+            user_rate: float = None,
+            user_burst: int = 5,
+            guild_rate: float = None,
+            guild_burst: int = 50,
+            max_entries: int = 100000
+    ):
+        """
+        :param user_rate: the messages per second an author may send on average, None disables the author buckets
+        :param user_burst: the amount of messages an author may send at once
+        :param guild_rate: the messages per second a guild may send on average, None disables the guild buckets
+        :param guild_burst: the amount of messages a guild may send at once
+        :param max_entries: the maximum amount of authors and of guilds whose buckets are kept at the same time
+        """
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.guild_rate = guild_rate
+        self.guild_burst = guild_burst
+        self._user_buckets = CooldownStore(max_entries)
+        self._guild_buckets = CooldownStore(max_entries)
+        self.stats: Dict[str, int] = dict.fromkeys(("received", "dropped_user", "dropped_guild", "allowed"), 0)
+
+    def allow(self, message: discord.Message) -> bool:
+        """
+        Takes a token from the bucket of the author and from the bucket of the guild
+        The author is checked first, so a single flooding author does not empty the bucket of the guild
+
+        :param message: the message which starts with a prefix and a known command
+        :return: whetever the message may be processed
+        """
+        stats = self.stats
+        stats["received"] += 1
+
+        if self.user_rate is not None and self._user_buckets.acquire(
+                (message.author.id, "flood"), self.user_burst / self.user_rate, self.user_burst):
+            stats["dropped_user"] += 1
+            return False
+
+        if self.guild_rate is not None and message.guild is not None and self._guild_buckets.acquire(
+                (message.guild.id, "flood"), self.guild_burst / self.guild_rate, self.guild_burst):
+            stats["dropped_guild"] += 1
+            return False
+
+        stats["allowed"] += 1
+        return True
+
+    def reset_stats(self) -> None:
+        """
+        Resets every counter to 0
+
+        :return: None
+        """
+        for counter in self.stats:
+            self.stats[counter] = 0
@@ -0,0 +1,122 @@
+import re
+from typing import Iterator, List, Sequence, Union
+
+# A quoted argument only ends at a closing quote followed by whitespace or the end of the message
+# Otherwise the quote is just part of a regular argument
+_TOKEN_PATTERN = re.compile(r'"([^"]*)"(?!\S)|“([^”]*)”(?!\S)|\S+')
+
+
+class Token:
+    """
+    Span of a single argument inside the message content
+    The text and its lowercase form are only sliced out of the content when they are used
+    """
+    __slots__ = ("source", "start", "end", "quoted", "_text", "_lower")
+
+    def __init__(self, source: str, start: int, end: int, quoted: bool):
+        """
+        :param source: the whole message content
+        :param start: the index of the first character of the argument (including the opening quote)
+        :param end: the index after the last character of the argument (including the closing quote)
+        :param quoted: whetever the argument is encapsulated in quotes
+        """
+        self.source = source
+        self.start = start
+        self.end = end
+        self.quoted = quoted
+        self._text = None
+        self._lower = None
+
+    @property
+    def text(self) -> str:
+        """
+        :return: the argument as typed by the user, without the surrounding quotes
+        """
+        if self._text is None:
+            if self.quoted:
+                self._text = self.source[self.start + 1:self.end - 1]
+            else:
+                self._text = self.source[self.start:self.end]
+
+        return self._text
+
+    @property
+    def lower(self) -> str:
+        """
+        :return: the lowercase form of the argument, used for matching invokes and subcommands
+        """
+        if self._lower is None:
+            self._lower = self.text.lower()
+
+        return self._lower
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"<Token text={self.text!r} start={self.start} end={self.end} quoted={self.quoted}>"
+
+
+class TokenList(Sequence):
+    """
+    Read-only view over the tokens of a message
+    Slicing from an index to the end returns another view over the same tokens instead of a copy
+    """
+    __slots__ = ("source", "tokens", "offset")
+
+    def __init__(self, source: str, tokens: List[Token], offset: int = 0):
+        """
+        :param source: the whole message content
+        :param tokens: every token of the message
+        :param offset: the index of the first token visible in this view
+        """
+        self.source = source
+        self.tokens = tokens
+        self.offset = offset
+
+    def __len__(self) -> int:
+        return len(self.tokens) - self.offset
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Token, 'TokenList', List[Token]]:
+        if isinstance(index, slice):
+            if index.stop is None and index.step is None and (index.start or 0) >= 0:
+                return TokenList(self.source, self.tokens, min(self.offset + (index.start or 0), len(self.tokens)))
+
+            return self.tokens[self.offset:][index]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+
+        return self.tokens[self.offset + index]
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(self.offset, len(self.tokens)):
+            yield self.tokens[index]
+
+    @property
+    def text(self) -> str:
+        """
+        :return: the text of every token of this view separated by a space, quoted tokens without their quotes
+        """
+        return " ".join(token.text for token in self)
+
+    def __repr__(self):
+        return f"<TokenList {[token.text for token in self]}>"
+
+
+def tokenize(content: str, start: int = 0) -> TokenList:
+    """
+    Splits the message content into tokens in a single pass
+    Arguments are separated by whitespace, arguments in quotes ("..." or “...”) may contain whitespace
+
+    :param content: the message content
+    :param start: the index to start at (e.g. after the prefix)
+    :return: the tokens of the message
+    """
+    return TokenList(
+        content,
+        [Token(content, match.start(), match.end(), match.lastindex is not None) for match in _TOKEN_PATTERN.finditer(content, start)]
+    )
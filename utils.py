@@ -1,7 +1,12 @@
-from typing import List, Any
+from typing import List, Any, Dict, Hashable, Optional, Set, Tuple
 
-from yukari.baseheaders import EventWrapper, SubcommandWrapper
+import discord
+
+from yukari.baseheaders import EventBatching, EventWrapper, SubcommandWrapper
+from yukari.dataholders import ReactionEmoji, normalize_emoji_name
 from yukari.enums import EventType
+from yukari.logger import get_logger
+from yukari.tokenizer import TokenList
 
 
 class DefaultValueList(list):
@@ -18,6 +23,145 @@ class DefaultValueList(list):
             return default
 
 
+# Fields events can be filtered by, ordered from the most to the least selective
+EVENT_FILTER_FIELDS = ("message_id", "channel_id", "guild_id", "emoji")
+
+# The maximum wait of a debounced batch in debounce windows, unless set with max_wait
+DEBOUNCE_MAX_WAIT_FACTOR = 10
+
+# A discord.Message names its own id "id" and only holds its channel and guild, not their ids
+_MESSAGE_FILTER_KEYS = {
+    "message_id": lambda message: message.id,
+    "channel_id": lambda message: message.channel.id,
+    "guild_id": lambda message: message.guild.id if message.guild is not None else None
+}
+
+
+def normalize_event_filters(**filters: Any) -> Dict[str, Set[Hashable]]:
+    """
+    :param filters: for every field of EVENT_FILTER_FIELDS a single key, an iterable of keys or None for no filter.
+                    Emojis can be given as ReactionEmoji, emoji id, unicode emoji or name
+    :return: the set of keys of every filtered field
+    """
+    normalized = {}
+
+    for field, keys in filters.items():
+        if field not in EVENT_FILTER_FIELDS:
+            get_logger().critical(f"Cannot filter events by {field}, use one of {', '.join(EVENT_FILTER_FIELDS)}")
+
+        if keys is None:
+            continue
+
+        if isinstance(keys, (str, int, ReactionEmoji)):
+            keys = (keys,)
+
+        if field == "emoji":
+            keys = (normalize_filter_emoji(key) for key in keys)
+
+        normalized[field] = set(keys)
+
+    return normalized
+
+
+def create_event_batching(
+        batch_window: Optional[float],
+        max_batch: Optional[int],
+        debounce: Optional[float],
+        batch_key: Optional[str],
+        max_wait: Optional[float] = None,
+        serial: bool = False
+) -> Optional[EventBatching]:
+    """
+    :param batch_window: the seconds events are collected after the first one, None for no batching
+    :param max_batch: the amount of events after which the handler is called right away, None for no limit
+    :param debounce: the seconds without a new event after which the handler is called, None for no debouncing
+    :param batch_key: the field of EVENT_FILTER_FIELDS events are batched by, None to batch every event together
+    :param max_wait: the seconds after the first event a debounced batch is handed over at the latest,
+                     None for DEBOUNCE_MAX_WAIT_FACTOR times the debounce
+    :param serial: whetever the handler has to run one after another with the other serial handlers
+    :return: the batching settings or None if events are not batched
+    """
+    if batch_window is None and debounce is None:
+        if max_batch is not None:
+            get_logger().critical("max_batch needs a batch_window or debounce")
+
+        if max_wait is not None:
+            get_logger().critical("max_wait needs a debounce")
+
+        return None
+
+    if batch_window is not None and debounce is not None:
+        get_logger().critical("Use either batch_window or debounce, not both")
+
+    # Batches are handed over by timers long after the events were dispatched, outside of any serial run
+    if serial:
+        get_logger().critical("Batched handlers cannot run serially, use either serial or batching")
+
+    if max_wait is not None and debounce is None:
+        get_logger().critical("max_wait needs a debounce, a batch_window already is the maximum wait")
+
+    if max_wait is not None and max_wait < debounce:
+        get_logger().critical(f"max_wait has to be at least the debounce ({debounce}), got {max_wait}")
+
+    if max_batch is not None and max_batch < 1:
+        get_logger().critical(f"A batch needs at least one event, got {max_batch}")
+
+    if batch_key is not None and batch_key not in EVENT_FILTER_FIELDS:
+        get_logger().critical(f"Cannot batch events by {batch_key}, use one of {', '.join(EVENT_FILTER_FIELDS)}")
+
+    if debounce is None:
+        max_wait = batch_window
+    elif max_wait is None:
+        # Otherwise a steady stream of events would never be handed over
+        max_wait = debounce * DEBOUNCE_MAX_WAIT_FACTOR
+
+    return EventBatching(
+        batch_window if debounce is None else debounce,
+        max_batch if max_batch is not None else 0,
+        debounce is not None,
+        batch_key,
+        max_wait
+    )
+
+
+def normalize_filter_emoji(key: Any) -> Hashable:
+    """
+    :param key: a ReactionEmoji, emoji id, unicode emoji or emoji name
+    :return: the id of guild emojis, otherwise the normalized name
+    """
+    if isinstance(key, ReactionEmoji):
+        return key.emoji_id if key.is_guild else normalize_emoji_name(key.name)
+
+    if isinstance(key, str):
+        return normalize_emoji_name(key)
+
+    return key
+
+
+def get_event_filter_keys(event: Any, field: str) -> Tuple[Hashable, ...]:
+    """
+    :param event: the event data, e.g. a ReactionAddEvent or discord.Message
+    :param field: one of EVENT_FILTER_FIELDS
+    :return: the keys of the event a filter of that field is compared with
+    """
+    if isinstance(event, discord.Message):
+        get_key = _MESSAGE_FILTER_KEYS.get(field)
+        value = get_key(event) if get_key is not None else None
+    else:
+        value = getattr(event, field, None)
+
+    if value is None:
+        return ()
+
+    if isinstance(value, ReactionEmoji):
+        if value.is_guild:
+            return value.emoji_id, value.name
+
+        return normalize_emoji_name(value.name),
+
+    return value,
+
+
 class EventList(list):
     """
     Custom list containing event functions
@@ -100,3 +244,102 @@ class SubCommandList(list):
                 count += 1
 
         return count
+
+
+class SubCommandNode:
+    """
+    Node of the compiled subcommand routing tree
+    Every node holds one subcommand and its following subcommands keyed by their lowercased short names
+    """
+    __slots__ = ("wrapper", "previous", "children")
+
+    def __init__(self, wrapper: SubcommandWrapper, previous: Optional[SubcommandWrapper] = None):
+        """
+        :param wrapper: the subcommand wrapper of this node
+        :param previous: the subcommand before this one or None if the node follows the main subcommand
+        """
+        self.wrapper = wrapper
+        self.previous = previous
+        self.children = {}
+
+
+class SubCommandTree:
+    """
+    Prefix tree compiled from the one way linked subcommands (SubCommandHeader._next)
+    Resolving a subcommand costs one dictionary lookup per argument, regardless of how deep the subcommand is
+    """
+    def __init__(self):
+        self.roots = {}
+
+    def compile(self, subcommands: SubCommandList) -> None:
+        """
+        (Re)builds the tree. Every subcommand at position 0 becomes the root for its invoke
+
+        :param subcommands: the registered subcommands, already linked via their headers
+        :return: None
+        """
+        self.roots = {}
+
+        for wrapper in subcommands:
+            header = wrapper.header
+
+            if header.name == "" and header.invoke.lower() not in self.roots:
+                root = SubCommandNode(wrapper)
+                self._compile_children(root, None, {id(wrapper)})
+                self.roots[header.invoke.lower()] = root
+
+    def _compile_children(self, node: SubCommandNode, previous: Optional[SubcommandWrapper], visited: Set[int]) -> None:
+        """
+        Recursively creates the child nodes of a node
+
+        :param node: the node whose children are created
+        :param previous: the subcommand the children will see as their previous subcommand
+        :param visited: ids of the subcommands on the current path, used to stop on cyclic links
+        :return: None
+        """
+        for next_wrapper in node.wrapper.header._next:  # noqa
+            if id(next_wrapper) in visited:
+                continue
+
+            child = SubCommandNode(next_wrapper, previous)
+
+            for possible_name in next_wrapper.header.get_all():
+                token = possible_name.split(".")[-1].lower()
+
+                if token in node.children:
+                    get_logger().warning(
+                        f"Subcommand '{next_wrapper.header.name}' of command '{next_wrapper.header.invoke}' "
+                        f"is shadowed by another subcommand named '{token}'"
+                    )
+                    continue
+
+                node.children[token] = child
+
+            self._compile_children(child, next_wrapper, visited | {id(next_wrapper)})
+
+    def resolve(self, invoke: str, args: TokenList) -> Optional[Tuple[SubCommandNode, int]]:
+        """
+        Walks the arguments down the tree as long as they name a following subcommand
+
+        :param invoke: the lowercased invoke of the subcommand tree to walk
+        :param args: the argument tokens of the message
+        :return: the deepest matching node and the amount of arguments consumed by subcommand names
+                 or None if there is no subcommand for the invoke
+        """
+        node = self.roots.get(invoke)
+
+        if node is None:
+            return None
+
+        consumed = 0
+
+        for argument in args:
+            child = node.children.get(argument.lower)
+
+            if child is None:
+                break
+
+            node = child
+            consumed += 1
+
+        return node, consumed